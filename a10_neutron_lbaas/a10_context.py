@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import logging
 
 import acos_client.errors as acos_errors
@@ -19,6 +20,34 @@ import acos_client.errors as acos_errors
 LOG = logging.getLogger(__name__)
 
 
+def partition_name(device_cfg, tenant_id):
+    """The appliance partition a tenant's objects live in on a device."""
+
+    if device_cfg['v_method'].lower() == 'adp':
+        return tenant_id[0:13]
+    return device_cfg.get("shared_partition", "shared")
+
+
+@contextlib.contextmanager
+def partition_client(driver, device, partition):
+    """A pooled session for device with partition active.
+
+    Pooled sessions keep the partition they last had active, so 'shared'
+    is activated too; acos_client skips the call when it already is.
+    """
+
+    client = driver._get_a10_client(device)
+    try:
+        client.system.partition.active(partition)
+    except Exception:
+        driver._release_a10_client(device, client, discard=True)
+        raise
+    try:
+        yield client
+    finally:
+        driver._release_a10_client(device, client)
+
+
 class A10Context(object):
 
     def __init__(self, handler, openstack_context, openstack_lbaas_obj,
@@ -30,6 +59,8 @@ class A10Context(object):
         self.openstack_context = openstack_context
         self.openstack_lbaas_obj = openstack_lbaas_obj
         self.device_name = kwargs.get('device_name', None)
+        # Skip write-behind and write memory before returning.
+        self.sync_write = kwargs.get('sync_write', False)
         LOG.debug("A10Context obj=%s", openstack_lbaas_obj)
         self.partition_name = "shared"
 
@@ -41,19 +72,30 @@ class A10Context(object):
             d = self.a10_driver._select_a10_device(self.tenant_id)
         self.device_cfg = d
         self.client = self.a10_driver._get_a10_client(self.device_cfg)
-        self.select_appliance_partition()
+        try:
+            self.select_appliance_partition()
+        except Exception:
+            self.release_client(discard=True)
+            raise
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        try:
-            LOG.debug("Session not closed after call!!")
-            #self.client.session.close()
-        except acos_errors.InvalidSessionID:
-            pass
+        # Sessions are pooled and reused across requests; hand it back
+        # unless the appliance told us it is no longer valid.
+        discard = (exc_type is not None and
+                   issubclass(exc_type, acos_errors.InvalidSessionID))
+        self.release_client(discard=discard)
 
         if exc_type is not None:
             return False
 
+    def release_client(self, discard=False):
+        client = getattr(self, 'client', None)
+        if client is not None:
+            self.client = None
+            self.a10_driver._release_a10_client(self.device_cfg, client,
+                                                discard=discard)
+
     def get_tenant_id(self):
         if hasattr(self.openstack_lbaas_obj, 'tenant_id'):
             self.tenant_id = self.openstack_lbaas_obj.root_loadbalancer.tenant_id
@@ -62,10 +104,7 @@ class A10Context(object):
 
     def select_appliance_partition(self):
 
-        name = self.device_cfg.get("shared_partition", "shared")
-
-        if self.device_cfg['v_method'].lower() == 'adp':
-            name = self.tenant_id[0:13]
+        name = partition_name(self.device_cfg, self.tenant_id)
 
         # If we are not using appliance partitions, we are done.
         if name == 'shared':
@@ -73,11 +112,13 @@ class A10Context(object):
 
         self.partition_name = name
 
+        # acos_client skips the call when the (pooled) session already has
+        # this partition active.
         try:
             self.client.system.partition.active(name)
             return
         except acos_errors.NotFound:
-            pass
+            self.a10_driver.session_pool.partition_deleted(self.device_cfg, name)
 
         # Create it if not found
         self.hooks.partition_create(self.client, self.openstack_context, name)
@@ -87,18 +128,17 @@ class A10Context(object):
 class A10WriteContext(A10Context):
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if exc_type is None and self.device_cfg.get('write_memory', True):
-            try:
-                partition_deleted = getattr(self, "partition_deleted", False)
-                partition_name = None if partition_deleted else self.partition_name
-                self.client.system.action.activate_and_write(partition_name)
-
-            except acos_errors.InvalidSessionID:
-                pass
-
-            for v in self.device_cfg.get('ha_sync_list', []):
-                self.client.ha.sync(v['ip'], v['username'], v['password'])
-        super(A10WriteContext, self).__exit__(exc_type, exc_value, traceback)
+        try:
+            if exc_type is None and self.device_cfg.get('write_memory', True):
+                writer = self.a10_driver.write_coalescer
+                partition_name = self.partition_name
+                if getattr(self, "partition_deleted", False):
+                    writer.forget(self.device_cfg, partition_name)
+                    partition_name = None
+                writer.write(self.device_cfg, self.client, partition_name,
+                             sync=self.sync_write)
+        finally:
+            super(A10WriteContext, self).__exit__(exc_type, exc_value, traceback)
 
 
 # class A10WriteStatusContext(A10WriteContext):
@@ -145,5 +185,6 @@ class A10DeleteContextBase(A10WriteContext):
                 self.hooks.partition_delete(self.client, self.openstack_context, name)
                 LOG.debug("hooks.partition_delete of %s succeeded " % (name))
                 self.partition_deleted = True
+                self.a10_driver.session_pool.partition_deleted(self.device_cfg, name)
             except Exception:
                 LOG.exception("A10Driver: partition cleanup failed; ignoring")
@@ -31,3 +31,18 @@ class DeviceConfigMissing(Exception):
 
 class NoDatabaseURL(Exception):
     pass
+
+
+class DeviceSessionUnavailable(Exception):
+    pass
+
+
+class BulkOperationError(Exception):
+    """Some of the items of a bulk operation failed.
+
+    failures holds an (item, exception) pair for each of them.
+    """
+
+    def __init__(self, message, failures):
+        super(BulkOperationError, self).__init__(message)
+        self.failures = failures
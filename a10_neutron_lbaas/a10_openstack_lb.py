@@ -16,14 +16,23 @@ import logging
 
 import a10_config
 import acos_client
+import circuit_breaker
+import exporter
+import ha_sync
+import metrics
 import plumbing_hooks as hooks
+import session_pool
+import stats_cache
+import stats_collector
 import version
+import write_memory
 
 import v1.handler_hm
 import v1.handler_member
 import v1.handler_pool
 import v1.handler_vip
 
+import v2.handler_batch
 import v2.handler_hm
 import v2.handler_lb
 import v2.handler_listener
@@ -38,7 +47,6 @@ import os
 
 logging.basicConfig()
 LOG = logging.getLogger(__name__)
-MAX_ACOS_CACHE_TIME = 60
 
 def signal_handler(obj):
     def handler(*args):
@@ -54,18 +62,37 @@ class A10OpenstackLBBase(object):
         self.openstack_driver = openstack_driver
         self.config = a10_config.A10Config(config_name)
         self.neutron = neutron_hooks_module
-        self.acos_client_internal = None
-        self.last_acos_client_creation = int(time.time())
         LOG.info("A10-neutron-lbaas: initializing, version=%s, acos_client=%s",
                  version.VERSION, acos_client.VERSION)
-        self.my_lock = threading.Lock()
+        self.session_pool = session_pool.SessionPool(
+            self._create_new_acos_client, self._close_old_a10_client,
+            keepalive_interval=self.config.get('session_keepalive_interval'))
+        self.write_coalescer = write_memory.WriteMemoryCoalescer(self)
+        self.ha_sync_queue = ha_sync.HASyncQueue(self)
+        self.stats_cache = stats_cache.StatsCache(
+            self.config.get('stats_cache_ttl'),
+            stale=self.config.get('stats_cache_stale'),
+            max_size=self.config.get('stats_cache_size'))
+        self.stats_collector = stats_collector.StatsCollector(self)
+        self.exporter = exporter.Exporter(self, self.config.get('exporter_address'),
+                                          self.config.get('exporter_port'))
         if self.config.get('verify_appliances'):
             self._verify_appliances()
         self.hooks = plumbing_hooks_class(self)
+        if self.config.get('use_database') and self.config.get('warm_tenant_bindings'):
+            self._warm_tenant_bindings()
         self.signal_handler_registered = False
-        self.acos_clients = {}
         LOG.info("PID creating "+str(os.getpid()))
 
+    def _warm_tenant_bindings(self):
+        warm = getattr(self.hooks, 'warm_bindings', None)
+        if warm is None:
+            return
+        try:
+            warm()
+        except Exception:
+            LOG.exception("A10Driver: unable to load tenant bindings")
+
     def _select_a10_device(self, tenant_id):
         return self.hooks.select_device(tenant_id)
 
@@ -75,47 +102,42 @@ class A10OpenstackLBBase(object):
         LOG.error("device info:" + d_key + " -----  " + str(d))
         ### The signal is registered here because in some time the process is forked
         ### So you lost variable references
+        ### Only the main OS thread may set them (greenthreads count as main);
+        ### background threads get clients too, and leave it for a later call
         if not self.signal_handler_registered:
-            signal.signal(signal.SIGTERM, signal_handler(self))
-            signal.signal(signal.SIGHUP, signal_handler(self))
-            signal.signal(signal.SIGINT, signal_handler(self))
-            self.signal_handler_registered = True
-            LOG.info("PID registering "+str(os.getpid()))
-
-        if self.acos_clients.has_key(d_key):
-            LOG.debug("d_key in self.acos_clients")
-            with self.my_lock:
-                cli = self.acos_clients[d_key]
-                if cli['last_acos_client_creation'] + MAX_ACOS_CACHE_TIME < int(time.time()):
-                    LOG.debug("Creating a new  acos_client");
-                    acos_client = self._create_new_acos_client(cli['device_info'])
-                    if acos_client is not None:
-                        old_acos = cli['acos_client']
-                        cli['acos_client'] = acos_client
-                        cli['last_acos_client_creation'] = int(time.time())
-                        self._close_old_a10_client(old_acos)
-                        LOG.debug("New Acos Client created successfully")
-                return cli['acos_client']
-        else:
-            acos_client = self._create_new_acos_client(d)
-            self.acos_clients[d_key] = {'device_info':d,'acos_client':acos_client,'last_acos_client_creation':int(time.time())}
-            return acos_client
-
-    def _create_new_acos_client(self, d, sleep_time_on_error=0.5):
+            try:
+                signal.signal(signal.SIGTERM, signal_handler(self))
+                signal.signal(signal.SIGHUP, signal_handler(self))
+                signal.signal(signal.SIGINT, signal_handler(self))
+                self.signal_handler_registered = True
+                LOG.info("PID registering "+str(os.getpid()))
+            except ValueError:
+                pass
+        self.exporter.start()
+
+        return self.session_pool.checkout(d)
+
+    def _release_a10_client(self, device_info, client, discard=False):
+        self.session_pool.checkin(device_info, client, discard=discard)
+
+    def _create_new_acos_client(self, d, sleep_time_on_error=0.5, attempts=3):
         client = acos_client.Client(d['host'],
                           d.get('api_version', acos_client.AXAPI_30),
                           d['username'], d['password'],
                           port=d['port'], protocol=d['protocol'])
-        final_client = None
-        for i in range(1,10):
-            if(client.session.id is not None):
-                final_client = client
-                break
-            else:
-                time.sleep(sleep_time_on_error)
-
-        return final_client
+        # Every aXAPI call, sessions included, goes through http.request
+        client.http.request = metrics.timed(client.http.request,
+                                            'axapi_request_seconds', device=d['name'])
+        for attempt in range(attempts):
+            try:
+                if client.session.id is not None:
+                    return client
+            except Exception as e:
+                LOG.debug("A10Driver: authentication to %s failed: %s", d['host'], e)
+            if attempt + 1 < attempts:
+                time.sleep(circuit_breaker.backoff(attempt, sleep_time_on_error, 4))
 
+        return None
 
     def _close_old_a10_client(self, a10_client,sleep_time_on_error=0.5):
         LOG.info("DELETING session")
@@ -131,12 +153,25 @@ class A10OpenstackLBBase(object):
     def __del__(self):
         LOG.info("PID deletting "+str(os.getpid()))
         LOG.info("A10Driver: Deletting remaining acos sessions")
-        LOG.info(self.acos_clients)
-        for cli_key in self.acos_clients:
-            cli = self.acos_clients[cli_key]
-            threading.Thread(target=self._close_old_a10_client, args=(cli['acos_client'],)).start()
-        time.sleep(10)
-        LOG.info("A10Driver: Sessions deleted")
+        sessions = getattr(self, 'session_pool', None)
+        if sessions is None:
+            return
+        writer = getattr(self, 'write_coalescer', None)
+        if writer is not None:
+            writer.flush_all(self.config.get('session_close_timeout'))
+        ha_queue = getattr(self, 'ha_sync_queue', None)
+        if ha_queue is not None:
+            ha_queue.flush_all(self.config.get('session_close_timeout'))
+        collector = getattr(self, 'stats_collector', None)
+        if collector is not None:
+            collector.stop_all(self.config.get('session_close_timeout'))
+        metrics_exporter = getattr(self, 'exporter', None)
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
+        closed, abandoned = sessions.close_all(
+            self.config.get('session_close_timeout'))
+        LOG.info("A10Driver: Sessions deleted, closed=%s abandoned=%s",
+                 closed, abandoned)
 
     def _verify_appliances(self):
         LOG.info("A10Driver: verifying appliances")
@@ -146,8 +181,12 @@ class A10OpenstackLBBase(object):
 
         for k, v in self.config.get_devices().items():
             try:
-                LOG.info("A10Driver: appliance(%s) = %s", k,
-                         self._get_a10_client(v).system.information())
+                client = self._get_a10_client(v)
+                try:
+                    LOG.info("A10Driver: appliance(%s) = %s", k,
+                             client.system.information())
+                finally:
+                    self._release_a10_client(v, client)
             except Exception:
                 LOG.error("A10Driver: unable to connect to configured"
                           "appliance, name=%s", k)
@@ -193,6 +232,17 @@ class A10OpenstackLBV2(A10OpenstackLBBase):
             self.openstack_driver.health_monitor,
             neutron=self.neutron)
 
+    def batch(self, context, operations, device_name=None):
+        """Apply create/update/delete operations across object types at once.
+
+        See v2.handler_batch.BatchHandler for the operation format; returns
+        the operations that failed, paired with their exceptions.
+        """
+
+        return v2.handler_batch.BatchHandler(
+            self, neutron=self.neutron).execute(context, operations,
+                                                device_name=device_name)
+
 
 class A10OpenstackLBV1(A10OpenstackLBBase):
 
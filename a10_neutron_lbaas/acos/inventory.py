@@ -0,0 +1,216 @@
+# Copyright 2014, A10 Networks
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Version-agnostic listing of the objects configured on an appliance.
+
+aXAPI 2.1 and 3.0 return the same lists under differently spelled keys
+("virtual_server_list" vs. "virtual-server-list"); these helpers hide that.
+"""
+
+import acos_client.errors as acos_errors
+
+
+def _is_v30(device_info):
+    return str(device_info.get("api_version") or "2.1").startswith("3")
+
+
+def _list(response, name):
+    if not response:
+        return []
+    for key in (name + "_list", name.replace("_", "-") + "-list"):
+        if key in response:
+            return response[key] or []
+    return []
+
+
+def virtual_servers(client, device_info):
+    return _list(client.slb.virtual_server.all(), "virtual_server")
+
+
+def service_groups(client, device_info):
+    sg = client.slb.service_group
+    if _is_v30(device_info):
+        # acos_client has no getAll for v3 service groups
+        return _list(sg._get(sg.url_prefix), "service_group")
+    return _list(sg.all(), "service_group")
+
+
+def health_monitors(client, device_info):
+    hm = client.slb.hm
+    if _is_v30(device_info):
+        return _list(hm._get(hm.url_prefix), "monitor")
+    return _list(hm._get("slb.hm.getAll"), "health_monitor")
+
+
+def persistence_templates(client, device_info, kind):
+    """kind is the client attribute, e.g. "src_ip_persistence"."""
+
+    p = getattr(client.slb.template, kind)
+    if _is_v30(device_info):
+        return _list(p._get(p.prefix), p.pers_type)
+    return _list(p._get(p.prefix + ".getAll"), kind + "_template")
+
+
+def _one(resource, name, key):
+    try:
+        r = resource.get(name)
+    except acos_errors.NotFound:
+        return None
+    if not r:
+        return None
+    return r.get(key) or r.get(key.replace("_", "-"))
+
+
+def virtual_server(client, device_info, name):
+    """The virtual server called name, shaped like virtual_servers(), or None."""
+
+    return _one(client.slb.virtual_server, name, "virtual_server")
+
+
+def service_group(client, device_info, name):
+    """The service group called name, shaped like service_groups(), or None."""
+
+    return _one(client.slb.service_group, name, "service_group")
+
+
+def exists(resource, name):
+    """Whether a client resource, e.g. client.slb.hm, has an object called name."""
+
+    try:
+        resource.get(name)
+    except acos_errors.NotFound:
+        return False
+    return True
+
+
+def names(objects):
+    return set(o.get("name") for o in objects)
+
+
+def vports(virtual_server):
+    """The vports of a virtual server, with the keys vport delete takes.
+
+    Each is {"name", "protocol", "port", "service_group"}; protocol is in
+    the form the device reports, which is also what it accepts back.
+    """
+
+    return [{"name": p.get("name"),
+             "protocol": p.get("protocol"),
+             "port": p.get("port", p.get("port-number")),
+             "service_group": p.get("service_group", p.get("service-group"))}
+            for p in _list(virtual_server, "vport") or _list(virtual_server, "port")]
+
+
+def service_group_members(service_group):
+    """{(server name, port): enabled} for an entry of service_groups()."""
+
+    members = {}
+    for m in _list(service_group, "member"):
+        if "member-state" in m:
+            enabled = m["member-state"] != "disable"
+        else:
+            enabled = m.get("status", 1) != 0
+        members[(m.get("server", m.get("name")), m.get("port"))] = enabled
+    return members
+
+
+def service_group_monitor(service_group):
+    return service_group.get("health_monitor", service_group.get("health-check")) or None
+
+
+# neutron's load balancer stats, and the 2.1 and 3.0 counters behind them.
+_VIRTUAL_SERVER_STATS = {
+    "bytes_in": ("req_bytes", "total_fwd_bytes"),
+    "bytes_out": ("resp_bytes", "total_rev_bytes"),
+    "active_connections": ("cur_conns", "curr_conn"),
+    "total_connections": ("tot_conns", "total_conn"),
+}
+
+
+def _counter(stats, keys):
+    for k in keys:
+        if k in stats:
+            return stats[k]
+    return 0
+
+
+def virtual_server_stats(client, device_info):
+    """{name: load balancer stats} for every virtual server, in one call."""
+
+    vs = client.slb.virtual_server
+    if _is_v30(device_info):
+        entries = [dict(e.get("stats") or {}, name=e.get("name"))
+                   for e in _list(vs._get(vs.url_prefix + "stats"), "virtual_server")]
+    else:
+        entries = _list(vs.all_stats(), "virtual_server_stat")
+    return dict((e.get("name"), dict((k, _counter(e, keys))
+                                     for k, keys in _VIRTUAL_SERVER_STATS.items()))
+                for e in entries)
+
+
+def _group_stats(e, v30):
+    if v30:
+        members = dict(((m.get("name"), m.get("port")), m.get("stats") or {})
+                       for m in _list(e, "member"))
+        return (e.get("stats") or {}, members)
+    members = dict(((m.get("server"), m.get("port")), m)
+                   for m in _list(e, "member_stat"))
+    stats = dict((k, v) for k, v in e.items() if k != "member_stat_list")
+    return (stats, members)
+
+
+def service_group_stats(client, device_info):
+    """{name: (stats, {(server name, port): member stats})}, in one call."""
+
+    sg = client.slb.service_group
+    v30 = _is_v30(device_info)
+    if v30:
+        groups = _list(sg._get(sg.url_prefix + "stats"), "service_group")
+    else:
+        groups = _list(sg._get("slb.service_group.fetchAllStatistics"),
+                       "service_group_stat")
+    return dict((e.get("name"), _group_stats(e, v30)) for e in groups)
+
+
+def one_service_group_stats(client, device_info, name):
+    """(stats, {(server name, port): member stats}) of one service group."""
+
+    v30 = _is_v30(device_info)
+    r = client.slb.service_group.stats(name) or {}
+    return _group_stats(r.get("service-group" if v30 else "service_group_stat") or {}, v30)
+
+
+def partitions(client, device_info):
+    p = client.system.partition
+    if _is_v30(device_info):
+        r = p.all() or {}
+        return r.get("partition-all", {}).get("oper", {}).get("partition-list", [])
+    return _list(p._get("system.partition.getAll"), "partition")
+
+
+def partition_names(client, device_info):
+    """Partitions that hold neutron objects: the tenants' under ADP."""
+
+    if device_info.get("v_method", "LSI").lower() != "adp":
+        return [device_info.get("shared_partition", "shared")]
+    return [p.get("partition_name", p.get("partition-name", p.get("name")))
+            for p in partitions(client, device_info)]
+
+
+def counts(client, device_info):
+    return {
+        "virtual_servers": len(virtual_servers(client, device_info)),
+        "service_groups": len(service_groups(client, device_info)),
+        "partitions": len(partitions(client, device_info)),
+    }
@@ -0,0 +1,106 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import threading
+import time
+
+from a10_neutron_lbaas import metrics
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """Thread-safe, size bounded cache with optional expiry.
+
+    The least recently used entry is evicted once max_size is reached;
+    entries older than ttl seconds (if ttl is set) are treated as misses.
+    A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, name, max_size, ttl=None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _miss(self):
+        self.misses += 1
+        metrics.incr('cache_misses', cache=self.name)
+        return _MISSING
+
+    def _lookup(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, _MISSING)
+            if entry is _MISSING:
+                return self._miss()
+            value, stored = entry
+            if self.ttl and time.time() - stored > self.ttl:
+                return self._miss()
+            self.entries[key] = entry
+            self.hits += 1
+        metrics.incr('cache_hits', cache=self.name)
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        if value is _MISSING:
+            return default
+        return value
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and not (
+                self.ttl and time.time() - entry[1] > self.ttl)
+
+    def set(self, key, value):
+        if not self.max_size:
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (value, time.time())
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_or_set(self, key, create):
+        """Return the cached value for key, calling create() on a miss."""
+
+        value = self._lookup(key)
+        if value is _MISSING:
+            value = create()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop key, or everything if key is None."""
+
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import random
+import threading
+import time
+
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def backoff(attempt, base, cap):
+    """Full-jitter exponential backoff delay for the given attempt (from 0)."""
+
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker(object):
+    """Closed/open/half-open breaker guarding calls to one appliance.
+
+    After failure_threshold consecutive failures the breaker opens and
+    callers fail fast.  Once the (jittered, exponentially growing) reset
+    timeout passes, a single trial call is let through; success closes the
+    breaker, failure opens it again for longer.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=5,
+                 max_reset_timeout=300):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0
+        self.trial = False
+
+    def _set_state(self, state):
+        if state != self.state:
+            LOG.warning("A10Driver: circuit breaker for %s is now %s",
+                        self.name, state)
+            self.state = state
+            metrics.set_gauge('circuit_breaker_open', int(state != CLOSED),
+                              device=self.name)
+
+    def allow(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() >= self.retry_at:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.trips = 0
+            self.trial = False
+            self._set_state(CLOSED)
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = self.reset_timeout * (2 ** self.trips)
+                delay = min(self.max_reset_timeout, delay)
+                # Spread retries out so workers don't all probe at once.
+                self.retry_at = time.time() + random.uniform(delay / 2.0, delay)
+                self.trips += 1
+                self._set_state(OPEN)
+                metrics.incr('circuit_breaker_trips', device=self.name)
+
+    def status(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': max(0, self.retry_at - time.time())
+                if self.state == OPEN else 0,
+            }
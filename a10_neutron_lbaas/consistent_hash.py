@@ -0,0 +1,82 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tenant to device hashing.
+
+HashRing places vnodes * weight points per device on a ring; a tenant maps
+to the device owning the first point at or after the tenant's own hash.
+Adding or removing a device only moves the tenants between its points and
+their predecessors, roughly 1/N of them.
+"""
+
+import bisect
+import hashlib
+
+import acos_client
+
+
+def _hash(key):
+    return int(hashlib.md5(key).hexdigest()[:16], 16)
+
+
+class HashRing(object):
+
+    def __init__(self, weights, vnodes=100):
+        """weights maps device name to its relative share of tenants."""
+
+        self.weights = dict(weights)
+        self.vnodes = vnodes
+        points = []
+        for name, weight in self.weights.items():
+            for i in range(int(vnodes * weight)):
+                points.append((_hash("%s-%d" % (name, i)), name))
+        points.sort()
+        self.points = [p[0] for p in points]
+        self.nodes = [p[1] for p in points]
+
+    def get_server(self, token):
+        if not self.points:
+            raise KeyError(token)
+        i = bisect.bisect_left(self.points, _hash(token))
+        return self.nodes[i % len(self.nodes)]
+
+
+def device_hash(devices, vnodes=None):
+    """The hash used to pick a device for a tenant.
+
+    Without vnodes this is the acos_client hash the driver always used, so
+    enabling the ring is an explicit, one-time reshuffle.
+    """
+
+    if not vnodes:
+        return acos_client.Hash(devices.keys())
+    return HashRing(dict((name, d.get('hash_weight', 1)) for name, d in devices.items()),
+                    vnodes=vnodes)
+
+
+def moves(old_hash, new_hash, tenant_ids):
+    """Tenants mapped differently by the two hashes, as id -> (old, new)."""
+
+    r = {}
+    for t in tenant_ids:
+        a = old_hash.get_server(t)
+        b = new_hash.get_server(t)
+        if a != b:
+            r[t] = (a, b)
+    return r
+
+
+def moved_tenants(old_devices, new_devices, tenant_ids, vnodes=None):
+    """Tenants that would change device if config changed old -> new."""
+
+    return moves(device_hash(old_devices, vnodes), device_hash(new_devices, vnodes),
+                 tenant_ids)
@@ -11,7 +11,12 @@
 #    under the License.
 
 
+import os
+import threading
+
 import sqlalchemy
+import sqlalchemy.event
+import sqlalchemy.exc
 import sqlalchemy.ext.declarative
 import sqlalchemy.orm
 
@@ -21,20 +26,97 @@ import a10_neutron_lbaas.a10_exceptions as ex
 Base = sqlalchemy.ext.declarative.declarative_base()
 a10_cfg = a10_config.A10Config()
 
+# Engines and session factories are shared per process and url. The pid is
+# part of the key so a forked worker builds its own pool instead of using
+# (or, on garbage collection, closing) its parent's connections.
+_lock = threading.Lock()
+_engines = {}
+_sessions = {}
+
 
 def get_base():
     return Base
 
 
-def get_engine(url=None):
+def _get_url(url):
     if url is None:
         if not a10_cfg.get('use_database'):
             raise ex.InternalError("attempted to use database when it is disabled")
         url = a10_cfg.get('database_connection')
+    return url
+
+
+def _in_memory(url):
+    # Every in-memory engine is its own database; never share them.
+    return url in ('sqlite://', 'sqlite:///:memory:')
+
+
+def _guard_pid(engine):
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+
+    @sqlalchemy.event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        pid = os.getpid()
+        if connection_record.info['pid'] != pid:
+            connection_record.connection = connection_proxy.connection = None
+            raise sqlalchemy.exc.DisconnectionError(
+                "Connection record belongs to pid %s, attempting to check out in pid %s" %
+                (connection_record.info['pid'], pid))
+
+
+def _create_engine(url):
+    kwargs = {}
+    if not url.startswith('sqlite'):
+        kwargs = {
+            'pool_size': a10_cfg.get('db_pool_size'),
+            'max_overflow': a10_cfg.get('db_max_overflow'),
+            'pool_recycle': a10_cfg.get('db_pool_recycle'),
+        }
+    engine = sqlalchemy.create_engine(url, **kwargs)
+    _guard_pid(engine)
+    return engine
+
+
+def get_engine(url=None):
+    url = _get_url(url)
+    if _in_memory(url):
+        return _create_engine(url)
+
+    key = (os.getpid(), url)
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = _create_engine(url)
+    return engine
+
+
+def get_scoped_session(url=None):
+    """Thread-local session registry for url.
+
+    Calling the result returns the current thread's session; call remove()
+    on it once the unit of work is done to return the connection to the pool.
+    """
+
+    url = _get_url(url)
+    if _in_memory(url):
+        return sqlalchemy.orm.scoped_session(
+            sqlalchemy.orm.sessionmaker(bind=get_engine(url)))
 
-    return sqlalchemy.create_engine(url)
+    key = (os.getpid(), url)
+    registry = _sessions.get(key)
+    if registry is None:
+        engine = get_engine(url)
+        with _lock:
+            registry = _sessions.get(key)
+            if registry is None:
+                registry = _sessions[key] = sqlalchemy.orm.scoped_session(
+                    sqlalchemy.orm.sessionmaker(bind=engine))
+    return registry
 
 
 def get_session(url=None):
-    DBSession = sqlalchemy.orm.sessionmaker(bind=get_engine())
-    return DBSession()
+    return get_scoped_session(url).session_factory()
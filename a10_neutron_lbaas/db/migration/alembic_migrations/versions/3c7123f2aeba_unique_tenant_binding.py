@@ -0,0 +1,62 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""unique tenant binding
+
+Revision ID: 3c7123f2aeba
+Revises: 579f359e6e30
+Create Date: 2026-10-18 10:12:40.518274
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3c7123f2aeba'
+down_revision = '579f359e6e30'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+INDEX_NAME = 'uniq_a10_tenant_bindings0tenant_id'
+
+
+def _remove_duplicates():
+    # Concurrent first requests could bind a tenant twice; keep the oldest
+    # binding, which is the one select_device has been returning.
+    bindings = sa.sql.table(
+        'a10_tenant_bindings',
+        sa.sql.column('id', sa.String),
+        sa.sql.column('created_at', sa.DateTime),
+        sa.sql.column('tenant_id', sa.String))
+
+    conn = op.get_bind()
+    dupes = conn.execute(
+        sa.select([bindings.c.tenant_id])
+        .group_by(bindings.c.tenant_id)
+        .having(sa.func.count() > 1)).fetchall()
+    for (tenant_id,) in dupes:
+        rows = conn.execute(
+            sa.select([bindings.c.id])
+            .where(bindings.c.tenant_id == tenant_id)
+            .order_by(bindings.c.created_at, bindings.c.id)).fetchall()
+        conn.execute(bindings.delete().where(
+            bindings.c.id.in_([r.id for r in rows[1:]])))
+
+
+def upgrade():
+    _remove_duplicates()
+    op.create_index(INDEX_NAME, 'a10_tenant_bindings', ['tenant_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, 'a10_tenant_bindings')
@@ -30,6 +30,9 @@ def _get_date():
 
 class A10TenantBinding(Base):
     __tablename__ = "a10_tenant_bindings"
+    __table_args__ = (
+        sa.Index('uniq_a10_tenant_bindings0tenant_id', 'tenant_id', unique=True),
+    )
 
     id = sa.Column(sa.String(36), default=_uuid_str, primary_key=True)
     created_at = sa.Column(sa.DateTime, default=_get_date)
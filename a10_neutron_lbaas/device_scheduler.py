@@ -0,0 +1,172 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Placement of new tenants onto appliances.
+
+A scheduler is built with the driver and the device dict from config and
+provides select(tenant_id), returning one of those devices. It is only
+consulted for tenants without a binding; see PlumbingHooks.select_device.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+from a10_neutron_lbaas import a10_context
+from a10_neutron_lbaas.acos import inventory
+from a10_neutron_lbaas import consistent_hash
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+class HashScheduler(object):
+    """Hashes the tenant id over all configured devices."""
+
+    def __init__(self, driver, devices):
+        self.driver = driver
+        self.devices = devices
+        self._hash = None
+
+    @property
+    def appliance_hash(self):
+        # Building the ring is not free; schedulers only need it on a miss.
+        if self._hash is None:
+            vnodes = self.driver.config.get('hash_ring_vnodes') if self.driver else None
+            self._hash = consistent_hash.device_hash(self.devices, vnodes)
+        return self._hash
+
+    @appliance_hash.setter
+    def appliance_hash(self, h):
+        self._hash = h
+
+    def select(self, tenant_id):
+        return self.devices[self.appliance_hash.get_server(tenant_id)]
+
+
+class DeviceInventory(object):
+    """Object counts per device, refreshed from the appliances.
+
+    The first call to get() loads the counts; after that a stale inventory
+    is refreshed in the background while callers keep using the old one.
+    """
+
+    def __init__(self, driver, devices, refresh_interval):
+        self.driver = driver
+        self.devices = devices
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.refreshed = 0
+        self.refreshing = False
+
+    def _count(self, device_cfg):
+        partition = device_cfg.get('shared_partition', 'shared')
+        with a10_context.partition_client(self.driver, device_cfg, partition) as client:
+            return inventory.counts(client, device_cfg)
+
+    def refresh(self):
+        counts = {}
+        for name, d in self.devices.items():
+            try:
+                counts[name] = self._count(d)
+            except Exception:
+                LOG.exception("A10Driver: unable to read inventory of %s", name)
+                continue
+            for k, v in counts[name].items():
+                metrics.set_gauge('device_objects', v, device=name, type=k)
+        with self.lock:
+            self.counts = counts
+            self.refreshed = time.time()
+            self.refreshing = False
+
+    def _refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        t = threading.Thread(target=self.refresh, name="a10-device-inventory")
+        t.daemon = True
+        t.start()
+
+    def get(self):
+        if not self.refreshed:
+            self.refresh()
+        elif time.time() - self.refreshed > self.refresh_interval:
+            self._refresh_in_background()
+        with self.lock:
+            return dict((k, dict(v)) for k, v in self.counts.items())
+
+    def reserve(self, name, key):
+        """Count an object about to be created, until the next refresh."""
+
+        with self.lock:
+            if name in self.counts:
+                self.counts[name][key] += 1
+
+
+class LeastLoadedScheduler(HashScheduler):
+    """Picks the device with the most spare capacity.
+
+    Load is the partition count on ADP devices, limited by max_partitions,
+    and the virtual server count otherwise, limited by max_instance. Full
+    or disabled devices are skipped; if none is left the tenant is hashed.
+    """
+
+    def __init__(self, driver, devices):
+        super(LeastLoadedScheduler, self).__init__(driver, devices)
+        self.inventory = DeviceInventory(
+            driver, devices, driver.config.get('device_inventory_interval'))
+
+    def _load(self, device_cfg):
+        if device_cfg.get('v_method', '').lower() == 'adp':
+            return 'partitions', device_cfg.get('max_partitions')
+        return 'virtual_servers', device_cfg.get('max_instance')
+
+    def select(self, tenant_id):
+        counts = self.inventory.get()
+        best = None
+        for name, d in sorted(self.devices.items()):
+            if not d.get('status', True) or name not in counts:
+                continue
+            key, limit = self._load(d)
+            used = counts[name][key]
+            if limit and used >= limit:
+                continue
+            score = float(used) / limit if limit else used
+            if best is None or score < best[0]:
+                best = (score, name, key)
+
+        if best is None:
+            LOG.warning("A10Driver: no device has capacity for tenant %s; "
+                        "falling back to hash", tenant_id)
+            return super(LeastLoadedScheduler, self).select(tenant_id)
+
+        self.inventory.reserve(best[1], best[2])
+        return self.devices[best[1]]
+
+
+SCHEDULERS = {
+    'hash': HashScheduler,
+    'least_loaded': LeastLoadedScheduler,
+}
+
+
+def get_scheduler(name, driver, devices):
+    """Build the scheduler named in config, or a class given by dotted path."""
+
+    cls = SCHEDULERS.get(name)
+    if cls is None:
+        module, _, cls_name = name.rpartition('.')
+        cls = getattr(importlib.import_module(module), cls_name)
+    return cls(driver, devices)
@@ -35,6 +35,53 @@
 
 # database_connection = None,
 
+# Each neutron worker keeps one SQLAlchemy connection pool per database.
+# db_pool_size connections are kept open, up to db_max_overflow more are
+# opened under load, and connections are replaced after db_pool_recycle
+# seconds so the database server's idle timeout doesn't break them.
+# These are ignored for sqlite.
+
+# db_pool_size = 5,
+# db_max_overflow = 10,
+# db_pool_recycle = 3600,
+
+# With use_database, tenant to device bindings are cached in each neutron
+# worker. Entries are dropped after tenant_binding_cache_ttl seconds, so a
+# tenant migrated by another process is picked up within that time. Set
+# the size to 0 to always read the database.
+
+# tenant_binding_cache_size = 10000,
+# tenant_binding_cache_ttl = 300,
+
+# Load all tenant bindings into that cache when the driver starts, and log
+# any tenants bound to devices that are missing from config. Set the cache
+# size above the number of tenants, and the ttl to 0, to serve every
+# established tenant from memory.
+
+# warm_tenant_bindings = False,
+
+# How a device is chosen for a tenant seen for the first time. "hash"
+# hashes the tenant id over all devices. "least_loaded" picks the device
+# with the most spare capacity: partitions against max_partitions for ADP
+# devices, virtual servers against max_instance otherwise. The object
+# counts are re-read from the appliances every device_inventory_interval
+# seconds. A dotted class path selects a custom scheduler (see
+# a10_neutron_lbaas.device_scheduler). Schedulers other than hash require
+# use_database, so that tenants stay on the device they were given.
+
+# device_scheduler = "hash",
+# device_inventory_interval = 300,
+
+# Number of points per device on a consistent hash ring used by the hash
+# scheduler. With a ring, adding a device only moves about 1/N of the
+# hashed tenants to it; devices can take a larger or smaller share with
+# their hash_weight. None keeps the original hash, which reshuffles most
+# tenants whenever the device list changes. Switching between the two
+# moves tenants that have no saved binding; run a10-manage rehash to see
+# which before changing either.
+
+# hash_ring_vnodes = None,
+
 # Sometimes we need things from neutron. We will look in the usual places,
 # but this is here if you need to override the location.
 
@@ -45,6 +92,38 @@
 
 # member_name_use_uuid = False
 
+# How often, in seconds, a background thread in each neutron worker renews
+# pooled AxAPI sessions before they expire and closes retired ones. Set to
+# 0 to disable; sessions are then renewed on demand by API requests.
+
+# session_keepalive_interval = 10
+
+# On shutdown, open AxAPI sessions are logged off in parallel. Sessions
+# still closing after this many seconds are abandoned and left to expire
+# on the appliance.
+
+# session_close_timeout = 5
+
+# Load balancer, pool and member stats are read from the appliance at most
+# once per stats_cache_ttl seconds per object, in each neutron worker. For
+# stats_cache_stale seconds after that, the old numbers are still returned
+# while a background thread reads new ones. A ttl of 0 disables the cache.
+
+# stats_cache_ttl = 0
+# stats_cache_stale = 60
+# stats_cache_size = 10000
+
+# Serve driver metrics (AxAPI request timings, session pools, circuit
+# breakers, write memory and ha sync counts and timings) and the stats
+# gathered by devices' stats_interval collectors in Prometheus text format
+# at http://address:port/metrics.
+# Metrics are per process: with several neutron workers, the first one to
+# talk to a device gets the port. 0 disables it; "a10-manage exporter"
+# runs a standalone exporter instead.
+
+# exporter_port = 0
+# exporter_address = "127.0.0.1"
+
 
 #
 # Main devices dictionary, containing a list of available ACOS devices.
@@ -118,9 +197,60 @@ devices = {
     # the 'ha sync' command against whenever a write operation occurs.
     #     "ha_sync_list": [],
     #
+    # Run ha sync in the background instead of in the API request. Peers
+    # are synced in parallel, repeated requests for a pending sync are
+    # merged, and failed syncs are retried with backoff.
+    #     "ha_sync_async": False,
+    #
     # Enable or disable calling write memory directly after any operation that
     # changes ACOS's running state. Turning this off also disables all ha sync
     # operations, regardless of the settings in ha_sync_list.
     #     "write_memory": True,
+    #
+    # Coalesce write memory operations. When greater than 0, changes only
+    # mark their partition dirty, and a background thread writes each
+    # dirty partition once (followed by a single ha sync) this many
+    # seconds after its first change. Pending writes are flushed when the
+    # driver shuts down. 0 writes memory at the end of every operation.
+    #     "write_memory_window": 0,
+    #
+    # Each neutron worker keeps a pool of authenticated AxAPI sessions per
+    # device. session_pool_min sessions are opened the first time a worker
+    # talks to the device; at most session_pool_max are open at once.
+    #     "session_pool_min": 1,
+    #     "session_pool_max": 4,
+    #
+    # Pooled sessions are renewed before they reach this age, in seconds.
+    #     "session_max_age": 60,
+    #
+    # Bulk member operations and the member teardown of pool deletes send
+    # up to this many AxAPI requests to the device at once, each on its own
+    # pooled session. It is capped at session_pool_max - 1, as the request
+    # holds a session of its own. 1 runs them one after another.
+    #     "bulk_concurrency": 1,
+    #
+    # When greater than 0, a background thread in each neutron worker reads
+    # the stats of all virtual servers, service groups and members on this
+    # device every stats_interval seconds, two AxAPI calls per partition,
+    # and load balancer, pool and member stats are answered from that.
+    # 0 reads each object's stats from the device when asked.
+    #     "stats_interval": 0,
+    #
+    # After this many consecutive failures to open a session, requests for
+    # this device fail immediately instead of waiting on it. A single retry
+    # is let through after circuit_breaker_timeout seconds, doubling (up to
+    # five minutes) each time the device is still down.
+    #     "circuit_breaker_threshold": 3,
+    #     "circuit_breaker_timeout": 5,
+    #
+    # Capacity limits used by the least_loaded device_scheduler: the most
+    # virtual servers (LSI) or partitions (ADP) to place on this device.
+    # A full device receives no new tenants.
+    #     "max_instance": 5000,
+    #     "max_partitions": None,
+    #
+    # Relative share of hashed tenants for this device when hash_ring_vnodes
+    # is set; 2 takes twice as many tenants as a device with 1.
+    #     "hash_weight": 1,
     # },
 }
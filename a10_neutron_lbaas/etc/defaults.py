@@ -17,8 +17,24 @@ GLOBAL_DEFAULTS = {
     "verify_appliances": False,
     "use_database": False,
     "database_connection": None,
+    "db_pool_size": 5,
+    "db_max_overflow": 10,
+    "db_pool_recycle": 3600,
+    "tenant_binding_cache_size": 10000,
+    "tenant_binding_cache_ttl": 300,
+    "warm_tenant_bindings": False,
+    "device_scheduler": "hash",
+    "device_inventory_interval": 300,
+    "hash_ring_vnodes": None,
     "neutron_conf_dir": '/etc/neutron',
     "member_name_use_uuid": False,
+    "session_keepalive_interval": 10,
+    "session_close_timeout": 5,
+    "stats_cache_ttl": 0,
+    "stats_cache_stale": 60,
+    "stats_cache_size": 10000,
+    "exporter_port": 0,
+    "exporter_address": "127.0.0.1",
 }
 
 DEVICE_REQUIRED_FIELDS = [
@@ -39,7 +55,17 @@ DEVICE_OPTIONAL_DEFAULTS = {
     "default_virtual_server_vrid": None,
     "ipinip": False,
     "ha_sync_list": [],
+    "ha_sync_async": False,
     "write_memory": True,
+    "write_memory_window": 0,
+    "session_pool_min": 1,
+    "session_pool_max": 4,
+    "session_max_age": 60,
+    "bulk_concurrency": 1,
+    "stats_interval": 0,
+    "circuit_breaker_threshold": 3,
+    "circuit_breaker_timeout": 5,
+    "hash_weight": 1,
 
     # "max_instance": 5000,
     # "method": "hash",
@@ -0,0 +1,196 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Driver metrics and collected appliance stats in Prometheus text format.
+
+Everything is read from memory: the metrics module, the session pools,
+the ha sync queue and the tables of the stats collector. Scraping never
+talks to an appliance.
+"""
+
+import BaseHTTPServer
+import collections
+import logging
+import os
+import re
+import socket
+import threading
+
+from a10_neutron_lbaas import metrics
+from a10_neutron_lbaas import stats_collector
+
+LOG = logging.getLogger(__name__)
+
+PREFIX = 'a10_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_invalid = re.compile('[^a-zA-Z0-9_]')
+
+
+def _number(v):
+    return isinstance(v, (int, long, float)) and not isinstance(v, bool)
+
+
+def _escape(v):
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, labels, value):
+    if labels:
+        name += '{%s}' % ','.join('%s="%s"' % (_invalid.sub('_', k), _escape(v))
+                                  for k, v in sorted(labels))
+    return '%s %s' % (name, repr(float(value)) if isinstance(value, float) else value)
+
+
+class Families(object):
+    """Samples grouped by metric name, in the order names were first seen."""
+
+    def __init__(self):
+        self.families = collections.OrderedDict()
+
+    def add(self, name, kind, labels, value):
+        name = PREFIX + _invalid.sub('_', name)
+        self.families.setdefault(name, (kind, []))[1].append((tuple(labels), value))
+
+    def add_stats(self, prefix, labels, stats):
+        for k, v in sorted(stats.items()):
+            if _number(v):
+                self.add(prefix + k, 'untyped', labels, v)
+
+    def render(self):
+        lines = []
+        for name, (kind, samples) in self.families.items():
+            lines.append('# TYPE %s %s' % (name, kind))
+            for labels, value in samples:
+                if kind == 'summary':
+                    lines.append(_series(name + '_count', labels, value[0]))
+                    lines.append(_series(name + '_sum', labels, value[1]))
+                else:
+                    lines.append(_series(name, labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+def _add_metrics(f):
+    snap = metrics.snapshot()
+    for (name, labels), v in sorted(snap['counters'].items()):
+        f.add(name + '_total', 'counter', labels, v)
+    for (name, labels), v in sorted(snap['gauges'].items()):
+        f.add(name, 'gauge', labels, v)
+    for (name, labels), v in sorted(snap['timings'].items()):
+        f.add(name, 'summary', labels, v)
+
+
+def _add_sessions(f, driver):
+    for key, s in sorted(driver.session_pool.stats().items()):
+        labels = [('device', key)]
+        for k in ('idle', 'busy', 'size', 'max'):
+            f.add('session_pool_' + k, 'gauge', labels, s[k])
+
+
+def _add_ha_sync(f, driver):
+    for (device, peer), lag in sorted(driver.ha_sync_queue.lag().items()):
+        f.add('ha_sync_pending_seconds', 'gauge', [('device', device), ('peer', peer)], lag)
+
+
+def _add_tables(f, driver):
+    for (device, partition), table in sorted(driver.stats_collector.tables().items()):
+        where = [('device', device), ('partition', partition)]
+        for name, stats in sorted(table[stats_collector.LOADBALANCER].items()):
+            f.add_stats('loadbalancer_', where + [('name', name)], stats)
+        for name, stats in sorted(table[stats_collector.POOL].items()):
+            f.add_stats('pool_', where + [('name', name)], stats['stats'])
+        for (pool, server, port), stats in sorted(table[stats_collector.MEMBER].items()):
+            f.add_stats('member_', where + [('pool', pool), ('server', server),
+                                            ('port', port)], stats)
+
+
+def render(driver):
+    f = Families()
+    _add_metrics(f)
+    for add in (_add_sessions, _add_ha_sync, _add_tables):
+        try:
+            add(f, driver)
+        except Exception:
+            LOG.exception("A10Driver: exporter section %s failed", add.__name__)
+    return f.render()
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render(self.server.driver)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOG.debug("exporter: " + format, *args)
+
+
+def server(driver, address, port):
+    s = BaseHTTPServer.HTTPServer((address, port), _Handler)
+    s.driver = driver
+    return s
+
+
+class Exporter(object):
+    """Serves render() from a background thread of one neutron worker.
+
+    Only one process can listen on the port; in the others, start() logs
+    that it is taken and does nothing.
+    """
+
+    def __init__(self, driver, address, port):
+        self.driver = driver
+        self.address = address
+        self.port = port
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.server = None
+        self.tried = False
+
+    def start(self):
+        if not self.port:
+            return
+        if self.pid != os.getpid():
+            self._reset()
+        if self.tried:
+            return
+        with self.lock:
+            if self.tried:
+                return
+            self.tried = True
+            try:
+                self.server = server(self.driver, self.address, self.port)
+            except socket.error as e:
+                LOG.info("A10Driver: exporter not started in pid %s, %s:%s: %s",
+                         self.pid, self.address, self.port, e)
+                return
+        t = threading.Thread(target=self.server.serve_forever, name="a10-exporter")
+        t.daemon = True
+        t.start()
+        LOG.info("A10Driver: exporting metrics on %s:%s", self.address, self.port)
+
+    def stop(self):
+        if self.pid != os.getpid() or self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
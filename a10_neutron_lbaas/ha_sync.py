@@ -0,0 +1,171 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import threading
+import time
+
+from a10_neutron_lbaas import circuit_breaker
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+# Give up on a sync after this many consecutive failures; the next change
+# on the device queues a new one.
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1
+BACKOFF_CAP = 30
+
+
+class PeerSyncWorker(threading.Thread):
+    """Runs ha sync from one device to one of its peers.
+
+    Requests that arrive while a sync is pending are folded into it; one
+    that arrives while a sync is running queues exactly one more, since the
+    running sync may have missed the latest change.
+    """
+
+    def __init__(self, driver, device_cfg, peer):
+        super(PeerSyncWorker, self).__init__(
+            name="a10-ha-sync-%s-%s" % (device_cfg['name'], peer['ip']))
+        self.daemon = True
+        self.driver = driver
+        self.device_cfg = device_cfg
+        self.peer = peer
+        self.labels = {'device': device_cfg['name'], 'peer': peer['ip']}
+        self.cond = threading.Condition(threading.Lock())
+        self.pending_since = None
+        self.stopping = False
+
+    def request(self):
+        with self.cond:
+            if self.pending_since is None:
+                self.pending_since = time.time()
+                self.cond.notify()
+            else:
+                metrics.incr('ha_sync_coalesced', **self.labels)
+
+    def lag(self):
+        with self.cond:
+            if self.pending_since is None:
+                return 0
+            return time.time() - self.pending_since
+
+    def stop(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+
+    def sync(self):
+        client = self.driver._get_a10_client(self.device_cfg)
+        try:
+            with metrics.timer('axapi_seconds', op='ha_sync', device=self.device_cfg['name']):
+                client.ha.sync(self.peer['ip'], self.peer['username'],
+                               self.peer['password'])
+        finally:
+            self.driver._release_a10_client(self.device_cfg, client)
+
+    def run(self):
+        attempt = 0
+        while True:
+            with self.cond:
+                while self.pending_since is None and not self.stopping:
+                    self.cond.wait()
+                if self.pending_since is None:
+                    return
+                since, self.pending_since = self.pending_since, None
+
+            try:
+                self.sync()
+            except Exception:
+                attempt += 1
+                LOG.exception("A10Driver: ha sync %s -> %s failed (attempt %d)",
+                              self.device_cfg['name'], self.peer['ip'], attempt)
+                metrics.incr('ha_sync_failures', **self.labels)
+                with self.cond:
+                    if attempt >= MAX_ATTEMPTS or self.stopping:
+                        LOG.error("A10Driver: giving up on ha sync %s -> %s",
+                                  self.device_cfg['name'], self.peer['ip'])
+                        attempt = 0
+                        continue
+                    if self.pending_since is None or since < self.pending_since:
+                        self.pending_since = since
+                    self.cond.wait(circuit_breaker.backoff(attempt - 1, BACKOFF_BASE,
+                                                           BACKOFF_CAP))
+                continue
+
+            attempt = 0
+            metrics.incr('ha_sync', **self.labels)
+            metrics.set_gauge('ha_sync_lag_seconds', time.time() - since, **self.labels)
+
+
+class HASyncQueue(object):
+    """Dispatches ha sync for the devices in each device's ha_sync_list.
+
+    Devices with ha_sync_async set have their peers synced in parallel by
+    background workers; everything else is synced serially in the caller.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.workers = {}
+
+    def _worker(self, device_cfg, peer):
+        key = (device_cfg['name'], peer['ip'])
+        w = self.workers.get(key)
+        if w is None:
+            with self.lock:
+                w = self.workers.get(key)
+                if w is None:
+                    w = PeerSyncWorker(self.driver, device_cfg, peer)
+                    w.start()
+                    self.workers[key] = w
+        return w
+
+    def sync(self, device_cfg, client):
+        peers = device_cfg.get('ha_sync_list', [])
+        if not peers:
+            return
+        if not device_cfg.get('ha_sync_async', False):
+            for v in peers:
+                client.ha.sync(v['ip'], v['username'], v['password'])
+            return
+
+        if self.pid != os.getpid():
+            self._reset()
+        for v in peers:
+            self._worker(device_cfg, v).request()
+
+    def lag(self):
+        """Seconds since the oldest unsynced change, by (device, peer)."""
+
+        return dict((k, w.lag()) for k, w in self.workers.items())
+
+    def flush_all(self, timeout):
+        if self.pid != os.getpid():
+            return
+        with self.lock:
+            workers, self.workers = self.workers.values(), {}
+        for w in workers:
+            w.stop()
+        deadline = time.time() + timeout
+        for w in workers:
+            w.join(max(0, deadline - time.time()))
+            if w.is_alive():
+                LOG.error("A10Driver: ha sync %s -> %s did not finish",
+                          w.device_cfg['name'], w.peer['ip'])
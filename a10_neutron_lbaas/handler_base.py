@@ -12,9 +12,38 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import json
 
 
+def _parse_meta(m):
+    try:
+        d = json.loads(m)
+    except Exception:
+        return None
+    return d if isinstance(d, dict) else None
+
+
+def _meta_dict(lbaas_obj):
+    if isinstance(lbaas_obj, dict):
+        return _parse_meta(lbaas_obj.get('a10_meta', '{}'))
+    if not hasattr(lbaas_obj, 'a10_meta'):
+        return None
+
+    # Handlers look up several keys per object per operation, so the parsed
+    # document is kept on the object for as long as its a10_meta is unchanged.
+    m = lbaas_obj.a10_meta
+    memo = getattr(lbaas_obj, '_a10_meta_parsed', None)
+    if type(memo) is tuple and memo[0] is m:
+        return memo[1]
+    d = _parse_meta(m)
+    try:
+        lbaas_obj._a10_meta_parsed = (m, d)
+    except AttributeError:
+        pass
+    return d
+
+
 class HandlerBase(object):
 
     def __init__(self, a10_driver):
@@ -42,14 +71,11 @@ class HandlerBase(object):
         return self.meta(pool, 'name', pool_id)
 
     def meta(self, lbaas_obj, key, default):
-        if isinstance(lbaas_obj, dict):
-            m = lbaas_obj.get('a10_meta', '{}')
-        elif hasattr(lbaas_obj, 'a10_meta'):
-            m = lbaas_obj.a10_meta
-        else:
-            return default
-        try:
-            d = json.loads(m)
-        except Exception:
+        d = _meta_dict(lbaas_obj)
+        if d is None or key not in d:
             return default
-        return d.get(key, default)
+        v = d[key]
+        if isinstance(v, (dict, list)):
+            # Callers modify these; keep the parsed copy intact.
+            return copy.deepcopy(v)
+        return v
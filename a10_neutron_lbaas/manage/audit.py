@@ -0,0 +1,323 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""a10-manage audit: compare every appliance with the neutron database.
+
+The partitions of all configured devices are listed in parallel, then the
+neutron load balancers are read page by page and matched against what was
+found. The JSON report lists the objects neutron expects that a device
+lacks ("missing") and the objects on a device that no load balancer owns
+("orphaned"). With --fix, every load balancer with missing objects or
+stray service group members is refreshed; --delete-orphans also removes
+orphaned virtual servers, service groups and health monitors. Repairs are
+made at most --rate per second.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+import acos_client.errors as acos_errors
+
+from a10_neutron_lbaas import a10_context
+from a10_neutron_lbaas.acos import inventory
+from a10_neutron_lbaas.manage import common
+from a10_neutron_lbaas import parallel
+
+LOG = logging.getLogger(__name__)
+
+VIRTUAL_SERVER = 'virtual_server'
+SERVICE_GROUP = 'service_group'
+MEMBER = 'member'
+HEALTH_MONITOR = 'health_monitor'
+TYPES = [VIRTUAL_SERVER, SERVICE_GROUP, MEMBER, HEALTH_MONITOR]
+
+# Orphans are removed parents first, so nothing is deleted while in use.
+DELETE_ORDER = [VIRTUAL_SERVER, SERVICE_GROUP, HEALTH_MONITOR]
+
+
+def scan_partition(driver, device, partition):
+    """The names of the objects in one partition, by type."""
+
+    with a10_context.partition_client(driver, device, partition) as client:
+        groups = inventory.service_groups(client, device)
+        members = set()
+        for sg in groups:
+            for server, port in inventory.service_group_members(sg):
+                members.add((sg.get('name'), server, port))
+        return {
+            VIRTUAL_SERVER: inventory.names(inventory.virtual_servers(client, device)),
+            SERVICE_GROUP: inventory.names(groups),
+            MEMBER: members,
+            HEALTH_MONITOR: inventory.names(inventory.health_monitors(client, device)),
+        }
+
+
+def _empty():
+    return dict((t, set()) for t in TYPES)
+
+
+class Auditor(object):
+
+    def __init__(self, driver, context, workers=8, partition_workers=2,
+                 load_balancers=common.iter_load_balancers,
+                 new_context=common.admin_context):
+        self.driver = driver
+        self.context = context
+        self.workers = workers
+        self.partition_workers = partition_workers
+        self.load_balancers = load_balancers
+        self.new_context = new_context
+        # Load balancers a refresh would repair, by id; filled by audit().
+        self.drifted = {}
+
+    def scan_device(self, device):
+        with a10_context.partition_client(self.driver, device, 'shared') as client:
+            partitions = inventory.partition_names(client, device)
+
+        found = {}
+        errors = []
+        results = parallel.run(lambda p: scan_partition(self.driver, device, p),
+                               partitions, self.partition_workers)
+        for p, (objects, e) in zip(partitions, results):
+            if e is not None:
+                errors.append({'device': device['name'], 'partition': p, 'error': str(e)})
+            # None marks a partition that could not be read.
+            found[p] = objects
+        return found, errors
+
+    def scan(self):
+        """Objects by (device name, partition), scan errors, devices scanned."""
+
+        devices = sorted(self.driver.config.get_devices().values(),
+                         key=lambda d: d['name'])
+        found = {}
+        errors = []
+        scanned = set()
+        results = parallel.run(self.scan_device, devices, self.workers)
+        for device, (result, e) in zip(devices, results):
+            if e is not None:
+                errors.append({'device': device['name'], 'error': str(e)})
+                continue
+            scanned.add(device['name'])
+            for p, objects in result[0].items():
+                found[(device['name'], p)] = objects
+            errors.extend(result[1])
+        return found, errors, scanned
+
+    def expected(self, lb, device):
+        """(type, name) of every object lb should have on device."""
+
+        handler = self.driver.loadbalancer
+        members = self.driver.member
+        monitors = self.driver.hm
+        objects = [(VIRTUAL_SERVER, handler._meta_name(lb))]
+        for pool in handler._pools(lb):
+            sg = handler._pool_name(self.context, pool=pool)
+            objects.append((SERVICE_GROUP, sg))
+            ips = handler.neutron.member_get_ips(self.context, pool.members,
+                                                 device['use_float'])
+            for m in pool.members:
+                objects.append((MEMBER, (sg, members._meta_name(m, ips[m.address]),
+                                         m.protocol_port)))
+            if pool.healthmonitor:
+                objects.append((HEALTH_MONITOR, monitors._meta_name(pool.healthmonitor)))
+        return objects
+
+    def audit(self):
+        found, errors, scanned = self.scan()
+        claimed = {}
+        missing = []
+        orphaned = []
+        unchecked = 0
+        total = 0
+        # Partitions holding a load balancer whose objects are unknown; what
+        # it owns there would look orphaned. None stands for every partition.
+        unclaimed = set()
+
+        for lb in self.load_balancers(self.context):
+            total += 1
+            key = None
+            try:
+                device = self.driver._select_a10_device(lb.tenant_id)
+                key = (device['name'], a10_context.partition_name(device, lb.tenant_id))
+                objects = self.expected(lb, device)
+            except Exception as e:
+                errors.append({'loadbalancer': lb.id, 'error': str(e)})
+                unclaimed.add(key)
+                unchecked += 1
+                continue
+            if device['name'] not in scanned or (key in found and found[key] is None):
+                unchecked += 1
+                continue
+
+            on_device = found.get(key) or _empty()
+            mine = claimed.setdefault(key, _empty())
+            where = {'device': key[0], 'partition': key[1],
+                     'loadbalancer': lb.id, 'tenant_id': lb.tenant_id}
+            for t, name in objects:
+                mine[t].add(name)
+                if name not in on_device[t]:
+                    missing.append(dict(where, type=t, name=name))
+                    self.drifted[lb.id] = lb
+
+            # Stray members of this load balancer's own service groups.
+            groups = set(name for t, name in objects if t == SERVICE_GROUP)
+            wanted = set(name for t, name in objects if t == MEMBER)
+            for m in sorted(on_device[MEMBER]):
+                if m[0] in groups and m not in wanted:
+                    orphaned.append(dict(where, type=MEMBER, name=m))
+                    self.drifted[lb.id] = lb
+
+        for key in sorted(found):
+            if found[key] is None or key in unclaimed or None in unclaimed:
+                continue
+            mine = claimed.get(key) or _empty()
+            for t in DELETE_ORDER:
+                for name in sorted(found[key][t] - mine[t]):
+                    orphaned.append({'device': key[0], 'partition': key[1],
+                                     'type': t, 'name': name})
+
+        return {
+            'devices': sorted(scanned),
+            'partitions': len([k for k in found if found[k] is not None]),
+            'loadbalancers': total,
+            'unchecked_loadbalancers': unchecked,
+            'missing': missing,
+            'orphaned': orphaned,
+            'errors': errors,
+        }
+
+    def refresh(self, lb, throttle):
+        throttle.wait()
+        return self.driver.loadbalancer.refresh(self.new_context(), lb)
+
+    def delete_orphans(self, device, partition, orphans, throttle):
+        """Delete orphans in one partition; returns (deleted, errors)."""
+
+        deleted = 0
+        errors = []
+        with a10_context.partition_client(self.driver, device, partition) as client:
+            for o in orphans:
+                throttle.wait()
+                try:
+                    if o['type'] == VIRTUAL_SERVER:
+                        client.slb.virtual_server.delete(o['name'])
+                    elif o['type'] == SERVICE_GROUP:
+                        client.slb.service_group.delete(o['name'])
+                    else:
+                        client.slb.hm.delete(o['name'])
+                    deleted += 1
+                except acos_errors.NotFound:
+                    pass
+                except Exception as e:
+                    # e.g. a monitor built into ACOS, or still in use
+                    errors.append(dict(o, error=str(e)))
+            if deleted:
+                self.driver.write_coalescer.write(device, client, partition, sync=True)
+        return deleted, errors
+
+    def fix(self, report, throttle, delete_orphans=False):
+        """Repair what audit() found; returns a summary of what was done."""
+
+        result = {'refreshed': 0, 'deleted': 0, 'errors': []}
+        lbs = [self.drifted[k] for k in sorted(self.drifted)]
+        for lb, (r, e) in zip(lbs, parallel.run(lambda lb: self.refresh(lb, throttle),
+                                                lbs, self.workers)):
+            if e is not None:
+                result['errors'].append({'loadbalancer': lb.id, 'error': str(e)})
+            else:
+                result['refreshed'] += 1
+
+        if not delete_orphans:
+            return result
+
+        groups = {}
+        for o in report['orphaned']:
+            if o['type'] != MEMBER:
+                groups.setdefault((o['device'], o['partition']), []).append(o)
+        keys = sorted(groups)
+
+        def delete(key):
+            orphans = sorted(groups[key], key=lambda o: DELETE_ORDER.index(o['type']))
+            return self.delete_orphans(self.driver.config.get_device(key[0]), key[1],
+                                       orphans, throttle)
+
+        for key, (r, e) in zip(keys, parallel.run(delete, keys, self.workers)):
+            if e is not None:
+                result['errors'].append({'device': key[0], 'partition': key[1],
+                                         'error': str(e)})
+            else:
+                result['deleted'] += r[0]
+                result['errors'].extend(r[1])
+        return result
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(
+        prog='a10-manage audit',
+        description="Compare the A10 devices with the neutron LBaaS database.")
+    p.add_argument('--output', default='-', help="report file (default stdout)")
+    p.add_argument('--workers', type=int, default=8,
+                   help="devices scanned, and repairs made, in parallel (default 8)")
+    p.add_argument('--partition-workers', type=int, default=2,
+                   help="partitions of one device scanned in parallel (default 2)")
+    p.add_argument('--page-size', type=int, default=500,
+                   help="load balancers read from the database at a time (default 500)")
+    p.add_argument('--fix', action='store_true',
+                   help="refresh load balancers with missing objects or stray members")
+    p.add_argument('--delete-orphans', action='store_true',
+                   help="with --fix, also delete orphaned virtual servers, service "
+                        "groups and health monitors")
+    p.add_argument('--rate', type=float, default=1.0,
+                   help="most repairs per second; 0 for no limit (default 1)")
+    p.add_argument('--neutron-config-file', default='/etc/neutron/neutron.conf')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+
+    common.init_neutron(args.neutron_config_file)
+    driver = common.build_driver()
+
+    auditor = Auditor(driver, common.admin_context(), workers=args.workers,
+                      partition_workers=args.partition_workers,
+                      load_balancers=lambda ctx: common.iter_load_balancers(
+                          ctx, args.page_size))
+    report = auditor.audit()
+    clean = not (report['missing'] or report['orphaned'] or report['errors'])
+    if args.fix:
+        try:
+            report['fix'] = auditor.fix(report, common.Throttle(args.rate),
+                                        delete_orphans=args.delete_orphans)
+        finally:
+            common.flush(driver)
+        clean = not report['fix']['errors']
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        json.dump(report, out, indent=2, sort_keys=True)
+        out.write('\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    LOG.info("audited %d load balancers on %d devices: %d missing, %d orphaned",
+             report['loadbalancers'], len(report['devices']),
+             len(report['missing']), len(report['orphaned']))
+    return 0 if clean else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers shared by the a10-manage commands.
+
+These commands run outside neutron-server, so they build their own driver
+instance on top of the neutron and neutron-lbaas databases.
+"""
+
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Seconds to wait for background write memory and ha sync on exit.
+FLUSH_TIMEOUT = 120
+
+
+class StatusManager(object):
+    """Stands in for a neutron-lbaas object manager; only logs status."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def successful_completion(self, context, obj, delete=False):
+        LOG.debug("%s %s %s", self.name, obj.id, "deleted" if delete else "ok")
+
+    def failed_completion(self, context, obj):
+        LOG.debug("%s %s failed", self.name, obj.id)
+
+
+class OpenstackDriver(object):
+    """The parts of the neutron-lbaas v2 driver the handlers use."""
+
+    def __init__(self):
+        self.load_balancer = StatusManager('loadbalancer')
+        self.listener = StatusManager('listener')
+        self.pool = StatusManager('pool')
+        self.member = StatusManager('member')
+        self.health_monitor = StatusManager('healthmonitor')
+        self._plugin = None
+
+    @property
+    def plugin(self):
+        if self._plugin is None:
+            from neutron_lbaas.db.loadbalancer import loadbalancer_dbv2
+
+            class Plugin(object):
+                db = loadbalancer_dbv2.LoadBalancerPluginDbv2()
+
+            self._plugin = Plugin()
+        return self._plugin
+
+
+def init_neutron(config_file):
+    from neutron.common import config as n_config
+    n_config.init(['--config-file', config_file])
+
+
+def admin_context():
+    try:
+        from neutron_lib import context
+    except ImportError:
+        from neutron import context
+    return context.get_admin_context()
+
+
+def build_driver(config_name=None):
+    from a10_neutron_lbaas import a10_openstack_lb
+    return a10_openstack_lb.A10OpenstackLBV2(OpenstackDriver(), config_name=config_name)
+
+
+def flush(driver, timeout=FLUSH_TIMEOUT):
+    """Finish the write memory and ha sync left to background threads.
+
+    With a write_memory_window or ha_sync_async those only run later on
+    daemon threads, which would die with the command.
+    """
+
+    driver.write_coalescer.flush_all(timeout)
+    driver.ha_sync_queue.flush_all(timeout)
+
+
+def load_balancers(context, tenant_id=None):
+    """neutron-lbaas v2 data models of a tenant's (or every) load balancer."""
+
+    from neutron_lbaas.db.loadbalancer import models as lb_db
+    q = context.session.query(lb_db.LoadBalancer)
+    if tenant_id is not None:
+        q = q.filter_by(tenant_id=tenant_id)
+    return [lb.to_data_model() for lb in q]
+
+
+def iter_load_balancers(context, page_size=500):
+    """Every load balancer's data model, read page_size rows at a time."""
+
+    from neutron_lbaas.db.loadbalancer import models as lb_db
+    last = None
+    while True:
+        q = context.session.query(lb_db.LoadBalancer).order_by(lb_db.LoadBalancer.id)
+        if last is not None:
+            q = q.filter(lb_db.LoadBalancer.id > last)
+        page = q.limit(page_size).all()
+        if not page:
+            return
+        last = page[-1].id
+        models = [lb.to_data_model() for lb in page]
+        context.session.expunge_all()
+        for lb in models:
+            yield lb
+
+
+class Throttle(object):
+    """Spaces calls to wait() at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next = 0
+
+    def wait(self):
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next)
+            self.next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
@@ -0,0 +1,69 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""a10-manage exporter: appliance stats for Prometheus, outside neutron.
+
+Collects the stats of every configured device in the background, as a
+device's stats_interval does inside neutron, and serves them with this
+process's own metrics at http://--address:--port/metrics.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from a10_neutron_lbaas import exporter
+from a10_neutron_lbaas.manage import common
+
+LOG = logging.getLogger(__name__)
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(
+        prog='a10-manage exporter',
+        description="Serve A10 device stats in Prometheus text format.")
+    p.add_argument('--address', default='', help="address to listen on (default all)")
+    p.add_argument('--port', type=int, default=9712, help="port to listen on (default 9712)")
+    p.add_argument('--interval', type=int, default=60,
+                   help="seconds between collections, for devices without a "
+                        "stats_interval (default 60)")
+    p.add_argument('--neutron-config-file', default='/etc/neutron/neutron.conf')
+    return p.parse_args(argv)
+
+
+def watch_devices(driver, interval):
+    for name, device in sorted(driver.config.get_devices().items()):
+        if not device.get('stats_interval'):
+            device = dict(device, stats_interval=interval)
+        driver.stats_collector.watch(device)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+
+    common.init_neutron(args.neutron_config_file)
+    driver = common.build_driver()
+
+    driver.exporter = exporter.Exporter(driver, args.address, args.port)
+    driver.exporter.start()
+    if driver.exporter.server is None:
+        return "error: unable to listen on %s:%s" % (args.address, args.port)
+    watch_devices(driver, args.interval)
+
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,340 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""a10-manage migrate: move tenants' load balancers to another appliance.
+
+For each tenant the loadbalancers, listeners, pools, members and health
+monitors are created on the target device, the tenant binding is pointed
+at it, and once other neutron workers' cached bindings have expired the
+objects are removed from the source. Tenants are migrated in parallel, at
+most --rate per second, and every rebound or finished tenant is appended to
+a checkpoint file so an interrupted run can be resumed.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing.pool
+import os
+import sys
+import threading
+import time
+
+from a10_neutron_lbaas import a10_context
+from a10_neutron_lbaas.db import api as db_api
+from a10_neutron_lbaas.db import models
+from a10_neutron_lbaas.manage import common
+
+LOG = logging.getLogger(__name__)
+
+BOUND = 'bound'
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+class Checkpoint(object):
+    """Append-only record, one JSON object per line, of finished tenants.
+
+    Tenants whose binding was moved but whose source objects may remain
+    are kept in bound, with the record naming their source.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.finished = set()
+        self.bound = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from an interrupted run
+                    self._note(r)
+
+    def _note(self, r):
+        if r.get('status') == BOUND:
+            self.bound[r['tenant_id']] = r
+        elif r.get('status') in (DONE, SKIPPED):
+            self.bound.pop(r['tenant_id'], None)
+            self.finished.add(r['tenant_id'])
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self.finished
+
+    def record(self, tenant_id, status, **info):
+        info.update(tenant_id=tenant_id, status=status)
+        with self.lock:
+            self._note(info)
+            if not self.path:
+                return
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(info, sort_keys=True) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def tenant_operations(load_balancers, action):
+    """Batch operations (see A10OpenstackLBV2.batch) for whole load balancers."""
+
+    ops = []
+    seen = set()
+
+    def add(resource, obj):
+        if obj is not None and obj.id not in seen:
+            seen.add(obj.id)
+            ops.append((resource, action, obj))
+
+    for lb in load_balancers:
+        add('loadbalancer', lb)
+        pools = list(getattr(lb, 'pools', None) or [])
+        for listener in lb.listeners or []:
+            add('listener', listener)
+            pools.append(listener.default_pool)
+        for pool in pools:
+            if pool is None:
+                continue
+            add('pool', pool)
+            for member in pool.members or []:
+                add('member', member)
+            add('hm', pool.healthmonitor)
+    return ops
+
+
+class Migrator(object):
+
+    def __init__(self, driver, target, checkpoint, throttle=None,
+                 load_balancers=common.load_balancers, dry_run=False, binding_delay=0,
+                 new_context=common.admin_context):
+        self.driver = driver
+        self.target = driver.config.get_device(target)
+        self.checkpoint = checkpoint
+        self.throttle = throttle or common.Throttle(0)
+        self.load_balancers = load_balancers
+        self.dry_run = dry_run
+        # Seconds other workers may keep serving a tenant's old binding.
+        self.binding_delay = binding_delay
+        # Tenants are moved from worker threads, and database sessions can't
+        # be shared between them; each step gets a context of its own.
+        self.new_context = new_context
+
+    def set_binding(self, tenant_id, device_name):
+        db = db_api.get_session()
+        try:
+            b = db.query(models.A10TenantBinding).filter(
+                models.A10TenantBinding.tenant_id == tenant_id).one_or_none()
+            if b is None:
+                db.add(models.A10TenantBinding(tenant_id=tenant_id, device_name=device_name))
+            else:
+                b.device_name = device_name
+            db.commit()
+        finally:
+            db.close()
+        self.driver.hooks.invalidate_binding(tenant_id)
+
+    def remove_partition(self, context, source, tenant_id):
+        name = a10_context.partition_name(source, tenant_id)
+        if source['v_method'].lower() != 'adp' or not name:
+            return
+        client = self.driver._get_a10_client(source)
+        try:
+            self.driver.hooks.partition_delete(client, context, name)
+            self.driver.session_pool.partition_deleted(source, name)
+        finally:
+            self.driver._release_a10_client(source, client, discard=True)
+
+    def migrate_tenant(self, tenant_id):
+        """Copy tenant_id's objects to the target and point its binding there.
+
+        Returns BOUND when the binding has moved; the source copy is left
+        for remove_source.
+        """
+
+        bound = self.checkpoint.bound.get(tenant_id)
+        if bound is not None:
+            # An earlier run moved the binding but may not have finished
+            # removing the source copy.
+            return BOUND, dict((k, v) for k, v in bound.items()
+                               if k not in ('tenant_id', 'status'))
+
+        source = self.driver._select_a10_device(tenant_id)
+        target = self.target
+        if source['name'] == target['name']:
+            return SKIPPED, {'reason': 'already on target'}
+
+        context = self.new_context()
+        lbs = self.load_balancers(context, tenant_id)
+        info = {'source': source['name'], 'target': target['name'],
+                'loadbalancers': len(lbs)}
+        if self.dry_run:
+            info['objects'] = len(tenant_operations(lbs, 'create'))
+            return SKIPPED, info
+
+        failed = self.driver.batch(context, tenant_operations(lbs, 'create'),
+                                   device_name=target['name'])
+        if failed:
+            # The tenant keeps running on the source; the partial copy on the
+            # target is overwritten by the next attempt.
+            info['error'] = "%d object(s) failed on target: %s" % (
+                len(failed), failed[0][1])
+            return FAILED, info
+
+        self.set_binding(tenant_id, target['name'])
+        info['bound_at'] = time.time()
+        return BOUND, info
+
+    def remove_source(self, tenant_id, info):
+        """Delete a rebound tenant's objects from its source device."""
+
+        delay = info['bound_at'] + self.binding_delay - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        source = self.driver.config.get_device(info['source'])
+        context = self.new_context()
+        lbs = self.load_balancers(context, tenant_id)
+        failed = self.driver.batch(context, tenant_operations(lbs, 'delete'),
+                                   device_name=source['name'])
+        if failed:
+            info['leftover'] = len(failed)
+            LOG.warning("Tenant %s moved, but %d object(s) were left on %s",
+                        tenant_id, len(failed), source['name'])
+        else:
+            try:
+                self.remove_partition(context, source, tenant_id)
+            except Exception:
+                LOG.exception("Tenant %s moved, but its partition on %s was not removed",
+                              tenant_id, source['name'])
+        return DONE, info
+
+    def _record(self, tenant_id, status, info):
+        self.checkpoint.record(tenant_id, status, **info)
+        LOG.info("tenant %s: %s %s", tenant_id, status, info)
+
+    def _run_one(self, tenant_id):
+        self.throttle.wait()
+        try:
+            status, info = self.migrate_tenant(tenant_id)
+        except Exception as e:
+            LOG.exception("Migration of tenant %s failed", tenant_id)
+            status, info = FAILED, {'error': str(e)}
+        self._record(tenant_id, status, info)
+        return tenant_id, status, info
+
+    def _finish_one(self, item):
+        tenant_id, info = item
+        try:
+            status, info = self.remove_source(tenant_id, info)
+        except Exception as e:
+            LOG.exception("Removing tenant %s from %s failed", tenant_id, info['source'])
+            status, info = FAILED, dict(info, error=str(e))
+        self._record(tenant_id, status, info)
+        return status
+
+    def run(self, tenant_ids, workers=4):
+        todo = [t for t in tenant_ids if t not in self.checkpoint]
+        if len(todo) < len(tenant_ids):
+            LOG.info("Resuming; %d of %d tenants already migrated",
+                     len(tenant_ids) - len(todo), len(tenant_ids))
+        counts = {DONE: 0, SKIPPED: 0, FAILED: 0}
+        bound = []
+        pool = multiprocessing.pool.ThreadPool(max(1, workers))
+        try:
+            for tenant_id, status, info in pool.imap_unordered(self._run_one, todo):
+                if status == BOUND:
+                    bound.append((tenant_id, info))
+                else:
+                    counts[status] += 1
+
+            # Sources are cleaned up in the order tenants were rebound, each
+            # once workers can no longer be using its old binding.
+            if bound and self.binding_delay:
+                LOG.info("Removing %d tenant(s) from their source devices as their "
+                         "%ds binding cache expires", len(bound), self.binding_delay)
+            bound.sort(key=lambda b: b[1]['bound_at'])
+            for status in pool.imap_unordered(self._finish_one, bound):
+                counts[status] += 1
+        finally:
+            pool.close()
+            pool.join()
+        return counts
+
+
+def bound_tenants(device_name):
+    db = db_api.get_session()
+    try:
+        return [b.tenant_id for b in db.query(models.A10TenantBinding).filter(
+            models.A10TenantBinding.device_name == device_name)]
+    finally:
+        db.close()
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(
+        prog='a10-manage migrate',
+        description="Move tenants' load balancers to another A10 device.")
+    p.add_argument('--target', required=True, help="device name from config.py")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument('--tenant', action='append', help="tenant id; may be repeated")
+    g.add_argument('--tenants-file', help="file with one tenant id per line")
+    g.add_argument('--from-device', help="migrate every tenant bound to this device")
+    p.add_argument('--workers', type=int, default=4,
+                   help="tenants migrated in parallel (default 4)")
+    p.add_argument('--rate', type=float, default=1.0,
+                   help="most tenants started per second; 0 for no limit (default 1)")
+    p.add_argument('--checkpoint', default='a10-migrate.checkpoint',
+                   help="progress file; rerun with the same file to resume")
+    p.add_argument('--neutron-config-file', default='/etc/neutron/neutron.conf')
+    p.add_argument('--dry-run', action='store_true',
+                   help="report what would be moved without changing anything")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+
+    common.init_neutron(args.neutron_config_file)
+    driver = common.build_driver()
+    if not driver.config.get('use_database'):
+        sys.exit("error: migrate requires use_database = True")
+    delay = 0
+    if driver.config.get('tenant_binding_cache_size'):
+        delay = driver.config.get('tenant_binding_cache_ttl')
+        if not delay:
+            sys.exit("error: with tenant_binding_cache_ttl = 0, neutron workers keep "
+                     "migrated tenants on their old device; set a ttl first")
+
+    if args.tenant:
+        tenants = args.tenant
+    elif args.tenants_file:
+        with open(args.tenants_file) as f:
+            tenants = [line.strip() for line in f if line.strip()]
+    else:
+        tenants = bound_tenants(args.from_device)
+
+    m = Migrator(driver, args.target,
+                 Checkpoint(None if args.dry_run else args.checkpoint),
+                 throttle=common.Throttle(args.rate), dry_run=args.dry_run,
+                 binding_delay=delay)
+    try:
+        counts = m.run(tenants, workers=args.workers)
+    finally:
+        common.flush(driver)
+    print("migrated=%(done)d skipped=%(skipped)d failed=%(failed)d" % counts)
+    return 1 if counts[FAILED] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""a10-manage rehash: which tenants a device list change would move.
+
+Hashes every tenant with the current config and with a proposed one (a
+config module next to it, and/or another hash_ring_vnodes) and reports the
+tenants that would land on a different device. Tenants with a saved
+binding are marked; they stay where they are bound. Nothing is changed.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from a10_neutron_lbaas import a10_config
+from a10_neutron_lbaas import consistent_hash
+from a10_neutron_lbaas.db import api as db_api
+from a10_neutron_lbaas.db import models
+from a10_neutron_lbaas.manage import common
+
+LOG = logging.getLogger(__name__)
+
+
+def bindings():
+    """tenant_id -> bound device name, for every saved binding."""
+
+    db = db_api.get_session()
+    try:
+        return dict((b.tenant_id, b.device_name)
+                    for b in db.query(models.A10TenantBinding))
+    finally:
+        db.close()
+
+
+def known_tenants(context):
+    """Tenants that own a load balancer."""
+
+    from neutron_lbaas.db.loadbalancer import models as lb_db
+    q = context.session.query(lb_db.LoadBalancer.tenant_id).distinct()
+    return [row[0] for row in q]
+
+
+def report(old_hash, new_hash, tenant_ids, bound=None):
+    bound = bound or {}
+    moved = consistent_hash.moves(old_hash, new_hash, tenant_ids)
+    return {
+        'tenants': len(tenant_ids),
+        'moved': dict((t, {'from': a, 'to': b, 'bound': t in bound})
+                      for t, (a, b) in moved.items()),
+    }
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(
+        prog='a10-manage rehash',
+        description="Report the tenants a change to the A10 device list or "
+                    "hash_ring_vnodes would move to another device.")
+    p.add_argument('--new-config',
+                   help="proposed config module, e.g. config_new for config_new.py "
+                        "beside config.py (default the current config)")
+    p.add_argument('--vnodes', type=int,
+                   help="proposed hash_ring_vnodes; 0 for the original hash "
+                        "(default that of the proposed config)")
+    g = p.add_mutually_exclusive_group()
+    g.add_argument('--tenant', action='append', help="tenant id; may be repeated")
+    g.add_argument('--tenants-file', help="file with one tenant id per line")
+    p.add_argument('--output', default='-', help="report file (default stdout)")
+    p.add_argument('--neutron-config-file', default='/etc/neutron/neutron.conf')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.new_config is None and args.vnodes is None:
+        sys.exit("error: nothing to compare; give --new-config and/or --vnodes")
+
+    old = a10_config.A10Config()
+    new = old if args.new_config is None else a10_config.A10Config(config_name=args.new_config)
+    vnodes = new.get('hash_ring_vnodes') if args.vnodes is None else args.vnodes
+    old_hash = consistent_hash.device_hash(old.get_devices(), old.get('hash_ring_vnodes'))
+    new_hash = consistent_hash.device_hash(new.get_devices(), vnodes)
+
+    listed = args.tenant or args.tenants_file
+    if not listed or old.get('use_database'):
+        common.init_neutron(args.neutron_config_file)
+    bound = bindings() if old.get('use_database') else {}
+    if args.tenant:
+        tenants = args.tenant
+    elif args.tenants_file:
+        with open(args.tenants_file) as f:
+            tenants = [line.strip() for line in f if line.strip()]
+    else:
+        tenants = sorted(set(known_tenants(common.admin_context())) | set(bound))
+
+    r = report(old_hash, new_hash, tenants, bound)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        json.dump(r, out, indent=2, sort_keys=True)
+        out.write('\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    LOG.info("%d of %d tenants would move, %d of them bound",
+             len(r['moved']), r['tenants'],
+             len([m for m in r['moved'].values() if m['bound']]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Process-local counters, gauges and timings kept by the driver.
+
+Metrics are identified by a name plus optional keyword labels, e.g.
+incr('sessions_closed', device='ax1').
+"""
+
+import threading
+import time
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def incr(name, value=1, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _gauges[k] = value
+
+
+def observe(name, seconds, **labels):
+    k = _key(name, labels)
+    with _lock:
+        count, total = _timings.get(k, (0, 0.0))
+        _timings[k] = (count + 1, total + seconds)
+
+
+class timer(object):
+    """Context manager recording the duration of its block via observe()."""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        observe(self.name, time.time() - self.start, **self.labels)
+
+
+def timed(fn, name, **labels):
+    """fn, with the duration of every call recorded via observe()."""
+
+    def call(*args, **kwargs):
+        with timer(name, **labels):
+            return fn(*args, **kwargs)
+    return call
+
+
+def get(name, **labels):
+    k = _key(name, labels)
+    with _lock:
+        if k in _counters:
+            return _counters[k]
+        if k in _timings:
+            return _timings[k]
+        return _gauges.get(k)
+
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'timings': dict(_timings),
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
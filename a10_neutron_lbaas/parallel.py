@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Bounded fan-out of blocking calls (aXAPI requests) over a few threads."""
+
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+def run(fn, items, concurrency):
+    """Call fn(item) for every item, at most concurrency at a time.
+
+    Returns a (result, exception) pair per item, in the order of items;
+    one failing call never stops the others.  With a concurrency of 1, or
+    a single item, everything runs in the calling thread.
+    """
+
+    items = list(items)
+    results = [None] * len(items)
+
+    def call(i):
+        try:
+            results[i] = (fn(items[i]), None)
+        except Exception as e:
+            LOG.debug("A10Driver: parallel call on %s failed", items[i], exc_info=True)
+            results[i] = (None, e)
+
+    n = min(max(1, concurrency), len(items))
+    if n <= 1:
+        for i in range(len(items)):
+            call(i)
+        return results
+
+    lock = threading.Lock()
+    todo = iter(range(len(items)))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(todo, None)
+            if i is None:
+                return
+            call(i)
+
+    threads = [threading.Thread(target=worker, name="a10-parallel-%d" % t)
+               for t in range(n)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    return results
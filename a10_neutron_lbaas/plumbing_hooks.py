@@ -12,11 +12,20 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import acos_client
+import logging
+
+import sqlalchemy
+import sqlalchemy.exc
 
 from a10_neutron_lbaas import a10_exceptions as ex
+from a10_neutron_lbaas import cache
+from a10_neutron_lbaas import consistent_hash
+from a10_neutron_lbaas import device_scheduler
 from a10_neutron_lbaas.db import api as db_api
 from a10_neutron_lbaas.db import models
+from a10_neutron_lbaas.etc import defaults
+
+LOG = logging.getLogger(__name__)
 
 
 class PlumbingHooks(object):
@@ -27,7 +36,29 @@ class PlumbingHooks(object):
             self.devices = devices
         else:
             self.devices = self.driver.config.get_devices()
-        self.appliance_hash = acos_client.Hash(self.devices.keys())
+
+        if driver is not None:
+            cache_size = driver.config.get('tenant_binding_cache_size')
+            cache_ttl = driver.config.get('tenant_binding_cache_ttl')
+            scheduler = driver.config.get('device_scheduler')
+            vnodes = driver.config.get('hash_ring_vnodes')
+        else:
+            cache_size = defaults.GLOBAL_DEFAULTS['tenant_binding_cache_size']
+            cache_ttl = defaults.GLOBAL_DEFAULTS['tenant_binding_cache_ttl']
+            scheduler = defaults.GLOBAL_DEFAULTS['device_scheduler']
+            vnodes = defaults.GLOBAL_DEFAULTS['hash_ring_vnodes']
+        self.appliance_hash = consistent_hash.device_hash(self.devices, vnodes)
+        # tenant_id -> device name, for tenants already bound in the database
+        self.bindings = cache.LRUCache('tenant_bindings', cache_size, ttl=cache_ttl)
+
+        # Placement of new tenants; only sticky when bindings are saved
+        self.scheduler = device_scheduler.get_scheduler(scheduler, driver, self.devices)
+        if isinstance(self.scheduler, device_scheduler.HashScheduler):
+            self.scheduler.appliance_hash = self.appliance_hash
+        if (scheduler != 'hash' and driver is not None and
+                not driver.config.get('use_database')):
+            LOG.warning("A10Driver: device_scheduler %s needs use_database; "
+                        "using hash", scheduler)
 
     def select_device_hash(self, tenant_id):
         # Must return device dict from config.py
@@ -35,30 +66,99 @@ class PlumbingHooks(object):
         return self.devices[s]
 
     def select_device_db(self, tenant_id, db_session=None):
-        if db_session is not None:
-            db = db_session
-        else:
-            db = db_api.get_session()
+        device_name = self.bindings.get(tenant_id)
+        if device_name is not None:
+            return self._bound_device(tenant_id, device_name)
 
+        if db_session is not None:
+            return self._select_device_db(tenant_id, db_session)
+
+        db = db_api.get_session()
+        try:
+            return self._select_device_db(tenant_id, db)
+        finally:
+            db.close()
+
+    def _bound_device(self, tenant_id, device_name):
+        if device_name in self.devices:
+            return self.devices[device_name]
+        raise ex.DeviceConfigMissing(
+            'A10 device %s mapped to tenant %s is not present in config; '
+            'add it back to config or migrate loadbalancers' %
+            (device_name, tenant_id))
+
+    def _select_device_db(self, tenant_id, db):
         # See if we have a saved tenant
         a10 = db.query(models.A10TenantBinding).filter(
             models.A10TenantBinding.tenant_id == tenant_id).one_or_none()
         if a10 is not None:
-            if a10.device_name in self.devices:
-                return self.devices[a10.device_name]
-            else:
-                raise ex.DeviceConfigMissing(
-                    'A10 device %s mapped to tenant %s is not present in config; '
-                    'add it back to config or migrate loadbalancers' %
-                    (a10.device_name, tenant_id))
-
-        # Nope, so we hash and save
-        d = self.select_device_hash(tenant_id)
+            self.bindings.set(tenant_id, a10.device_name)
+            return self._bound_device(tenant_id, a10.device_name)
+
+        # Nope, so we schedule and save
+        d = self.scheduler.select(tenant_id)
         a10 = models.A10TenantBinding(tenant_id=tenant_id, device_name=d['name'])
         db.add(a10)
-        db.commit()
+        try:
+            db.commit()
+        except sqlalchemy.exc.IntegrityError:
+            # Another worker bound this tenant first; its binding wins.
+            db.rollback()
+            a10 = db.query(models.A10TenantBinding).filter(
+                models.A10TenantBinding.tenant_id == tenant_id).one()
+            self.bindings.set(tenant_id, a10.device_name)
+            return self._bound_device(tenant_id, a10.device_name)
+
+        self.bindings.set(tenant_id, d['name'])
         return d
 
+    def warm_bindings(self, db_session=None, page_size=1000):
+        """Load every tenant binding into the cache, page by page.
+
+        Returns the number of bindings loaded and, per device name missing
+        from config, how many tenants are bound to it.
+        """
+
+        db = db_session if db_session is not None else db_api.get_session()
+        B = models.A10TenantBinding
+        loaded = 0
+        missing = {}
+        last = None
+        try:
+            while True:
+                q = db.query(B.id, B.tenant_id, B.device_name)
+                if last is not None:
+                    q = q.filter(sqlalchemy.or_(
+                        B.tenant_id > last[1],
+                        sqlalchemy.and_(B.tenant_id == last[1], B.id > last[0])))
+                rows = q.order_by(B.tenant_id, B.id).limit(page_size).all()
+                for row in rows:
+                    self.bindings.set(row.tenant_id, row.device_name)
+                    if row.device_name not in self.devices:
+                        missing[row.device_name] = missing.get(row.device_name, 0) + 1
+                loaded += len(rows)
+                if len(rows) < page_size:
+                    break
+                last = (rows[-1].id, rows[-1].tenant_id)
+        finally:
+            if db_session is None:
+                db.close()
+
+        for device_name, n in sorted(missing.items()):
+            LOG.error("A10Driver: device %s is bound to %d tenant(s) but is not "
+                      "present in config; add it back to config or migrate "
+                      "loadbalancers", device_name, n)
+        LOG.info("A10Driver: loaded %d tenant bindings", loaded)
+        return loaded, missing
+
+    def invalidate_binding(self, tenant_id=None):
+        """Forget the cached binding of tenant_id, or of every tenant.
+
+        Call this after moving tenants to another device.
+        """
+
+        self.bindings.invalidate(tenant_id)
+
     def select_device(self, tenant_id):
         if self.driver.config.get('use_database'):
             return self.select_device_db(tenant_id)
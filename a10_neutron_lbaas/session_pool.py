@@ -0,0 +1,472 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import threading
+import time
+
+from a10_neutron_lbaas import a10_exceptions as ex
+from a10_neutron_lbaas import circuit_breaker
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+# ACOS drops idle sessions on its own; never hand out one older than this.
+# Overridden per device by session_max_age.
+MAX_SESSION_AGE = 60
+
+# How long a checkout waits for a busy session before opening an overflow one.
+CHECKOUT_TIMEOUT = 10
+
+
+def device_key(device_info):
+    return "%s-%s" % (device_info['host'], device_info['port'])
+
+
+class PooledSession(object):
+
+    def __init__(self, client, overflow=False):
+        self.client = client
+        self.created = time.time()
+        self.overflow = overflow
+
+    def age(self, now=None):
+        return (now or time.time()) - self.created
+
+
+class DeviceSessionPool(object):
+    """Checkout/checkin pool of ACOS sessions for a single appliance.
+
+    Each appliance gets its own lock, so tenants on different devices never
+    contend with each other.  At most session_pool_max sessions are open at
+    once; a checkout that cannot get one within CHECKOUT_TIMEOUT opens a
+    short-lived overflow session instead of blocking the API worker forever.
+    """
+
+    def __init__(self, device_info, create_client, close_client, retire=None,
+                 renew_margin=0, maintained=False):
+        self.device_info = device_info
+        self.key = device_key(device_info)
+        self.create_client = create_client
+        self.close_client = close_client
+        self.retire = retire
+        self.min_size = max(0, int(device_info.get('session_pool_min', 1)))
+        self.max_size = max(1, self.min_size,
+                            int(device_info.get('session_pool_max', 4)))
+        self.max_age = device_info.get('session_max_age') or MAX_SESSION_AGE
+        # Renew early enough that the keeper gets to a session before the
+        # appliance expires it, but never more often than every max_age/2.
+        self.renew_age = max(self.max_age / 2.0, self.max_age - renew_margin)
+        self.maintained = maintained
+        self.breaker = circuit_breaker.CircuitBreaker(
+            self.key,
+            failure_threshold=device_info.get('circuit_breaker_threshold', 3),
+            reset_timeout=device_info.get('circuit_breaker_timeout', 5))
+        self.cond = threading.Condition(threading.Lock())
+        self.idle = []
+        self.busy = {}
+        self.size = 0
+        self.primed = False
+
+    def _expired(self, session, now=None):
+        return session.age(now) >= self.max_age
+
+    def _new_session(self, overflow=False):
+        if not self.breaker.allow():
+            raise ex.DeviceSessionUnavailable(
+                "circuit breaker open for %s; not opening a session" % self.key)
+        try:
+            client = self.create_client(self.device_info)
+        except Exception:
+            self.breaker.failure()
+            raise
+        if client is None:
+            self.breaker.failure()
+            raise ex.DeviceSessionUnavailable(
+                "unable to open an ACOS session on %s" % self.key)
+        self.breaker.success()
+        return PooledSession(client, overflow=overflow)
+
+    def _close(self, sessions):
+        for s in sessions:
+            try:
+                self.close_client(s.client)
+            except Exception:
+                LOG.exception("A10Driver: error closing session on %s", self.key)
+
+    def _retire(self, sessions):
+        if not sessions:
+            return
+        if self.retire is not None:
+            self.retire(self, sessions)
+        else:
+            self._close(sessions)
+
+    def _prime(self):
+        # Lazily open the configured minimum the first time this process
+        # uses the device; the caller's checkout then takes one of them.
+        with self.cond:
+            if self.primed:
+                return
+            self.primed = True
+            n = max(0, self.min_size - self.size)
+            self.size += n
+
+        for i in range(n):
+            try:
+                s = self._new_session()
+            except Exception:
+                LOG.exception("A10Driver: unable to pre-open session on %s", self.key)
+                with self.cond:
+                    self.size -= 1
+                continue
+            with self.cond:
+                self.idle.append(s)
+                self.cond.notify()
+
+    def checkout(self):
+        # With a keeper thread running it tops the pool up instead.
+        if not self.primed and not self.maintained:
+            self._prime()
+
+        retired = []
+        session = None
+        create = False
+        overflow = False
+        deadline = time.time() + CHECKOUT_TIMEOUT
+
+        with self.cond:
+            while session is None and not create:
+                now = time.time()
+                while self.idle:
+                    s = self.idle.pop()
+                    if self._expired(s, now):
+                        retired.append(s)
+                        self.size -= 1
+                        continue
+                    session = s
+                    break
+
+                if session is not None:
+                    break
+
+                if self.size < self.max_size:
+                    self.size += 1
+                    create = True
+                elif now >= deadline:
+                    LOG.warning("A10Driver: session pool for %s exhausted (%d), "
+                                "opening an overflow session", self.key, self.max_size)
+                    create = True
+                    overflow = True
+                else:
+                    self.cond.wait(deadline - now)
+
+            if session is not None:
+                self.busy[id(session.client)] = session
+
+        self._retire(retired)
+
+        if create:
+            try:
+                session = self._new_session(overflow=overflow)
+            except Exception:
+                if not overflow:
+                    with self.cond:
+                        self.size -= 1
+                        self.cond.notify()
+                raise
+            with self.cond:
+                self.busy[id(session.client)] = session
+
+        return session.client
+
+    def checkin(self, client, discard=False):
+        close = False
+        with self.cond:
+            session = self.busy.pop(id(client), None)
+            if session is None:
+                LOG.debug("A10Driver: checkin of unknown session on %s", self.key)
+                return
+
+            if session.overflow:
+                close = True
+            elif discard or self._expired(session):
+                close = True
+                self.size -= 1
+            else:
+                self.idle.append(session)
+            self.cond.notify()
+
+        if close:
+            self._retire([session])
+
+    def renew(self):
+        """Top up to session_pool_min and replace idle sessions near expiry.
+
+        Runs on the keeper thread, so requests only create sessions
+        themselves when the pool is empty.  Returns the replaced sessions,
+        which the caller is expected to close.
+        """
+
+        with self.cond:
+            self.primed = True
+            missing = max(0, self.min_size - self.size)
+            self.size += missing
+            stale = [x for x in self.idle if x.age() >= self.renew_age]
+
+        retired = []
+        for i in range(missing):
+            try:
+                fresh = self._new_session()
+            except ex.DeviceSessionUnavailable as e:
+                LOG.debug("A10Driver: %s", e)
+                with self.cond:
+                    self.size -= 1
+                continue
+            except Exception:
+                LOG.exception("A10Driver: unable to open session on %s", self.key)
+                with self.cond:
+                    self.size -= 1
+                continue
+            with self.cond:
+                self.idle.append(fresh)
+                self.cond.notify()
+
+        for old in stale:
+            try:
+                fresh = self._new_session()
+            except ex.DeviceSessionUnavailable as e:
+                LOG.debug("A10Driver: %s", e)
+                continue
+            except Exception:
+                LOG.exception("A10Driver: unable to renew session on %s", self.key)
+                continue
+            with self.cond:
+                if old in self.idle:
+                    self.idle.remove(old)
+                    retired.append(old)
+                    self.idle.append(fresh)
+                elif self.size < self.max_size:
+                    # Checked out meanwhile; it is retired on checkin.
+                    self.size += 1
+                    self.idle.append(fresh)
+                else:
+                    retired.append(fresh)
+                self.cond.notify()
+
+        return retired
+
+    def partition_deleted(self, name):
+        # acos_client skips activating the partition a client believes is
+        # active; make sessions that had the deleted one active ask again.
+        with self.cond:
+            for s in self.idle + self.busy.values():
+                if getattr(s.client, 'current_partition', None) == name:
+                    s.client.current_partition = None
+
+    def drain(self):
+        """Detach every session from the pool and return them."""
+
+        with self.cond:
+            sessions = self.idle + self.busy.values()
+            self.idle = []
+            self.busy = {}
+            self.size = 0
+            self.cond.notify_all()
+        return sessions
+
+    def stats(self):
+        with self.cond:
+            r = {
+                'idle': len(self.idle),
+                'busy': len(self.busy),
+                'size': self.size,
+                'max': self.max_size,
+            }
+        r['breaker'] = self.breaker.status()
+        return r
+
+
+class SessionKeeper(threading.Thread):
+    """Renews pooled sessions and closes retired ones off the request path."""
+
+    def __init__(self, registry, interval):
+        super(SessionKeeper, self).__init__(name="a10-session-keeper")
+        self.daemon = True
+        self.registry = registry
+        self.interval = interval
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.registry.maintain()
+            except Exception:
+                LOG.exception("A10Driver: session keeper failed")
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+
+class SessionPool(object):
+    """Registry of per-appliance session pools, scoped to one process.
+
+    neutron-server forks its API workers after the driver is loaded.  Sessions
+    opened by the parent must not be shared with (or closed by) the children,
+    so the registry remembers which pid built it and starts over, lazily,
+    the first time it is used from a different process.  The same goes for
+    the keeper thread, which does not survive a fork.
+    """
+
+    def __init__(self, create_client, close_client, keepalive_interval=0):
+        self.create_client = create_client
+        self.close_client = close_client
+        self.keepalive_interval = keepalive_interval or 0
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.pools = {}
+        self.retired = []
+        self.keeper = None
+
+    def _start_keeper(self):
+        if self.keepalive_interval <= 0 or self.keeper is not None:
+            return
+        with self.lock:
+            if self.keeper is None:
+                self.keeper = SessionKeeper(self, self.keepalive_interval)
+                self.keeper.start()
+
+    def stop(self):
+        keeper = self.keeper
+        self.keeper = None
+        if keeper is not None:
+            keeper.stop()
+        return keeper
+
+    def retire(self, pool, sessions):
+        with self.lock:
+            self.retired.extend((pool, s) for s in sessions)
+            keeper = self.keeper
+        if keeper is not None:
+            keeper.wakeup.set()
+        else:
+            # No keeper configured; close them the old, synchronous way.
+            self.close_retired()
+
+    def close_retired(self):
+        with self.lock:
+            retired, self.retired = self.retired, []
+        for pool, s in retired:
+            pool._close([s])
+
+    def maintain(self):
+        self.close_retired()
+        for pool in self.pools.values():
+            for s in pool.renew():
+                pool._close([s])
+
+    def close_all(self, timeout):
+        """Close every session in parallel, waiting at most timeout seconds.
+
+        Sessions whose logoff has not finished by then are abandoned; the
+        appliance expires them on its own.  Returns (closed, abandoned).
+        """
+
+        self.stop()
+        with self.lock:
+            sessions, self.retired = self.retired, []
+        for pool in self.all_pools():
+            sessions.extend((pool, s) for s in pool.drain())
+
+        closed = []
+
+        def close(pool, s):
+            try:
+                pool.close_client(s.client)
+                closed.append(s)
+            except Exception:
+                LOG.exception("A10Driver: error closing session on %s", pool.key)
+
+        threads = []
+        for pool, s in sessions:
+            t = threading.Thread(target=close, args=(pool, s))
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+        deadline = time.time() + timeout
+        for t in threads:
+            t.join(max(0, deadline - time.time()))
+
+        n_closed = len(closed)
+        n_abandoned = len(sessions) - n_closed
+        metrics.incr('sessions_closed', n_closed)
+        metrics.incr('sessions_abandoned', n_abandoned)
+        return (n_closed, n_abandoned)
+
+    def _check_pid(self):
+        if self.pid != os.getpid():
+            LOG.info("A10Driver: pid changed from %s to %s, dropping inherited "
+                     "session pools", self.pid, os.getpid())
+            self._reset()
+
+    def get_pool(self, device_info):
+        self._check_pid()
+        key = device_key(device_info)
+        pool = self.pools.get(key)
+        if pool is None:
+            with self.lock:
+                pool = self.pools.get(key)
+                if pool is None:
+                    pool = DeviceSessionPool(
+                        device_info, self.create_client, self.close_client,
+                        retire=self.retire,
+                        renew_margin=2 * self.keepalive_interval,
+                        maintained=self.keepalive_interval > 0)
+                    self.pools[key] = pool
+                    if self.keeper is not None:
+                        self.keeper.wakeup.set()
+        return pool
+
+    def checkout(self, device_info):
+        pool = self.get_pool(device_info)
+        self._start_keeper()
+        return pool.checkout()
+
+    def checkin(self, device_info, client, discard=False):
+        self._check_pid()
+        pool = self.pools.get(device_key(device_info))
+        if pool is not None:
+            pool.checkin(client, discard=discard)
+
+    def partition_deleted(self, device_info, name):
+        pool = self.pools.get(device_key(device_info))
+        if pool is not None:
+            pool.partition_deleted(name)
+
+    def all_pools(self):
+        self._check_pid()
+        return self.pools.values()
+
+    def stats(self):
+        return dict((p.key, p.stats()) for p in self.all_pools())
+
+    def breaker_states(self):
+        return dict((p.key, p.breaker.status()['state']) for p in self.all_pools())
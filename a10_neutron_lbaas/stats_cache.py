@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import threading
+import time
+
+from a10_neutron_lbaas import cache
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+class StatsCache(object):
+    """Appliance statistics, read at most once per ttl seconds per key.
+
+    A value younger than ttl is served from memory. For stale seconds
+    after that it is still served, while one background thread reads a
+    fresh one; older than that, the caller reads it. Callers that miss on
+    the same key wait for a single read. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, ttl, stale=0, max_size=10000):
+        self.ttl = ttl or 0
+        self.stale = stale or 0
+        self.max_size = max_size
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.entries = cache.LRUCache('a10_stats', self.max_size if self.ttl else 0,
+                                      ttl=self.ttl + self.stale)
+        self.loading = {}
+
+    @property
+    def enabled(self):
+        return bool(self.ttl and self.max_size)
+
+    def _load(self, key, read):
+        value = read()
+        # None means there was nothing to read; ask again next time.
+        if value is not None:
+            self.entries.set(key, (value, time.time()))
+        return value
+
+    def _done(self, key):
+        with self.lock:
+            done = self.loading.pop(key, None)
+        if done is not None:
+            done.set()
+
+    def _refresh(self, key, read):
+        with self.lock:
+            if key in self.loading:
+                return
+            self.loading[key] = threading.Event()
+
+        def run():
+            try:
+                self._load(key, read)
+            except Exception:
+                LOG.exception("A10Driver: stats refresh of %s failed", key)
+            finally:
+                self._done(key)
+
+        t = threading.Thread(target=run, name="a10-stats-refresh")
+        t.daemon = True
+        t.start()
+
+    def get(self, key, read):
+        """The stats for key, calling read() for them when needed.
+
+        read may be called from a background thread after the caller has
+        returned, so it must not use the caller's database session.
+        """
+
+        if not self.enabled:
+            return read()
+        if self.pid != os.getpid():
+            self._reset()
+
+        while True:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, read_at = entry
+                if time.time() - read_at > self.ttl:
+                    metrics.incr('stats_cache_stale')
+                    self._refresh(key, read)
+                return value
+
+            with self.lock:
+                done = self.loading.get(key)
+                if done is None:
+                    self.loading[key] = threading.Event()
+                    break
+            done.wait()
+
+        try:
+            return self._load(key, read)
+        finally:
+            self._done(key)
+
+    def invalidate(self, key=None):
+        self.entries.invalidate(key)
@@ -0,0 +1,177 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import threading
+import time
+
+from a10_neutron_lbaas import a10_context
+from a10_neutron_lbaas.acos import inventory
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+LOADBALANCER = 'loadbalancer'
+POOL = 'pool'
+MEMBER = 'member'
+
+# A partition not collected for this many intervals is no longer served,
+# so callers fall back to reading the appliance themselves.
+MAX_AGE_INTERVALS = 3
+
+
+def pool_stats(stats, members):
+    """The stats of a pool, as returned for it whether collected or read."""
+
+    return {
+        "stats": stats,
+        "members": dict(("%s:%s" % k, v) for k, v in members.items()),
+    }
+
+
+def collect_partition(client, device_cfg):
+    """The stats table of the partition active on client.
+
+    Virtual servers by name, service groups by name, and members by
+    (service group, server, port), from two aXAPI calls.
+    """
+
+    table = {LOADBALANCER: inventory.virtual_server_stats(client, device_cfg),
+             POOL: {}, MEMBER: {}}
+    for name, (stats, members) in inventory.service_group_stats(client, device_cfg).items():
+        table[POOL][name] = pool_stats(stats, members)
+        for (server, port), m in members.items():
+            table[MEMBER][(name, server, port)] = m
+    return table
+
+
+class DeviceStatsCollector(threading.Thread):
+    """Reads the stats of every partition of one appliance each interval."""
+
+    def __init__(self, driver, device_cfg, interval):
+        super(DeviceStatsCollector, self).__init__(
+            name="a10-stats-%s" % device_cfg['name'])
+        self.daemon = True
+        self.driver = driver
+        self.device_cfg = device_cfg
+        self.interval = interval
+        self.cond = threading.Condition(threading.Lock())
+        self.stopping = False
+        # partition name -> (time collected, table)
+        self.tables = {}
+
+    def get(self, partition_name, kind, key):
+        entry = self.tables.get(partition_name)
+        if entry is None or time.time() - entry[0] > MAX_AGE_INTERVALS * self.interval:
+            return None
+        return entry[1][kind].get(key)
+
+    def stop(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+
+    def collect(self):
+        d = self.device_cfg
+        with a10_context.partition_client(self.driver, d, 'shared') as client:
+            partitions = inventory.partition_names(client, d)
+
+        tables = {}
+        for p in partitions:
+            try:
+                with a10_context.partition_client(self.driver, d, p) as client:
+                    tables[p] = (time.time(), collect_partition(client, d))
+            except Exception:
+                LOG.exception("A10Driver: stats of partition %s on %s unavailable",
+                              p, d['name'])
+                metrics.incr('stats_collect_failures', device=d['name'])
+                if p in self.tables:
+                    tables[p] = self.tables[p]
+        # Partitions removed from the device drop out here.
+        self.tables = tables
+
+    def run(self):
+        while True:
+            try:
+                with metrics.timer('stats_collect_seconds', device=self.device_cfg['name']):
+                    self.collect()
+            except Exception:
+                LOG.exception("A10Driver: stats collection on %s failed",
+                              self.device_cfg['name'])
+                metrics.incr('stats_collect_failures', device=self.device_cfg['name'])
+            with self.cond:
+                if not self.stopping:
+                    self.cond.wait(self.interval)
+                if self.stopping:
+                    return
+
+
+class StatsCollector(object):
+    """Bulk stats of the devices with a stats_interval, for stats().
+
+    Each such device gets a background collector on first use; lookups
+    return None until it has data, and for devices without an interval.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.collectors = {}
+
+    def watch(self, device_cfg):
+        """Start collecting device_cfg's stats, unless already collecting."""
+
+        if self.pid != os.getpid():
+            self._reset()
+        name = device_cfg['name']
+        c = self.collectors.get(name)
+        if c is None:
+            with self.lock:
+                c = self.collectors.get(name)
+                if c is None:
+                    c = DeviceStatsCollector(self.driver, device_cfg,
+                                             device_cfg['stats_interval'])
+                    c.start()
+                    self.collectors[name] = c
+        return c
+
+    def get(self, device_cfg, partition_name, kind, key):
+        if not device_cfg.get('stats_interval', 0):
+            return None
+        return self.watch(device_cfg).get(partition_name, kind, key)
+
+    def tables(self):
+        """The latest stats tables, by (device name, partition name)."""
+
+        if self.pid != os.getpid():
+            return {}
+        tables = {}
+        for name, c in self.collectors.items():
+            for p, (collected_at, table) in c.tables.items():
+                tables[(name, p)] = table
+        return tables
+
+    def stop_all(self, timeout):
+        if self.pid != os.getpid():
+            return
+        with self.lock:
+            collectors, self.collectors = self.collectors.values(), {}
+        for c in collectors:
+            c.stop()
+        deadline = time.time() + timeout
+        for c in collectors:
+            c.join(max(0, deadline - time.time()))
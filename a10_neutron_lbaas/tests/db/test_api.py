@@ -0,0 +1,57 @@
+# Copyright 2015,  A10 Networks
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from a10_neutron_lbaas.db import api as db_api
+from a10_neutron_lbaas.tests import test_case
+
+
+class TestEngineCache(test_case.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.url = 'sqlite:///' + os.path.join(self.dir, 'a10.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_engine_is_cached_per_url(self):
+        e = db_api.get_engine(self.url)
+        self.assertIs(e, db_api.get_engine(self.url))
+        self.assertIsNot(e, db_api.get_engine(self.url + '2'))
+
+    def test_engine_is_not_shared_across_processes(self):
+        e = db_api.get_engine(self.url)
+        with mock.patch.object(db_api.os, 'getpid', return_value=-1):
+            self.assertIsNot(e, db_api.get_engine(self.url))
+
+    def test_memory_engines_are_not_cached(self):
+        self.assertIsNot(db_api.get_engine('sqlite://'),
+                         db_api.get_engine('sqlite://'))
+
+    def test_session_uses_url(self):
+        s = db_api.get_session(self.url)
+        self.assertIs(db_api.get_engine(self.url), s.get_bind())
+        s.close()
+
+    def test_scoped_session_is_per_thread(self):
+        registry = db_api.get_scoped_session(self.url)
+        self.assertIs(registry, db_api.get_scoped_session(self.url))
+        self.assertIs(registry(), registry())
+        registry.remove()
@@ -0,0 +1,72 @@
+# Copyright 2015,  A10 Networks
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import importlib
+
+from alembic import migration
+from alembic import operations
+import sqlalchemy as sa
+
+from a10_neutron_lbaas.db import api as db_api
+from a10_neutron_lbaas.tests import test_case
+
+VERSIONS = 'a10_neutron_lbaas.db.migration.alembic_migrations.versions.'
+
+
+def _migration(name):
+    return importlib.import_module(VERSIONS + name)
+
+
+class TestUniqueTenantBinding(test_case.TestCase):
+
+    def setUp(self):
+        self.connection = db_api.get_engine('sqlite://').connect()
+        self.context = migration.MigrationContext.configure(self.connection)
+        self.create = _migration('579f359e6e30_create_a10_tenant_table')
+        self.unique = _migration('3c7123f2aeba_unique_tenant_binding')
+        self.migrate(self.create.upgrade)
+
+    def tearDown(self):
+        self.connection.close()
+
+    def migrate(self, fn):
+        with operations.Operations.context(self.context):
+            fn()
+
+    def insert(self, id, tenant_id, device_name, day):
+        self.connection.execute(
+            "INSERT INTO a10_tenant_bindings (id, created_at, tenant_id, device_name) "
+            "VALUES (?, ?, ?, ?)",
+            (id, datetime.datetime(2016, 1, day), tenant_id, device_name))
+
+    def bindings(self):
+        return sorted(self.connection.execute(
+            "SELECT tenant_id, device_name FROM a10_tenant_bindings").fetchall())
+
+    def test_upgrade_keeps_oldest_binding(self):
+        self.insert('1', 't1', 'dev2', 2)
+        self.insert('2', 't1', 'dev1', 1)
+        self.insert('3', 't2', 'dev3', 1)
+        self.migrate(self.unique.upgrade)
+
+        self.assertEqual([('t1', 'dev1'), ('t2', 'dev3')], self.bindings())
+        self.assertRaises(sa.exc.IntegrityError, self.insert, '4', 't1', 'dev2', 3)
+
+    def test_downgrade(self):
+        self.migrate(self.unique.upgrade)
+        self.migrate(self.unique.downgrade)
+        self.insert('1', 't1', 'dev1', 1)
+        self.insert('2', 't1', 'dev2', 2)
+        self.assertEqual(2, len(self.bindings()))
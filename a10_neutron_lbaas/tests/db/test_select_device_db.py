@@ -13,6 +13,8 @@
 #    under the License.
 
 import acos_client
+import mock
+import sqlalchemy.orm
 
 from a10_neutron_lbaas.db import models
 import a10_neutron_lbaas.plumbing_hooks as hooks
@@ -75,3 +77,61 @@ class TestSelectDevice(test_base.UnitTestBase):
         db = self.open_session()
         d = h.select_device_db(TENANT_ID, db_session=db)
         self.assertEqual(d['name'], EXPECTED_DEV1)  # 1 is not a typo
+
+    def test_select_device_db_cached(self):
+        h = hooks.PlumbingHooks(None, devices=devices2)
+        db = self.open_session()
+        db.add(models.A10TenantBinding(tenant_id=TENANT_ID, device_name='dev3'))
+        db.commit()
+
+        d = h.select_device_db(TENANT_ID, db_session=self.open_session())
+        self.assertEqual(d['name'], 'dev3')
+
+        db = mock.Mock()
+        d = h.select_device_db(TENANT_ID, db_session=db)
+        self.assertEqual(d['name'], 'dev3')
+        self.assertFalse(db.query.called)
+
+        h.invalidate_binding(TENANT_ID)
+        d = h.select_device_db(TENANT_ID, db_session=self.open_session())
+        self.assertEqual(d['name'], 'dev3')
+        self.assertEqual(1, h.bindings.stats()['hits'])
+
+    def test_warm_bindings(self):
+        db = self.open_session()
+        for i in range(5):
+            db.add(models.A10TenantBinding(tenant_id='t%d' % i, device_name='dev%d' % (i + 1)))
+        db.add(models.A10TenantBinding(tenant_id='t9', device_name='gone'))
+        db.commit()
+
+        h = hooks.PlumbingHooks(None, devices=devices2)
+        loaded, missing = h.warm_bindings(db_session=self.open_session(), page_size=2)
+        self.assertEqual(6, loaded)
+        self.assertEqual({'gone': 1}, missing)
+
+        db = mock.Mock()
+        self.assertEqual('dev4', h.select_device_db('t3', db_session=db)['name'])
+        self.assertFalse(db.query.called)
+
+    def test_select_device_db_concurrent_insert(self):
+        db = self.open_session()
+        db.add(models.A10TenantBinding(tenant_id=TENANT_ID, device_name='dev3'))
+        db.commit()
+
+        # Simulate losing the race: the lookup ran before the other insert.
+        h = hooks.PlumbingHooks(None, devices=devices2)
+        one_or_none = sqlalchemy.orm.Query.one_or_none
+        lookups = []
+
+        def stale_lookup(query):
+            lookups.append(query)
+            if len(lookups) == 1:
+                return None
+            return one_or_none(query)
+
+        with mock.patch.object(sqlalchemy.orm.Query, 'one_or_none', stale_lookup):
+            d = h.select_device_db(TENANT_ID, db_session=self.open_session())
+        self.assertEqual(d['name'], 'dev3')
+
+        db = self.open_session()
+        self.assertEqual(1, db.query(models.A10TenantBinding).count())
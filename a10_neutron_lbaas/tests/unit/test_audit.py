@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.manage.audit as audit
+from a10_neutron_lbaas.manage import common
+from a10_neutron_lbaas.tests.unit.v2 import test_base
+import a10_neutron_lbaas.v2.handler_lb as handler_lb
+
+
+class TestAuditor(test_base.UnitTestBase):
+
+    def setUp(self):
+        super(TestAuditor, self).setUp()
+        self.lsi = self.a.config.get_device('ax-write')
+        self.adp = self.a.config.get_device('axadp-noalt')
+        self.a.config.get_devices = lambda: {'ax-write': self.lsi, 'axadp-noalt': self.adp}
+        self.clients = {'ax-write': mock.MagicMock(), 'axadp-noalt': mock.MagicMock()}
+        self.a._get_a10_client = mock.Mock(side_effect=lambda d: self.clients[d['name']])
+        self.a._release_a10_client = mock.Mock()
+        self.a.session_pool = mock.Mock()
+        self.a.write_coalescer = mock.Mock()
+        # Mock creates child attributes lazily and not thread safely.
+        self.a.write_coalescer.write
+        self.a._select_a10_device = mock.Mock(return_value=self.lsi)
+        self.a.neutron.member_get_ips.side_effect = lambda ctx, members, use_float: dict(
+            (m.address, m.address) for m in members)
+
+        self.member = test_base.FakeMember(address='10.0.0.1')
+        self.pool = test_base.FakePool('HTTP', 'ROUND_ROBIN', None,
+                                       members=[self.member], hm=test_base.FakeHM('HTTP'))
+        self.lb = test_base.FakeLoadBalancer()
+        self.lb.listeners = [test_base.FakeListener('HTTP', 80, pool=self.pool,
+                                                    loadbalancer=self.lb)]
+
+        server = self.a.member._get_name(self.member, '10.0.0.1')
+        lsi = self.clients['ax-write']
+        lsi.slb.virtual_server.all.return_value = {
+            'virtual_server_list': [{'name': self.lb.id}, {'name': 'orphan-vs'}]}
+        lsi.slb.service_group.all.return_value = {
+            'service_group_list': [{'name': self.pool.id, 'member_list': [
+                {'server': server, 'port': 80}, {'server': 'stray', 'port': 80}]}]}
+        lsi.slb.hm._get.return_value = {'health_monitor_list': []}
+
+        adp = self.clients['axadp-noalt']
+        adp.system.partition._get.return_value = {
+            'partition_list': [{'partition_name': 'tenant-x'}]}
+        adp.slb.virtual_server.all.return_value = {
+            'virtual_server_list': [{'name': 'old-vs'}]}
+
+        self.auditor = audit.Auditor(self.a, None, load_balancers=lambda ctx: [self.lb],
+                                     new_context=lambda: None)
+
+    def test_report(self):
+        report = self.auditor.audit()
+
+        self.assertEqual(['ax-write', 'axadp-noalt'], report['devices'])
+        self.assertEqual(2, report['partitions'])
+        self.assertEqual([('ax-write', 'shared', audit.HEALTH_MONITOR, 'fake-hm-id-001')],
+                         [(o['device'], o['partition'], o['type'], o['name'])
+                          for o in report['missing']])
+        self.assertEqual(
+            [('ax-write', audit.MEMBER, (self.pool.id, 'stray', 80)),
+             ('ax-write', audit.VIRTUAL_SERVER, 'orphan-vs'),
+             ('axadp-noalt', audit.VIRTUAL_SERVER, 'old-vs')],
+            [(o['device'], o['type'], o['name']) for o in report['orphaned']])
+        self.assertEqual([], report['errors'])
+        self.assertEqual({self.lb.id: self.lb}, self.auditor.drifted)
+        self.assertEqual([mock.call('shared'), mock.call('tenant-x')],
+                         self.clients['axadp-noalt'].system.partition.active.call_args_list)
+
+    def test_unreadable_partition_is_not_audited(self):
+        self.clients['ax-write'].slb.virtual_server.all.side_effect = Exception("down")
+        report = self.auditor.audit()
+
+        self.assertEqual(1, report['partitions'])
+        self.assertEqual([('ax-write', 'shared')],
+                         [(e['device'], e['partition']) for e in report['errors']])
+        self.assertEqual(1, report['unchecked_loadbalancers'])
+        self.assertEqual([], report['missing'])
+        self.assertEqual(['old-vs'], [o['name'] for o in report['orphaned']])
+
+    def test_unmapped_loadbalancer_claims_its_partition(self):
+        self.a.neutron.member_get_ips.side_effect = Exception("db")
+        report = self.auditor.audit()
+
+        self.assertEqual(1, report['unchecked_loadbalancers'])
+        self.assertEqual([('axadp-noalt', 'old-vs')],
+                         [(o['device'], o['name']) for o in report['orphaned']])
+        self.assertEqual({}, self.auditor.drifted)
+
+    def test_unknown_device_disables_orphans(self):
+        self.a._select_a10_device.side_effect = Exception("no binding")
+        report = self.auditor.audit()
+
+        self.assertEqual(1, report['unchecked_loadbalancers'])
+        self.assertEqual([], report['orphaned'])
+
+    def test_unreachable_device(self):
+        self.clients['axadp-noalt'].system.partition._get.side_effect = Exception("down")
+        report = self.auditor.audit()
+        self.assertEqual(['ax-write'], report['devices'])
+        self.assertEqual([{'device': 'axadp-noalt', 'error': 'down'}], report['errors'])
+
+    def test_fix(self):
+        report = self.auditor.audit()
+        with mock.patch.object(handler_lb.LoadbalancerHandler, 'refresh') as refresh:
+            result = self.auditor.fix(report, common.Throttle(0), delete_orphans=True)
+
+        refresh.assert_called_once_with(None, self.lb)
+        self.assertEqual({'refreshed': 1, 'deleted': 2, 'errors': []}, result)
+        self.clients['ax-write'].slb.virtual_server.delete.assert_called_once_with('orphan-vs')
+        self.clients['axadp-noalt'].slb.virtual_server.delete.assert_called_once_with('old-vs')
+        self.assertFalse(self.clients['ax-write'].slb.service_group.member.delete.called)
+        self.assertEqual(2, self.a.write_coalescer.write.call_count)
+
+    @mock.patch.object(audit, 'Auditor')
+    @mock.patch.object(audit, 'common')
+    def test_main_flushes_fix_writes(self, common, auditor):
+        auditor.return_value.audit.return_value = {
+            'missing': [], 'orphaned': [], 'errors': [], 'devices': [], 'loadbalancers': 0}
+        auditor.return_value.fix.return_value = {'errors': []}
+        with mock.patch.object(audit.sys, 'stdout'):
+            self.assertEqual(0, audit.main(['--fix']))
+        common.flush.assert_called_once_with(common.build_driver.return_value)
+
+    def test_fix_keeps_orphans_by_default(self):
+        report = self.auditor.audit()
+        with mock.patch.object(handler_lb.LoadbalancerHandler, 'refresh'):
+            result = self.auditor.fix(report, common.Throttle(0))
+        self.assertEqual(0, result['deleted'])
+        self.assertFalse(self.clients['ax-write'].slb.virtual_server.delete.called)
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.cache as cache
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestLRUCache(test_case.TestCase):
+
+    def test_get_set(self):
+        c = cache.LRUCache('t', 10)
+        self.assertIsNone(c.get('a'))
+        c.set('a', 1)
+        self.assertEqual(1, c.get('a'))
+        self.assertEqual({'size': 1, 'max_size': 10, 'hits': 1, 'misses': 1},
+                         c.stats())
+
+    def test_evicts_least_recently_used(self):
+        c = cache.LRUCache('t', 2)
+        c.set('a', 1)
+        c.set('b', 2)
+        c.get('a')
+        c.set('c', 3)
+        self.assertTrue('a' in c)
+        self.assertFalse('b' in c)
+        self.assertTrue('c' in c)
+
+    def test_ttl(self):
+        c = cache.LRUCache('t', 10, ttl=5)
+        with mock.patch.object(cache.time, 'time', return_value=100):
+            c.set('a', 1)
+        with mock.patch.object(cache.time, 'time', return_value=104):
+            self.assertEqual(1, c.get('a'))
+        with mock.patch.object(cache.time, 'time', return_value=106):
+            self.assertIsNone(c.get('a'))
+
+    def test_disabled(self):
+        c = cache.LRUCache('t', 0)
+        c.set('a', 1)
+        self.assertIsNone(c.get('a'))
+
+    def test_get_or_set(self):
+        c = cache.LRUCache('t', 10)
+        create = mock.Mock(return_value=1)
+        self.assertEqual(1, c.get_or_set('a', create))
+        self.assertEqual(1, c.get_or_set('a', create))
+        self.assertEqual(1, create.call_count)
+
+    def test_invalidate(self):
+        c = cache.LRUCache('t', 10)
+        c.set('a', 1)
+        c.set('b', 2)
+        c.invalidate('a')
+        self.assertEqual(1, len(c))
+        c.invalidate()
+        self.assertEqual(0, len(c))
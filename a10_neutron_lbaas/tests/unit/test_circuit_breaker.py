@@ -0,0 +1,56 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import a10_neutron_lbaas.circuit_breaker as cb
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestCircuitBreaker(test_case.TestCase):
+
+    def setUp(self):
+        self.b = cb.CircuitBreaker('ax1', failure_threshold=2, reset_timeout=5)
+
+    def test_opens_after_threshold(self):
+        self.b.failure()
+        self.assertEqual(cb.CLOSED, self.b.state)
+        self.assertTrue(self.b.allow())
+        self.b.failure()
+        self.assertEqual(cb.OPEN, self.b.state)
+        self.assertFalse(self.b.allow())
+        self.assertTrue(self.b.status()['retry_in'] > 0)
+
+    def test_half_open_allows_single_trial(self):
+        self.b.failure()
+        self.b.failure()
+        self.b.retry_at = 0
+        self.assertTrue(self.b.allow())
+        self.assertEqual(cb.HALF_OPEN, self.b.state)
+        self.assertFalse(self.b.allow())
+        self.b.success()
+        self.assertEqual(cb.CLOSED, self.b.state)
+        self.assertTrue(self.b.allow())
+
+    def test_failed_trial_reopens_for_longer(self):
+        self.b.failure()
+        self.b.failure()
+        first = self.b.retry_at
+        self.b.retry_at = 0
+        self.b.allow()
+        self.b.failure()
+        self.assertEqual(cb.OPEN, self.b.state)
+        self.assertEqual(2, self.b.trips)
+        self.assertTrue(self.b.retry_at > first - 5)
+
+    def test_backoff_is_bounded(self):
+        for attempt in range(10):
+            d = cb.backoff(attempt, 0.5, 4)
+            self.assertTrue(0 <= d <= 4)
@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import acos_client
+
+import a10_neutron_lbaas.consistent_hash as consistent_hash
+import a10_neutron_lbaas.tests.test_case as test_case
+
+TENANTS = ['tenant-%d' % i for i in range(2000)]
+
+
+def _devices(n, **weights):
+    return dict(('ax%d' % i, {'name': 'ax%d' % i, 'hash_weight': weights.get('ax%d' % i, 1)})
+                for i in range(1, n + 1))
+
+
+class TestHashRing(test_case.TestCase):
+
+    def test_legacy_hash_by_default(self):
+        h = consistent_hash.device_hash(_devices(3))
+        self.assertTrue(isinstance(h, acos_client.Hash))
+
+    def test_stable(self):
+        h = consistent_hash.device_hash(_devices(3), vnodes=50)
+        first = [h.get_server(t) for t in TENANTS[:10]]
+        self.assertEqual(first, [h.get_server(t) for t in TENANTS[:10]])
+        self.assertEqual(first, [consistent_hash.device_hash(_devices(3), vnodes=50)
+                                 .get_server(t) for t in TENANTS[:10]])
+
+    def test_adding_device_moves_few_tenants(self):
+        moved = consistent_hash.moved_tenants(_devices(4), _devices(5), TENANTS, vnodes=100)
+        # Ideal is 1/5 of the tenants, all of them onto the new device.
+        self.assertTrue(len(moved) < len(TENANTS) * 0.3)
+        self.assertEqual(set(['ax5']), set(new for old, new in moved.values()))
+
+    def test_weights(self):
+        h = consistent_hash.device_hash(_devices(2, ax2=3), vnodes=100)
+        n = len([t for t in TENANTS if h.get_server(t) == 'ax2'])
+        self.assertTrue(n > len(TENANTS) * 0.6)
+
+    def test_moves(self):
+        old = consistent_hash.device_hash(_devices(2), vnodes=10)
+        self.assertEqual({}, consistent_hash.moves(old, old, TENANTS))
@@ -0,0 +1,105 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.device_scheduler as device_scheduler
+import a10_neutron_lbaas.plumbing_hooks as plumbing_hooks
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+def _device(name, **kw):
+    d = {'name': name, 'v_method': 'LSI', 'api_version': '2.1', 'max_instance': 10}
+    d.update(kw)
+    return d
+
+
+class TestLeastLoadedScheduler(test_case.TestCase):
+
+    def setUp(self):
+        self.devices = {
+            'ax1': _device('ax1'),
+            'ax2': _device('ax2'),
+            'ax3': _device('ax3', max_instance=100, shared_partition='lsi'),
+        }
+        self.clients = {}
+        self.vs = {'ax1': 5, 'ax2': 2, 'ax3': 10}
+        self.driver = mock.Mock()
+        self.driver.config.get.return_value = 300
+        self.driver._get_a10_client.side_effect = self.client
+        self.s = device_scheduler.LeastLoadedScheduler(self.driver, self.devices)
+
+    def client(self, d):
+        c = mock.MagicMock()
+        c.slb.virtual_server.all.return_value = {
+            'virtual_server_list': [{}] * self.vs[d['name']]}
+        c.slb.service_group.all.return_value = {'service_group_list': []}
+        c.system.partition._get.return_value = {'partition_list': []}
+        self.clients[d['name']] = c
+        return c
+
+    def test_picks_least_loaded(self):
+        # ax3 has the most objects but the lowest utilization
+        self.assertEqual('ax3', self.s.select('t1')['name'])
+        self.assertEqual(3, self.driver._release_a10_client.call_count)
+
+    def test_skips_full_and_disabled_devices(self):
+        self.devices['ax3']['status'] = False
+        self.vs['ax2'] = 10
+        self.assertEqual('ax1', self.s.select('t1')['name'])
+
+    def test_reserves_capacity_until_refresh(self):
+        self.devices['ax3']['status'] = False
+        self.vs['ax1'] = 3
+        picks = [self.s.select('t%d' % i)['name'] for i in range(3)]
+        self.assertEqual(['ax2', 'ax1', 'ax2'], picks)
+        self.assertEqual(3, self.driver._get_a10_client.call_count)
+
+    def test_counts_in_shared_partition(self):
+        self.s.select('t1')
+        self.clients['ax1'].system.partition.active.assert_called_once_with('shared')
+        self.clients['ax3'].system.partition.active.assert_called_once_with('lsi')
+
+    def test_falls_back_to_hash(self):
+        self.vs = {'ax1': 10, 'ax2': 10, 'ax3': 100}
+        d = self.s.select('t1')
+        self.assertEqual(self.s.appliance_hash.get_server('t1'), d['name'])
+
+    def test_unreachable_device_is_skipped(self):
+        self.vs['ax3'] = None
+        self.assertEqual('ax2', self.s.select('t1')['name'])
+
+    def test_adp_uses_partitions(self):
+        self.devices = {'ax1': _device('ax1', v_method='ADP', max_partitions=2)}
+        s = device_scheduler.LeastLoadedScheduler(self.driver, self.devices)
+        self.vs = {'ax1': 0}
+        with mock.patch.object(s.inventory, '_count',
+                               return_value={'virtual_servers': 0, 'service_groups': 0,
+                                             'partitions': 2}):
+            d = s.select('t1')
+        self.assertEqual('ax1', d['name'])  # full, so hashed
+
+
+class TestGetScheduler(test_case.TestCase):
+
+    def test_named(self):
+        s = device_scheduler.get_scheduler('hash', None, {'ax1': _device('ax1')})
+        self.assertTrue(isinstance(s, device_scheduler.HashScheduler))
+
+    def test_dotted_path(self):
+        s = device_scheduler.get_scheduler(
+            'a10_neutron_lbaas.device_scheduler.HashScheduler', None, {'ax1': _device('ax1')})
+        self.assertEqual('ax1', s.select('t1')['name'])
+
+    def test_hooks_share_ring(self):
+        hooks = plumbing_hooks.PlumbingHooks(None, devices={'ax1': _device('ax1')})
+        self.assertTrue(hooks.scheduler.appliance_hash is hooks.appliance_hash)
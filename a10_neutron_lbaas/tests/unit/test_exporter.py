@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import urllib2
+
+import mock
+
+import a10_neutron_lbaas.exporter as exporter
+import a10_neutron_lbaas.metrics as metrics
+import a10_neutron_lbaas.stats_collector as stats_collector
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestExporter(test_case.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.driver = mock.Mock()
+        self.driver.session_pool.stats.return_value = {'10.0.0.1-443': {
+            'idle': 1, 'busy': 2, 'size': 3, 'max': 4, 'breaker': {'state': 'closed'}}}
+        self.driver.ha_sync_queue.lag.return_value = {('ax1', '10.0.0.2'): 1.5}
+        self.driver.stats_collector.tables.return_value = {('ax1', 'shared'): {
+            stats_collector.LOADBALANCER: {'vs1': {'bytes_in': 10, 'total_connections': 2}},
+            stats_collector.POOL: {'sg1': {'stats': {'curr-conn': 1, 'name': 'sg1'},
+                                           'members': {}}},
+            stats_collector.MEMBER: {('sg1', 's1', 80): {'cur_conns': 1, 'server': 's1'}},
+        }}
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_render(self):
+        metrics.incr('write_memory', device='ax1')
+        metrics.set_gauge('ha_sync_lag_seconds', 2, device='ax1', peer='10.0.0.2')
+        metrics.observe('axapi_seconds', 0.5, op='ha_sync', device='ax1')
+        metrics.set_gauge('circuit_breaker_open', 1, device='10.0.0.1-443')
+
+        lines = exporter.render(self.driver).splitlines()
+
+        for line in [
+                '# TYPE a10_write_memory_total counter',
+                'a10_write_memory_total{device="ax1"} 1',
+                'a10_ha_sync_lag_seconds{device="ax1",peer="10.0.0.2"} 2',
+                '# TYPE a10_axapi_seconds summary',
+                'a10_axapi_seconds_count{device="ax1",op="ha_sync"} 1',
+                'a10_axapi_seconds_sum{device="ax1",op="ha_sync"} 0.5',
+                'a10_session_pool_busy{device="10.0.0.1-443"} 2',
+                'a10_circuit_breaker_open{device="10.0.0.1-443"} 1',
+                'a10_ha_sync_pending_seconds{device="ax1",peer="10.0.0.2"} 1.5',
+                'a10_loadbalancer_bytes_in{device="ax1",name="vs1",partition="shared"} 10',
+                'a10_pool_curr_conn{device="ax1",name="sg1",partition="shared"} 1',
+                'a10_member_cur_conns{device="ax1",partition="shared",pool="sg1",'
+                'port="80",server="s1"} 1']:
+            self.assertIn(line, lines)
+        self.assertEqual(1, lines.count('# TYPE a10_loadbalancer_bytes_in untyped'))
+        self.assertEqual(1, len([l for l in lines if l.startswith('a10_circuit_breaker_open')]))
+        self.assertFalse([l for l in lines if 'a10_member_server' in l])
+
+    def test_escapes_label_values(self):
+        metrics.incr('x', device='a"b\\c\nd')
+        self.assertIn('a10_x_total{device="a\\"b\\\\c\\nd"} 1',
+                      exporter.render(self.driver).splitlines())
+
+    def test_failed_section_is_skipped(self):
+        self.driver.session_pool.stats.side_effect = Exception("boom")
+        text = exporter.render(self.driver)
+        self.assertNotIn('a10_session_pool', text)
+        self.assertIn('a10_loadbalancer_bytes_in', text)
+
+    def test_serves_metrics(self):
+        s = exporter.server(self.driver, '127.0.0.1', 0)
+        t = threading.Thread(target=s.serve_forever)
+        t.daemon = True
+        t.start()
+        try:
+            r = urllib2.urlopen('http://127.0.0.1:%d/metrics' % s.server_address[1])
+            self.assertEqual(exporter.CONTENT_TYPE, r.info()['Content-Type'])
+            self.assertIn('a10_session_pool_idle', r.read())
+        finally:
+            s.shutdown()
+            s.server_close()
+
+    def test_port_in_use(self):
+        s = exporter.server(self.driver, '127.0.0.1', 0)
+        try:
+            e = exporter.Exporter(self.driver, '127.0.0.1', s.server_address[1])
+            e.start()
+            self.assertIsNone(e.server)
+            self.assertTrue(e.tried)
+        finally:
+            s.server_close()
@@ -0,0 +1,79 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.ha_sync as ha_sync
+import a10_neutron_lbaas.metrics as metrics
+import a10_neutron_lbaas.tests.test_case as test_case
+
+HA = [{'ip': '1.1.1.1', 'username': 'admin', 'password': 'a10'},
+      {'ip': '1.1.1.2', 'username': 'admin', 'password': 'a10'}]
+
+
+class TestHASyncQueue(test_case.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.driver = mock.Mock()
+        self.client = self.driver._get_a10_client.return_value
+        self.q = ha_sync.HASyncQueue(self.driver)
+        self.request_client = mock.Mock()
+
+    def device(self, async_sync):
+        return {'name': 'ax1', 'ha_sync_list': HA, 'ha_sync_async': async_sync}
+
+    def test_sync_is_serial_by_default(self):
+        self.q.sync(self.device(False), self.request_client)
+        self.assertEqual(2, self.request_client.ha.sync.call_count)
+        self.assertEqual({}, self.q.workers)
+
+    def test_no_peers(self):
+        self.q.sync({'name': 'ax1', 'ha_sync_async': True}, self.request_client)
+        self.assertEqual({}, self.q.workers)
+
+    def test_async_syncs_each_peer(self):
+        d = self.device(True)
+        self.q.sync(d, self.request_client)
+        self.q.flush_all(5)
+        self.assertFalse(self.request_client.ha.sync.called)
+        peers = sorted(c[0][0] for c in self.client.ha.sync.call_args_list)
+        self.assertEqual(['1.1.1.1', '1.1.1.2'], peers)
+        self.assertEqual(2, self.driver._release_a10_client.call_count)
+        self.assertIsNotNone(metrics.get('ha_sync_lag_seconds', device='ax1', peer='1.1.1.1'))
+
+    def test_pending_requests_coalesce(self):
+        d = self.device(True)
+        w = ha_sync.PeerSyncWorker(self.driver, d, HA[0])
+        for i in range(5):
+            w.request()
+        self.assertEqual(4, metrics.get('ha_sync_coalesced', device='ax1', peer='1.1.1.1'))
+        w.start()
+        w.stop()
+        w.join(5)
+        self.client.ha.sync.assert_called_once_with('1.1.1.1', 'admin', 'a10')
+
+    def test_failed_sync_is_retried(self):
+        d = self.device(True)
+        self.client.ha.sync.side_effect = [Exception("busy"), None]
+        w = ha_sync.PeerSyncWorker(self.driver, d, HA[0])
+        with mock.patch.object(ha_sync.circuit_breaker, 'backoff', return_value=0):
+            w.request()
+            w.start()
+            for i in range(500):
+                if metrics.get('ha_sync', device='ax1', peer='1.1.1.1'):
+                    break
+                w.join(0.01)
+            w.stop()
+            w.join(5)
+        self.assertEqual(2, self.client.ha.sync.call_count)
+        self.assertEqual(0, w.lag())
@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+
+import a10_neutron_lbaas.handler_base as handler_base
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestMeta(test_case.TestCase):
+
+    def setUp(self):
+        self.h = handler_base.HandlerBase(mock.MagicMock())
+
+    def test_dict_and_attribute(self):
+        m = json.dumps({'a': 1})
+        self.assertEqual(1, self.h.meta({'a10_meta': m}, 'a', None))
+        self.assertEqual(1, self.h.meta(mock.Mock(a10_meta=m), 'a', None))
+        self.assertEqual(2, self.h.meta({'a10_meta': m}, 'b', 2))
+        self.assertEqual(3, self.h.meta({}, 'a', 3))
+        self.assertEqual(4, self.h.meta(object(), 'a', 4))
+
+    def test_invalid_json(self):
+        self.assertEqual(5, self.h.meta({'a10_meta': '{nope'}, 'a', 5))
+        self.assertEqual(5, self.h.meta({'a10_meta': '[1]'}, 'a', 5))
+        self.assertEqual(5, self.h.meta(mock.MagicMock(), 'a', 5))
+
+    def test_parsed_once_per_object(self):
+        obj = mock.Mock(a10_meta=json.dumps({'a': 1, 'b': 2}))
+        with mock.patch.object(handler_base.json, 'loads', wraps=json.loads) as loads:
+            self.assertEqual([1, 2, 1], [self.h.meta(obj, k, None) for k in 'aba'])
+            self.assertEqual(1, loads.call_count)
+
+            obj.a10_meta = json.dumps({'a': 3})
+            self.assertEqual(3, self.h.meta(obj, 'a', None))
+            self.assertEqual(2, loads.call_count)
+
+    def test_returned_values_are_copies(self):
+        obj = mock.Mock(a10_meta=json.dumps({'template': {'ports': [80]}}))
+        self.h.meta(obj, 'template', None)['ports'].append(443)
+        self.assertEqual({'ports': [80]}, self.h.meta(obj, 'template', None))
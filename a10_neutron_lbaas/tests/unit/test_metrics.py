@@ -0,0 +1,46 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import a10_neutron_lbaas.metrics as metrics
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestMetrics(test_case.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_counters_by_label(self):
+        metrics.incr('writes', device='ax1')
+        metrics.incr('writes', 2, device='ax1')
+        metrics.incr('writes', device='ax2')
+        self.assertEqual(3, metrics.get('writes', device='ax1'))
+        self.assertEqual(1, metrics.get('writes', device='ax2'))
+        self.assertEqual(None, metrics.get('writes'))
+
+    def test_gauge(self):
+        metrics.set_gauge('pool_size', 3, device='ax1')
+        metrics.set_gauge('pool_size', 1, device='ax1')
+        self.assertEqual(1, metrics.get('pool_size', device='ax1'))
+
+    def test_timer(self):
+        with metrics.timer('axapi_seconds', op='write'):
+            pass
+        count, total = metrics.get('axapi_seconds', op='write')
+        self.assertEqual(1, count)
+        self.assertTrue(total >= 0)
+        self.assertEqual(1, len(metrics.snapshot()['timings']))
+
+    def test_timed(self):
+        f = metrics.timed(lambda x, y=0: x + y, 'call_seconds', device='ax1')
+        self.assertEqual(3, f(1, y=2))
+        self.assertEqual(1, metrics.get('call_seconds', device='ax1')[0])
@@ -0,0 +1,208 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from a10_neutron_lbaas.db import models
+import a10_neutron_lbaas.manage.migrate as migrate
+from a10_neutron_lbaas.tests.db import session
+import a10_neutron_lbaas.tests.test_case as test_case
+
+DEVICES = {
+    'ax1': {'name': 'ax1', 'v_method': 'ADP'},
+    'ax2': {'name': 'ax2', 'v_method': 'LSI'},
+}
+
+
+def _obj(id, **kw):
+    o = mock.Mock(id=id)
+    for k, v in kw.items():
+        setattr(o, k, v)
+    return o
+
+
+def _lb():
+    hm = _obj('hm1')
+    pool = _obj('pool1', members=[_obj('m1'), _obj('m2')], healthmonitor=hm)
+    listener = _obj('l1', default_pool=pool)
+    return _obj('lb1', listeners=[listener], pools=[pool])
+
+
+class TestTenantOperations(test_case.TestCase):
+
+    def test_operations(self):
+        ops = migrate.tenant_operations([_lb()], 'create')
+        self.assertEqual(
+            [('loadbalancer', 'lb1'), ('listener', 'l1'), ('pool', 'pool1'),
+             ('member', 'm1'), ('member', 'm2'), ('hm', 'hm1')],
+            [(op[0], op[2].id) for op in ops])
+        self.assertEqual(set(['create']), set(op[1] for op in ops))
+
+
+class TestCheckpoint(test_case.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_resume(self):
+        c = migrate.Checkpoint(self.path)
+        c.record('t1', migrate.DONE, source='ax1')
+        c.record('t2', migrate.FAILED, error='boom')
+        with open(self.path, 'a') as f:
+            f.write('{"tenant_id": "t3", "sta')
+
+        c = migrate.Checkpoint(self.path)
+        self.assertTrue('t1' in c)
+        self.assertFalse('t2' in c)
+        self.assertFalse('t3' in c)
+
+    def test_bound_until_done(self):
+        c = migrate.Checkpoint(self.path)
+        c.record('t1', migrate.BOUND, source='ax1')
+        c.record('t2', migrate.BOUND, source='ax1')
+        c.record('t2', migrate.DONE, source='ax1')
+
+        c = migrate.Checkpoint(self.path)
+        self.assertEqual(['t1'], list(c.bound))
+        self.assertEqual('ax1', c.bound['t1']['source'])
+        self.assertFalse('t1' in c)
+
+
+class TestMigrator(test_case.TestCase):
+
+    def setUp(self):
+        self.open_session, self.close_session = session.fake_session()
+        p = mock.patch.object(migrate.db_api, 'get_session', self.open_session)
+        p.start()
+        self.addCleanup(p.stop)
+
+        self.driver = mock.Mock()
+        self.driver.config.get_device.side_effect = lambda name: DEVICES[name]
+        self.driver._select_a10_device.return_value = DEVICES['ax1']
+        self.driver.batch.return_value = []
+        self.lb = _lb()
+        self.new_context = mock.Mock(return_value='ctx')
+        self.m = migrate.Migrator(self.driver, 'ax2', migrate.Checkpoint(None),
+                                  load_balancers=lambda ctx, t: [self.lb],
+                                  new_context=self.new_context)
+
+    def tearDown(self):
+        self.close_session()
+
+    def binding(self, tenant_id):
+        return self.open_session().query(models.A10TenantBinding).filter_by(
+            tenant_id=tenant_id).one().device_name
+
+    def test_migrate(self):
+        status, info = self.m.migrate_tenant('tenant-1')
+        self.assertEqual(migrate.BOUND, status)
+        self.assertEqual('ax1', info['source'])
+        create, = self.driver.batch.call_args_list
+        self.assertEqual('ax2', create[1]['device_name'])
+        self.assertEqual('create', create[0][1][0][1])
+        self.assertEqual('ax2', self.binding('tenant-1'))
+        self.driver.hooks.invalidate_binding.assert_called_with('tenant-1')
+
+        self.assertEqual((migrate.DONE, info), self.m.remove_source('tenant-1', info))
+        create, delete = self.driver.batch.call_args_list
+        self.assertEqual('ax1', delete[1]['device_name'])
+        self.assertEqual('delete', delete[0][1][0][1])
+        self.driver.hooks.partition_delete.assert_called_with(
+            self.driver._get_a10_client.return_value, 'ctx', 'tenant-1')
+
+    def test_source_removed_after_binding_cache_expires(self):
+        self.m.set_binding = mock.Mock()
+        self.m.binding_delay = 300
+        with mock.patch.object(migrate.time, 'sleep') as sleep:
+            counts = self.m.run(['tenant-1'])
+        self.assertEqual({'done': 1, 'skipped': 0, 'failed': 0}, counts)
+        # Other threads may sleep too while time.sleep is patched.
+        self.assertTrue([c for c in sleep.call_args_list if 295 < c[0][0] <= 300])
+        self.assertEqual(2, self.driver.batch.call_count)
+        self.assertEqual({}, self.m.checkpoint.bound)
+
+    def test_resume_removes_source_after_binding(self):
+        self.m.checkpoint.record('tenant-1', migrate.BOUND, source='ax1', target='ax2',
+                                 bound_at=0)
+        self.driver._select_a10_device.return_value = DEVICES['ax2']
+
+        counts = self.m.run(['tenant-1'])
+        self.assertEqual({'done': 1, 'skipped': 0, 'failed': 0}, counts)
+        delete, = self.driver.batch.call_args_list
+        self.assertEqual('ax1', delete[1]['device_name'])
+        self.assertEqual('delete', delete[0][1][0][1])
+        self.assertTrue('tenant-1' in self.m.checkpoint)
+        self.assertEqual({}, self.m.checkpoint.bound)
+
+    def test_run_in_parallel(self):
+        self.m.set_binding = mock.Mock()
+        counts = self.m.run(['tenant-%d' % i for i in range(5)], workers=3)
+        self.assertEqual({'done': 5, 'skipped': 0, 'failed': 0}, counts)
+        self.assertEqual(5, len(self.m.set_binding.call_args_list))
+        # A context per tenant for the copy, and another for the removal.
+        self.assertEqual(10, len(self.new_context.call_args_list))
+        self.assertTrue('tenant-4' in self.m.checkpoint)
+
+    def test_failed_removal_is_resumed(self):
+        self.m.set_binding = mock.Mock()
+        self.driver.batch.side_effect = [[], Exception("down")]
+        self.assertEqual(1, self.m.run(['tenant-1'])['failed'])
+        self.assertEqual('ax1', self.m.checkpoint.bound['tenant-1']['source'])
+        self.assertFalse('tenant-1' in self.m.checkpoint)
+
+    def test_failed_copy_keeps_tenant_on_source(self):
+        self.driver.batch.return_value = [(None, Exception("boom"))]
+        counts = self.m.run(['tenant-1'])
+        self.assertEqual(1, counts['failed'])
+        self.assertEqual(1, self.driver.batch.call_count)
+        self.assertFalse(self.driver.hooks.invalidate_binding.called)
+        self.assertFalse('tenant-1' in self.m.checkpoint)
+
+    def test_skips_finished_and_local_tenants(self):
+        self.m.checkpoint.record('tenant-1', migrate.DONE)
+        self.driver._select_a10_device.return_value = DEVICES['ax2']
+        counts = self.m.run(['tenant-1', 'tenant-2'])
+        self.assertEqual({'done': 0, 'skipped': 1, 'failed': 0}, counts)
+        self.assertFalse(self.driver.batch.called)
+
+    def test_dry_run(self):
+        self.m.dry_run = True
+        self.assertEqual(1, self.m.run(['tenant-1'])['skipped'])
+        self.assertFalse(self.driver.batch.called)
+
+
+class TestMain(test_case.TestCase):
+
+    @mock.patch.object(migrate, 'common')
+    def test_refuses_unexpiring_binding_cache(self, common):
+        common.build_driver.return_value.config.get.side_effect = {
+            'use_database': True, 'tenant_binding_cache_size': 10000,
+            'tenant_binding_cache_ttl': 0}.get
+        self.assertRaises(SystemExit, migrate.main, ['--target', 'ax2', '--tenant', 't1'])
+        self.assertFalse(common.flush.called)
+
+    @mock.patch.object(migrate, 'Migrator')
+    @mock.patch.object(migrate, 'common')
+    def test_flushes_background_writes(self, common, migrator):
+        driver = common.build_driver.return_value
+        driver.config.get.side_effect = {'use_database': True}.get
+        migrator.return_value.run.return_value = {'done': 1, 'skipped': 0, 'failed': 0}
+        self.assertEqual(0, migrate.main(['--target', 'ax2', '--tenant', 't1']))
+        common.flush.assert_called_once_with(driver)
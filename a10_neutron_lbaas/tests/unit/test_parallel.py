@@ -0,0 +1,55 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import a10_neutron_lbaas.parallel as parallel
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+class TestParallel(test_case.TestCase):
+
+    def test_results_in_order(self):
+        results = parallel.run(lambda x: x * 2, [3, 1, 2], 2)
+        self.assertEqual([(6, None), (2, None), (4, None)], results)
+
+    def test_failures_do_not_stop_others(self):
+        def fn(x):
+            if x == 1:
+                raise ValueError(x)
+            return x
+
+        results = parallel.run(fn, [0, 1, 2], 3)
+        self.assertEqual((0, None), results[0])
+        self.assertTrue(isinstance(results[1][1], ValueError))
+        self.assertEqual((2, None), results[2])
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def fn(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        parallel.run(fn, range(12), 3)
+        self.assertTrue(1 < running[1] <= 3)
+
+    def test_serial_runs_inline(self):
+        threads = parallel.run(lambda x: threading.current_thread(), [1, 2], 1)
+        self.assertEqual([threading.current_thread()] * 2, [t for t, e in threads])
+        self.assertEqual([], parallel.run(lambda x: x, [], 4))
@@ -0,0 +1,93 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+
+import a10_neutron_lbaas.consistent_hash as consistent_hash
+import a10_neutron_lbaas.manage.rehash as rehash
+import a10_neutron_lbaas.tests.test_case as test_case
+
+TENANTS = ['tenant-%d' % i for i in range(200)]
+
+
+def _devices(n):
+    return dict(('ax%d' % i, {'name': 'ax%d' % i}) for i in range(1, n + 1))
+
+
+def _config(devices, **opts):
+    c = mock.Mock()
+    c.get_devices.return_value = devices
+    c.get.side_effect = opts.get
+    return c
+
+
+class TestReport(test_case.TestCase):
+
+    def test_report(self):
+        old = consistent_hash.device_hash(_devices(2), vnodes=10)
+        new = consistent_hash.device_hash(_devices(3), vnodes=10)
+        moved = consistent_hash.moves(old, new, TENANTS)
+        t = sorted(moved)[0]
+
+        r = rehash.report(old, new, TENANTS, bound={t: moved[t][0]})
+
+        self.assertEqual(len(TENANTS), r['tenants'])
+        self.assertEqual(set(moved), set(r['moved']))
+        self.assertEqual({'from': moved[t][0], 'to': moved[t][1], 'bound': True},
+                         r['moved'][t])
+        self.assertEqual(1, len([m for m in r['moved'].values() if m['bound']]))
+
+
+class TestMain(test_case.TestCase):
+
+    def test_needs_a_proposal(self):
+        self.assertRaises(SystemExit, rehash.main, ['--tenant', 't1'])
+
+    @mock.patch.object(rehash, 'common')
+    @mock.patch.object(rehash, 'a10_config')
+    def test_new_config(self, a10_config, common):
+        configs = {None: _config(_devices(2), hash_ring_vnodes=10),
+                   'config_new': _config(_devices(3), hash_ring_vnodes=10)}
+        a10_config.A10Config.side_effect = lambda config_name=None: configs[config_name]
+        out = mock.Mock()
+
+        with mock.patch.object(rehash.sys, 'stdout', out):
+            self.assertEqual(0, rehash.main(['--new-config', 'config_new'] +
+                                            sum([['--tenant', t] for t in TENANTS], [])))
+
+        r = json.loads(''.join(c[0][0] for c in out.write.call_args_list))
+        expected = consistent_hash.moved_tenants(_devices(2), _devices(3), TENANTS, vnodes=10)
+        self.assertEqual(expected, dict((t, (m['from'], m['to']))
+                                        for t, m in r['moved'].items()))
+        self.assertFalse(common.init_neutron.called)
+
+    @mock.patch.object(rehash, 'bindings')
+    @mock.patch.object(rehash, 'known_tenants')
+    @mock.patch.object(rehash, 'common')
+    @mock.patch.object(rehash, 'a10_config')
+    def test_known_and_bound_tenants(self, a10_config, common, known_tenants, bindings):
+        a10_config.A10Config.return_value = _config(_devices(3), use_database=True)
+        known_tenants.return_value = TENANTS[:100]
+        bindings.return_value = dict((t, 'ax1') for t in TENANTS[50:200])
+        out = mock.Mock()
+
+        with mock.patch.object(rehash.sys, 'stdout', out):
+            rehash.main(['--vnodes', '100'])
+
+        r = json.loads(''.join(c[0][0] for c in out.write.call_args_list))
+        self.assertEqual(200, r['tenants'])
+        self.assertTrue(r['moved'])
+        self.assertEqual(set(t for t in r['moved'] if t in TENANTS[50:200]),
+                         set(t for t, m in r['moved'].items() if m['bound']))
+        self.assertTrue(common.init_neutron.called)
@@ -0,0 +1,197 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+import mock
+
+import a10_neutron_lbaas.a10_exceptions as a10_ex
+import a10_neutron_lbaas.session_pool as session_pool
+import a10_neutron_lbaas.tests.test_case as test_case
+
+DEVICE = {
+    'host': '10.10.100.20',
+    'port': 443,
+    'session_pool_min': 1,
+    'session_pool_max': 2,
+}
+
+
+class TestSessionPool(test_case.TestCase):
+
+    def setUp(self):
+        self.create = mock.Mock(side_effect=lambda d: mock.MagicMock())
+        self.close = mock.Mock()
+        self.pool = session_pool.SessionPool(self.create, self.close)
+
+    def test_checkout_reuses_session(self):
+        c1 = self.pool.checkout(DEVICE)
+        self.pool.checkin(DEVICE, c1)
+        c2 = self.pool.checkout(DEVICE)
+        self.assertIs(c1, c2)
+        self.assertEqual(1, self.create.call_count)
+
+    def test_concurrent_checkouts_get_distinct_sessions(self):
+        c1 = self.pool.checkout(DEVICE)
+        c2 = self.pool.checkout(DEVICE)
+        self.assertIsNot(c1, c2)
+        self.assertEqual(2, self.pool.stats()['10.10.100.20-443']['busy'])
+
+    def test_min_size_primes_pool(self):
+        d = dict(DEVICE, session_pool_min=2, session_pool_max=3)
+        self.pool.checkout(d)
+        self.assertEqual(2, self.create.call_count)
+        self.assertEqual(1, self.pool.stats()['10.10.100.20-443']['idle'])
+
+    def test_exhausted_pool_opens_overflow_session(self):
+        d = dict(DEVICE, session_pool_max=1)
+        self.pool.checkout(d)
+        with mock.patch.object(session_pool, 'CHECKOUT_TIMEOUT', 0):
+            c2 = self.pool.checkout(d)
+        self.pool.checkin(d, c2)
+        self.close.assert_called_once_with(c2)
+
+    def test_expired_session_replaced(self):
+        c1 = self.pool.checkout(DEVICE)
+        self.pool.checkin(DEVICE, c1)
+        pool = self.pool.get_pool(DEVICE)
+        pool.idle[0].created -= session_pool.MAX_SESSION_AGE + 1
+        c2 = self.pool.checkout(DEVICE)
+        self.assertIsNot(c1, c2)
+        self.close.assert_called_once_with(c1)
+
+    def test_discard_closes_session(self):
+        c1 = self.pool.checkout(DEVICE)
+        self.pool.checkin(DEVICE, c1, discard=True)
+        self.close.assert_called_once_with(c1)
+        self.assertEqual(0, self.pool.stats()['10.10.100.20-443']['size'])
+
+    def test_failed_create_raises(self):
+        self.create.side_effect = lambda d: None
+        self.assertRaises(a10_ex.DeviceSessionUnavailable,
+                          self.pool.checkout, DEVICE)
+        self.assertEqual(0, self.pool.stats()['10.10.100.20-443']['size'])
+
+    def test_forked_child_builds_new_pool(self):
+        c1 = self.pool.checkout(DEVICE)
+        self.pool.checkin(DEVICE, c1)
+        self.pool.pid = -1
+        c2 = self.pool.checkout(DEVICE)
+        self.assertIsNot(c1, c2)
+        self.assertFalse(self.close.called)
+
+    def test_breaker_fails_fast(self):
+        self.create.side_effect = lambda d: None
+        d = dict(DEVICE, circuit_breaker_threshold=2)
+        for i in range(2):
+            self.assertRaises(a10_ex.DeviceSessionUnavailable,
+                              self.pool.checkout, d)
+        self.assertEqual(2, self.create.call_count)
+        self.assertRaises(a10_ex.DeviceSessionUnavailable,
+                          self.pool.checkout, d)
+        self.assertEqual(2, self.create.call_count)
+        self.assertEqual({'10.10.100.20-443': 'open'}, self.pool.breaker_states())
+
+    def test_partition_deleted(self):
+        c1 = self.pool.checkout(DEVICE)
+        c2 = self.pool.checkout(DEVICE)
+        c1.current_partition = 'p1'
+        c2.current_partition = 'p2'
+        self.pool.partition_deleted(DEVICE, 'p1')
+        self.assertEqual(None, c1.current_partition)
+        self.assertEqual('p2', c2.current_partition)
+
+
+class TestSessionKeeper(test_case.TestCase):
+
+    def setUp(self):
+        self.create = mock.Mock(side_effect=lambda d: mock.MagicMock())
+        self.close = mock.Mock()
+        self.pool = session_pool.SessionPool(self.create, self.close,
+                                             keepalive_interval=10)
+        self.device = dict(DEVICE, session_pool_min=2, session_pool_max=3)
+
+    def tearDown(self):
+        self.pool.stop()
+
+    def _checkout(self):
+        with mock.patch.object(session_pool.SessionKeeper, 'start'):
+            return self.pool.checkout(self.device)
+
+    def test_checkout_does_not_prime(self):
+        self._checkout()
+        self.assertEqual(1, self.create.call_count)
+        self.assertTrue(self.pool.keeper is not None)
+
+    def test_maintain_tops_up_pool(self):
+        self._checkout()
+        self.pool.maintain()
+        self.assertEqual(2, self.create.call_count)
+        self.assertEqual(1, self.pool.stats()['10.10.100.20-443']['idle'])
+
+    def test_maintain_renews_stale_sessions(self):
+        c1 = self._checkout()
+        self.pool.checkin(self.device, c1)
+        pool = self.pool.get_pool(self.device)
+        pool.idle[0].created -= pool.renew_age
+        self.pool.maintain()
+        self.close.assert_called_once_with(c1)
+        self.assertEqual(2, pool.stats()['idle'])
+        self.assertTrue(c1 not in [x.client for x in pool.idle])
+
+    def test_expired_checkin_closed_by_keeper(self):
+        c1 = self._checkout()
+        pool = self.pool.get_pool(self.device)
+        pool.busy[id(c1)].created -= pool.max_age
+        self.pool.checkin(self.device, c1)
+        self.assertFalse(self.close.called)
+        self.pool.close_retired()
+        self.close.assert_called_once_with(c1)
+
+
+class TestSessionPoolShutdown(test_case.TestCase):
+
+    def setUp(self):
+        self.create = mock.Mock(side_effect=lambda d: mock.MagicMock())
+        self.close = mock.Mock()
+        self.pool = session_pool.SessionPool(self.create, self.close)
+
+    def test_close_all(self):
+        c1 = self.pool.checkout(DEVICE)
+        c2 = self.pool.checkout(DEVICE)
+        self.pool.checkin(DEVICE, c2)
+        self.assertEqual((2, 0), self.pool.close_all(5))
+        self.assertEqual(2, self.close.call_count)
+        self.assertEqual(0, self.pool.stats()['10.10.100.20-443']['size'])
+        self.pool.checkin(DEVICE, c1)
+
+    def test_close_all_abandons_slow_sessions(self):
+        release = threading.Event()
+        done = threading.Event()
+
+        def slow_close(c):
+            release.wait(5)
+            done.set()
+
+        self.close.side_effect = slow_close
+        self.pool.checkout(DEVICE)
+        start = time.time()
+        self.assertEqual((0, 1), self.pool.close_all(0.1))
+        self.assertTrue(time.time() - start < 2)
+        release.set()
+        done.wait(5)
+
+    def test_close_all_counts_failures_as_abandoned(self):
+        self.close.side_effect = Exception("boom")
+        self.pool.checkout(DEVICE)
+        self.assertEqual((0, 1), self.pool.close_all(5))
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+
+import a10_neutron_lbaas.stats_cache as stats_cache
+import a10_neutron_lbaas.tests.test_case as test_case
+
+
+def _at(t):
+    return mock.patch.object(stats_cache.time, 'time', return_value=t)
+
+
+class TestStatsCache(test_case.TestCase):
+
+    def setUp(self):
+        self.c = stats_cache.StatsCache(10, stale=20)
+        self.read = mock.Mock(side_effect=[1, 2, 3])
+
+    def wait_refresh(self):
+        with self.c.lock:
+            done = self.c.loading.get('k')
+        if done is not None:
+            done.wait(5)
+
+    def test_disabled(self):
+        c = stats_cache.StatsCache(0)
+        self.assertFalse(c.enabled)
+        self.assertEqual(1, c.get('k', self.read))
+        self.assertEqual(2, c.get('k', self.read))
+
+    def test_fresh_entry_is_served_from_memory(self):
+        with _at(100):
+            self.assertEqual(1, self.c.get('k', self.read))
+        with _at(109):
+            self.assertEqual(1, self.c.get('k', self.read))
+        self.assertEqual(1, self.read.call_count)
+
+    def test_stale_entry_is_served_while_refreshed(self):
+        with _at(100):
+            self.c.get('k', self.read)
+        with _at(115):
+            self.assertEqual(1, self.c.get('k', self.read))
+            self.wait_refresh()
+            self.assertEqual(2, self.c.get('k', self.read))
+        self.assertEqual(2, self.read.call_count)
+
+    def test_expired_entry_is_read_by_caller(self):
+        with _at(100):
+            self.c.get('k', self.read)
+        with _at(131):
+            self.assertEqual(2, self.c.get('k', self.read))
+
+    def test_none_is_not_cached(self):
+        read = mock.Mock(side_effect=[None, 1])
+        self.assertIsNone(self.c.get('k', read))
+        self.assertEqual(1, self.c.get('k', read))
+
+    def test_failed_refresh_keeps_entry(self):
+        self.read.side_effect = [1, Exception("down")]
+        with _at(100):
+            self.c.get('k', self.read)
+        with _at(115):
+            self.c.get('k', self.read)
+            self.wait_refresh()
+            self.assertEqual(1, self.c.get('k', self.read))
+
+    def test_concurrent_misses_read_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def read():
+            started.set()
+            release.wait(5)
+            return 'v'
+
+        reader = mock.Mock(side_effect=read)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.c.get('k', reader)))
+                   for i in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(['v', 'v', 'v'], results)
+        self.assertEqual(1, reader.call_count)
@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.stats_collector as stats_collector
+import a10_neutron_lbaas.tests.test_case as test_case
+
+V21 = {'name': 'ax21', 'api_version': '2.1', 'v_method': 'LSI', 'stats_interval': 10}
+V30 = {'name': 'ax30', 'api_version': '3.0', 'v_method': 'ADP', 'stats_interval': 10}
+
+
+class TestCollectPartition(test_case.TestCase):
+
+    def test_v21(self):
+        client = mock.MagicMock()
+        client.slb.virtual_server.all_stats.return_value = {'virtual_server_stat_list': [
+            {'name': 'vs1', 'req_bytes': 1, 'resp_bytes': 2, 'cur_conns': 3, 'tot_conns': 4}]}
+        client.slb.service_group._get.return_value = {'service_group_stat_list': [
+            {'name': 'sg1', 'cur_conns': 5, 'member_stat_list': [
+                {'server': 's1', 'port': 80, 'cur_conns': 5}]}]}
+
+        table = stats_collector.collect_partition(client, V21)
+
+        self.assertEqual({'bytes_in': 1, 'bytes_out': 2, 'active_connections': 3,
+                          'total_connections': 4},
+                         table[stats_collector.LOADBALANCER]['vs1'])
+        self.assertEqual({'cur_conns': 5, 'name': 'sg1'},
+                         table[stats_collector.POOL]['sg1']['stats'])
+        self.assertEqual(5, table[stats_collector.MEMBER][('sg1', 's1', 80)]['cur_conns'])
+        client.slb.service_group._get.assert_called_once_with(
+            'slb.service_group.fetchAllStatistics')
+
+    def test_v30(self):
+        client = mock.MagicMock()
+        client.slb.virtual_server.url_prefix = '/slb/virtual-server/'
+        client.slb.virtual_server._get.return_value = {'virtual-server-list': [
+            {'name': 'vs1', 'stats': {'curr_conn': 3, 'total_conn': 4}}]}
+        client.slb.service_group.url_prefix = '/slb/service-group/'
+        client.slb.service_group._get.return_value = {'service-group-list': [
+            {'name': 'sg1', 'stats': {'curr_conn': 5}, 'member-list': [
+                {'name': 's1', 'port': 80, 'stats': {'curr_conn': 5}}]}]}
+
+        table = stats_collector.collect_partition(client, V30)
+
+        self.assertEqual({'bytes_in': 0, 'bytes_out': 0, 'active_connections': 3,
+                          'total_connections': 4},
+                         table[stats_collector.LOADBALANCER]['vs1'])
+        self.assertEqual({'stats': {'curr_conn': 5}, 'members': {'s1:80': {'curr_conn': 5}}},
+                         table[stats_collector.POOL]['sg1'])
+        client.slb.virtual_server._get.assert_called_once_with('/slb/virtual-server/stats')
+
+
+class TestStatsCollector(test_case.TestCase):
+
+    def setUp(self):
+        self.driver = mock.Mock()
+        self.client = self.driver._get_a10_client.return_value
+        self.client.system.partition.all.return_value = {'partition-all': {'oper': {
+            'partition-list': [{'partition-name': 'p1'}, {'partition-name': 'p2'}]}}}
+        self.client.slb.virtual_server.url_prefix = '/slb/virtual-server/'
+        self.client.slb.virtual_server._get.return_value = {'virtual-server-list': [
+            {'name': 'vs1', 'stats': {'curr_conn': 3}}]}
+        self.client.slb.service_group.url_prefix = '/slb/service-group/'
+        self.client.slb.service_group._get.return_value = {}
+        self.c = stats_collector.DeviceStatsCollector(self.driver, V30, 10)
+
+    def test_collect(self):
+        with mock.patch.object(stats_collector.time, 'time', return_value=100):
+            self.c.collect()
+            self.assertEqual(3, self.c.get('p2', stats_collector.LOADBALANCER,
+                                           'vs1')['active_connections'])
+            self.assertIsNone(self.c.get('p2', stats_collector.LOADBALANCER, 'vs2'))
+            self.assertIsNone(self.c.get('p3', stats_collector.LOADBALANCER, 'vs1'))
+        self.assertEqual([mock.call('shared'), mock.call('p1'), mock.call('p2')],
+                         self.client.system.partition.active.call_args_list)
+
+    def test_failed_partition_keeps_old_stats_for_a_while(self):
+        with mock.patch.object(stats_collector.time, 'time', return_value=100):
+            self.c.collect()
+        self.client.slb.virtual_server._get.side_effect = Exception("down")
+        with mock.patch.object(stats_collector.time, 'time', return_value=110):
+            self.c.collect()
+            self.assertIsNotNone(self.c.get('p1', stats_collector.LOADBALANCER, 'vs1'))
+        with mock.patch.object(stats_collector.time, 'time', return_value=131):
+            self.assertIsNone(self.c.get('p1', stats_collector.LOADBALANCER, 'vs1'))
+
+    def test_device_without_interval(self):
+        collector = stats_collector.StatsCollector(self.driver)
+        self.assertIsNone(collector.get(dict(V30, stats_interval=0), 'p1',
+                                        stats_collector.LOADBALANCER, 'vs1'))
+        self.assertEqual({}, collector.collectors)
+
+    def test_stop_all(self):
+        collector = stats_collector.StatsCollector(self.driver)
+        collector.get(V30, 'p1', stats_collector.LOADBALANCER, 'vs1')
+        c = collector.collectors['ax30']
+        collector.stop_all(5)
+        self.assertFalse(c.is_alive())
@@ -0,0 +1,93 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import acos_client
+import acos_client.errors as acos_errors
+import mock
+
+import a10_neutron_lbaas.ha_sync as ha_sync
+import a10_neutron_lbaas.tests.test_case as test_case
+import a10_neutron_lbaas.write_memory as write_memory
+
+HA = [{'ip': '1.1.1.1', 'username': 'admin', 'password': 'a10'}]
+
+
+class TestWriteMemoryCoalescer(test_case.TestCase):
+
+    def setUp(self):
+        self.driver = mock.Mock()
+        self.driver.ha_sync_queue = ha_sync.HASyncQueue(self.driver)
+        self.client = self.driver._get_a10_client.return_value
+        self.w = write_memory.WriteMemoryCoalescer(self.driver)
+        self.request_client = mock.Mock()
+
+    def device(self, window):
+        return {'name': 'ax1', 'write_memory_window': window, 'ha_sync_list': HA}
+
+    def test_no_window_writes_synchronously(self):
+        self.w.write(self.device(0), self.request_client, 'p1')
+        self.request_client.system.action.activate_and_write.assert_called_once_with('p1')
+        self.request_client.ha.sync.assert_called_once_with('1.1.1.1', 'admin', 'a10')
+        self.assertEqual({}, self.w.flushers)
+
+    def test_sync_write_bypasses_window(self):
+        self.w.write(self.device(30), self.request_client, 'p1', sync=True)
+        self.request_client.system.action.activate_and_write.assert_called_once_with('p1')
+
+    def test_writes_coalesce_per_partition(self):
+        d = self.device(30)
+        for p in ['p1', 'p1', 'p2', 'p1']:
+            self.w.write(d, self.request_client, p)
+        self.assertFalse(self.request_client.system.action.activate_and_write.called)
+
+        self.w.flush_all(5)
+        calls = self.client.system.action.activate_and_write.call_args_list
+        self.assertEqual(['p1', 'p2'], sorted(c[0][0] for c in calls))
+        self.client.ha.sync.assert_called_once_with('1.1.1.1', 'admin', 'a10')
+        self.driver._release_a10_client.assert_called_once_with(d, self.client)
+
+    def test_forget_drops_pending_write(self):
+        d = self.device(30)
+        self.w.write(d, self.request_client, 'p1')
+        self.w.forget(d, 'p1')
+        self.w.write(d, self.request_client, None)
+        self.w.flush_all(5)
+        self.client.system.action.activate_and_write.assert_called_once_with(None)
+
+    def test_flusher_activates_partition_v30(self):
+        client = acos_client.Client('10.0.0.1', '3.0', 'admin', 'a10')
+        client.http = mock.Mock()
+        client.session = mock.Mock(id='s1')
+        client.current_partition = 'p2'
+        self.driver._get_a10_client.return_value = client
+
+        self.w.write(self.device(30), self.request_client, 'p1')
+        self.w.flush_all(5)
+
+        urls = [c[0][1] for c in client.http.request.call_args_list]
+        self.assertEqual(['/axapi/v3/active-partition/p1', '/axapi/v3/write/memory/'],
+                         urls[:2])
+
+    def test_flusher_skips_deleted_partition(self):
+        self.client.system.partition.active.side_effect = acos_errors.NotFound()
+        self.w.write(self.device(30), self.request_client, 'p1')
+        self.w.flush_all(5)
+        self.assertFalse(self.client.system.action.activate_and_write.called)
+
+    def test_failed_write_is_retried(self):
+        d = self.device(30)
+        self.client.system.action.activate_and_write.side_effect = Exception("busy")
+        self.w.write(d, self.request_client, 'p1')
+        self.w.flush_all(5)
+        self.assertEqual(write_memory.MAX_ATTEMPTS,
+                         self.client.system.action.activate_and_write.call_count)
+        self.assertFalse(self.client.ha.sync.called)
@@ -13,6 +13,7 @@
 #    under the License.
 
 import a10_neutron_lbaas.v2.v2_context as a10
+import acos_client.errors as acos_errors
 import mock
 import test_base
 
@@ -153,3 +154,33 @@ class TestA10ContextADP(TestA10Context):
         self.assertEqual(0, len(self.a.openstack_driver.mock_calls))
         self.assertEqual(2, len(self.a.last_client.mock_calls))
         self.a.last_client.session.close.assert_called_with()
+
+
+class TestA10ContextPartition(test_base.UnitTestBase):
+
+    def setUp(self):
+        super(TestA10ContextPartition, self).setUp()
+        self.handler = self.a.pool
+        self.ctx = mock.Mock()
+        self.m = test_base.FakeLoadBalancer()
+        self.sessions = mock.Mock()
+        self.a.session_pool = self.sessions
+
+    def test_activates_partition(self):
+        with a10.A10Context(self.handler, self.ctx, self.m,
+                            device_name='axadp-noalt') as c:
+            c
+        name = self.m.tenant_id[0:13]
+        self.a.last_client.system.partition.active.assert_called_once_with(name)
+        self.assertFalse(self.sessions.partition_deleted.called)
+
+    def test_missing_partition_is_created(self):
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        client = self.a._get_a10_client.return_value
+        client.system.partition.active.side_effect = [acos_errors.NotFound(), None]
+        with a10.A10Context(self.handler, self.ctx, self.m,
+                            device_name='axadp-noalt') as c:
+            c
+        name = self.m.tenant_id[0:13]
+        self.sessions.partition_deleted.assert_called_once_with(c.device_cfg, name)
+        self.assertEqual(2, client.system.partition.active.call_count)
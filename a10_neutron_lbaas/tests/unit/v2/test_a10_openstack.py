@@ -12,6 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
+import mock
+
+import a10_neutron_lbaas.a10_openstack_lb as a10_os
+import a10_neutron_lbaas.metrics as metrics
 import test_base
 
 
@@ -27,3 +33,32 @@ class TestA10Openstack(test_base.UnitTestBase):
 
     def test_verify(self):
         self.a._verify_appliances()
+
+    def test_axapi_requests_are_timed(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        d = self.a.config.get_device('ax-write')
+        with mock.patch.object(a10_os.acos_client, 'Client'):
+            client = self.a._create_new_acos_client(d)
+        client.http.request('GET', '/axapi/v3/slb/virtual-server/')
+        self.assertEqual(1, metrics.get('axapi_request_seconds', device=d['name'])[0])
+
+    def test_signal_handlers_wait_for_main_thread(self):
+        self.a.session_pool = mock.Mock()
+        self.a.exporter = mock.Mock()
+        self.a.signal_handler_registered = False
+        d = self.a.config.get_device('ax-write')
+        get_client = a10_os.A10OpenstackLBBase._get_a10_client.__get__(self.a)
+
+        with mock.patch.object(a10_os.signal, 'signal') as signal:
+            signal.side_effect = ValueError("signal only works in main thread")
+            t = threading.Thread(target=get_client, args=(d,))
+            t.start()
+            t.join()
+            self.assertFalse(self.a.signal_handler_registered)
+
+            signal.side_effect = None
+            get_client(d)
+            self.assertTrue(self.a.signal_handler_registered)
+            # The failed first attempt, then the three handlers.
+            self.assertEqual(4, signal.call_count)
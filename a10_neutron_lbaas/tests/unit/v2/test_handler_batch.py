@@ -0,0 +1,85 @@
+# Copyright 2014, Doug Wiegley (dougwig), A10 Networks
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import test_base
+
+
+class TestBatch(test_base.UnitTestBase):
+
+    def setUp(self):
+        super(TestBatch, self).setUp()
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        self.client = self.a._get_a10_client.return_value
+        self.a.write_coalescer = mock.Mock()
+        self.a._select_a10_device = mock.Mock(
+            return_value=self.a.config.get_device('ax-write'))
+
+    def test_single_session_and_write(self):
+        lb = test_base.FakeLoadBalancer()
+        member = test_base.FakeMember(pool=mock.MagicMock())
+        failed = self.a.batch(None, [
+            ('member', 'create', member),
+            ('loadbalancer', 'create', lb),
+        ])
+
+        self.assertEqual([], failed)
+        self.assertEqual(1, self.a._get_a10_client.call_count)
+        self.assertEqual(1, self.a.write_coalescer.write.call_count)
+        names = [c[0] for c in self.client.mock_calls]
+        self.assertTrue(names.index('slb.virtual_server.create') <
+                        names.index('slb.server.create'))
+        self.a.openstack_driver.load_balancer.successful_completion.assert_called_with(
+            None, lb, delete=False)
+        self.a.openstack_driver.member.successful_completion.assert_called_with(
+            None, member, delete=False)
+
+    def test_deletes_children_first(self):
+        lb = test_base.FakeLoadBalancer()
+        pool = test_base.FakePool('HTTP', 'ROUND_ROBIN', None)
+        self.a.batch(None, [
+            ('loadbalancer', 'delete', lb),
+            ('pool', 'delete', pool),
+        ])
+        names = [c[0] for c in self.client.mock_calls]
+        self.assertTrue(names.index('slb.service_group.delete') <
+                        names.index('slb.virtual_server.delete'))
+        self.a.openstack_driver.pool.successful_completion.assert_called_with(
+            None, pool, delete=True)
+
+    def test_failure_is_reported_per_object(self):
+        lb = test_base.FakeLoadBalancer()
+        pool = test_base.FakePool('HTTP', 'ROUND_ROBIN', None)
+        self.client.slb.service_group.create.side_effect = Exception("boom")
+        failed = self.a.batch(None, [
+            ('loadbalancer', 'create', lb),
+            ('pool', 'create', pool),
+        ])
+
+        self.assertEqual(1, len(failed))
+        self.assertEqual(('pool', 'create', pool), failed[0][0])
+        self.a.openstack_driver.pool.failed_completion.assert_called_with(None, pool)
+        self.a.openstack_driver.load_balancer.successful_completion.assert_called_with(
+            None, lb, delete=False)
+
+    def test_unknown_operation(self):
+        self.assertRaises(ValueError, self.a.batch, None,
+                          [('vip', 'create', test_base.FakeLoadBalancer())])
+        self.assertFalse(self.a._get_a10_client.called)
+
+    def test_device_override(self):
+        self.a.batch(None, [('loadbalancer', 'create', test_base.FakeLoadBalancer())],
+                     device_name='axv30')
+        self.assertFalse(self.a._select_a10_device.called)
+        self.assertEqual('axv30', self.a._get_a10_client.call_args[0][0]['name'])
@@ -12,10 +12,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import acos_client.errors as acos_errors
 import mock
 import test_base
 
 import a10_neutron_lbaas.a10_exceptions as a10_ex
+import a10_neutron_lbaas.stats_cache as stats_cache
+import a10_neutron_lbaas.stats_collector as stats_collector
 
 
 class TestLB(test_base.UnitTestBase):
@@ -131,3 +134,124 @@ class TestLB(test_base.UnitTestBase):
 
         s = str(self.a.last_client.mock_calls)
         self.assertTrue('call.slb.virtual_server.stats' in s)
+
+    def test_stats_cached(self):
+        self.a.stats_cache = stats_cache.StatsCache(60)
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        client = self.a._get_a10_client.return_value
+        client.slb.virtual_server.stats.return_value = {"virtual_server_stat": {
+            "req_bytes": 1, "resp_bytes": 2, "cur_conns": 3, "tot_conns": 4}}
+        test_lb = test_base.FakeLoadBalancer()
+
+        self.a.lb.stats(None, test_lb)
+        r = self.a.lb.stats(None, test_lb)
+
+        self.assertEqual(4, r["total_connections"])
+        self.assertEqual(1, client.slb.virtual_server.stats.call_count)
+
+    def test_stats_collected(self):
+        collected = {"total_connections": 4}
+        self.a.stats_collector = mock.Mock()
+        self.a.stats_collector.get.return_value = collected
+        self.a._get_a10_client = mock.Mock()
+        test_lb = test_base.FakeLoadBalancer()
+
+        self.assertEqual(collected, self.a.lb.stats(None, test_lb))
+        self.assertEqual((stats_collector.LOADBALANCER, test_lb.id),
+                         self.a.stats_collector.get.call_args[0][2:])
+        self.assertFalse(self.a._get_a10_client.called)
+
+
+class TestRefresh(test_base.UnitTestBase):
+
+    def setUp(self):
+        super(TestRefresh, self).setUp()
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        self.client = self.a._get_a10_client.return_value
+        self.a.write_coalescer = mock.Mock()
+        self.a._select_a10_device = mock.Mock(
+            return_value=self.a.config.get_device('ax-write'))
+        self.a.neutron.member_get_ips.side_effect = lambda ctx, members, use_float: dict(
+            (m.address, m.address) for m in members)
+
+        self.members = [test_base.FakeMember(id='m1', address='10.0.0.1'),
+                        test_base.FakeMember(id='m2', address='10.0.0.2')]
+        self.pool = test_base.FakePool('HTTP', 'ROUND_ROBIN', None,
+                                       members=self.members, hm=test_base.FakeHM('HTTP'))
+        self.lb = test_base.FakeLoadBalancer()
+        self.lb.listeners = [test_base.FakeListener('HTTP', 80, pool=self.pool,
+                                                    loadbalancer=self.lb)]
+
+    def name(self, member):
+        return self.a.member._get_name(member, member.address)
+
+    def device(self, members, vs=True, vports=()):
+        objects = {('service_group', self.pool.id): {'service_group': {
+            'name': self.pool.id,
+            'health_monitor': 'fake-hm-id-001',
+            'member_list': [{'server': s, 'port': 80, 'status': status}
+                            for s, status in members]}}}
+        if vs:
+            objects[('virtual_server', self.lb.id)] = {'virtual_server': {
+                'name': self.lb.id,
+                'vport_list': [{'name': 'fake-listen-id-001', 'protocol': 11, 'port': 80,
+                                'service_group': self.pool.id}] + list(vports)}}
+
+        def get(kind):
+            def get(name):
+                if (kind, name) not in objects:
+                    raise acos_errors.NotFound()
+                return objects[(kind, name)]
+            return get
+        self.client.slb.virtual_server.get.side_effect = get('virtual_server')
+        self.client.slb.service_group.get.side_effect = get('service_group')
+
+    def test_in_sync_changes_nothing(self):
+        self.device([(self.name(m), 1) for m in self.members])
+        self.assertEqual([], self.a.lb.refresh(None, self.lb))
+        self.assertEqual(1, self.a._get_a10_client.call_count)
+        self.assertFalse(self.a.write_coalescer.write.called)
+        self.assertFalse(self.client.slb.server.create.called)
+        # Only the load balancer's own objects are read, not whole listings.
+        self.assertFalse(self.client.slb.virtual_server.all.called)
+        self.assertFalse(self.client.slb.service_group.all.called)
+
+    def test_member_drift(self):
+        self.device([(self.name(self.members[0]), 0), ('_stale', 1)])
+        ops = self.a.lb.refresh(None, self.lb)
+
+        self.assertEqual([('member', 'update', self.members[0]),
+                          ('member', 'create', self.members[1]),
+                          ('member', 'remove', (self.pool.id, '_stale', 80))], ops)
+        self.client.slb.service_group.member.delete.assert_called_once_with(
+            self.pool.id, '_stale', 80)
+        self.assertEqual(1, self.a.write_coalescer.write.call_count)
+
+    def test_missing_virtual_server(self):
+        self.device([(self.name(m), 1) for m in self.members], vs=False)
+        ops = self.a.lb.refresh(None, self.lb)
+
+        self.assertEqual([('loadbalancer', 'create', self.lb),
+                          ('listener', 'create', self.lb.listeners[0])], ops)
+        self.assertTrue(self.client.slb.virtual_server.create.called)
+        self.assertTrue(self.client.slb.virtual_server.vport.create.called)
+
+    def test_missing_health_monitor(self):
+        self.device([(self.name(m), 1) for m in self.members])
+        self.client.slb.hm.get.side_effect = acos_errors.NotFound()
+        ops = self.a.lb.refresh(None, self.lb)
+        self.assertEqual(['hm'], [op[0] for op in ops])
+
+    def test_stale_vport_and_its_service_group(self):
+        self.device([(self.name(m), 1) for m in self.members], vports=[
+            {'name': 'old-listener', 'protocol': 12, 'port': 443, 'service_group': 'old-pool'},
+            {'name': 'other', 'protocol': 2, 'port': 22, 'service_group': self.pool.id}])
+        ops = self.a.lb.refresh(None, self.lb)
+
+        self.assertEqual([('listener', 'remove', (self.lb.id, 'old-listener', 12, 443)),
+                          ('listener', 'remove', (self.lb.id, 'other', 2, 22)),
+                          ('pool', 'remove', 'old-pool')], ops)
+        self.assertEqual([mock.call(self.lb.id, 'old-listener', 12, 443),
+                          mock.call(self.lb.id, 'other', 2, 22)],
+                         self.client.slb.virtual_server.vport.delete.call_args_list)
+        self.client.slb.service_group.delete.assert_called_once_with('old-pool')
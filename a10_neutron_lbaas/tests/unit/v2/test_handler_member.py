@@ -104,6 +104,22 @@ class TestMembers(test_base.UnitTestBase):
 
         self.a.last_client.slb.server.delete(ip)
 
+    def test_stats_read_as_collected(self):
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        client = self.a._get_a10_client.return_value
+        m = test_base.FakeMember(pool=test_base.FakePool('TCP', 'ROUND_ROBIN', None))
+        ip = self.a.member.neutron.member_get_ip(None, m, True)
+        name = self.a.member._get_name(m, ip)
+        client.slb.service_group.stats.return_value = {"service_group_stat": {
+            "name": m.pool.id, "member_stat_list": [
+                {"server": name, "port": 80, "cur_conns": 5},
+                {"server": name, "port": 81, "cur_conns": 6}]}}
+
+        actual = self.a.member.stats(None, m)
+
+        client.slb.service_group.stats.assert_called_once_with(m.pool.id)
+        self.assertEqual({"server": name, "port": 80, "cur_conns": 5}, actual)
+
     def test_delete_count_gt_one(self):
         m = test_base.FakeMember(False, pool=mock.MagicMock())
         ip = self.a.member.neutron.member_get_ip(None, m, True)
@@ -114,3 +130,102 @@ class TestMembers(test_base.UnitTestBase):
 
         self.a.last_client.slb.service_group.member.delete.assert_called_with(
             m.pool.id, name, m.protocol_port)
+
+
+class TestMembersBulk(test_base.UnitTestBase):
+
+    def setUp(self):
+        super(TestMembersBulk, self).setUp()
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        self.client = self.a._get_a10_client.return_value
+        self.a.write_coalescer = mock.Mock()
+        self.a._select_a10_device = mock.Mock(
+            return_value=self.a.config.get_device('ax-write'))
+        self.a.neutron.member_get_ips = lambda ctx, members, use_float: dict(
+            (m.address, m.address) for m in members)
+        self.manager = self.a.openstack_driver.member
+
+    def members(self, n, address=None):
+        pool = mock.MagicMock()
+        return [test_base.FakeMember(pool=pool, id='m%d' % i,
+                                     address=address or '10.0.0.%d' % i)
+                for i in range(n)]
+
+    def test_create_many_single_write(self):
+        members = self.members(5)
+        self.assertEqual([], self.a.member.create_many(None, members))
+
+        self.assertEqual(5, self.client.slb.server.create.call_count)
+        self.assertEqual(5, self.client.slb.service_group.member.create.call_count)
+        self.assertEqual(1, self.a.write_coalescer.write.call_count)
+        self.assertEqual(5, self.manager.successful_completion.call_count)
+
+    def test_create_many_concurrent(self):
+        self.a.config.get_device('ax-write')['bulk_concurrency'] = 3
+        # Mock creates child attributes lazily and not thread safely.
+        self.client.slb.server.create
+        self.client.slb.service_group.member.create
+        try:
+            members = self.members(6)
+            bool(members[0].pool)
+            members[0].pool.a10_meta
+            self.assertEqual([], self.a.member.create_many(None, members))
+        finally:
+            self.a.config.get_device('ax-write')['bulk_concurrency'] = 1
+
+        # One session for the request, one per member change. call_count is
+        # not updated atomically; call_args_list is.
+        self.assertEqual(7, len(self.a._get_a10_client.call_args_list))
+        self.assertEqual(6, len(self.client.slb.service_group.member.create.call_args_list))
+        self.assertEqual(1, self.a.write_coalescer.write.call_count)
+
+    def test_concurrency_leaves_a_session_for_the_request(self):
+        device = self.a.config.get_device('ax-write')
+        device['bulk_concurrency'] = 8
+        members = self.members(3)
+        try:
+            with mock.patch('a10_neutron_lbaas.parallel.run',
+                            return_value=[(None, None)] * 3) as run:
+                self.assertEqual([], self.a.member.create_many(None, members))
+        finally:
+            device['bulk_concurrency'] = 1
+        self.assertEqual(device['session_pool_max'] - 1, run.call_args[0][2])
+
+    def test_failure_is_reported_per_member(self):
+        members = self.members(3)
+
+        def create(name, ip, **kw):
+            if ip == '10.0.0.1':
+                raise Exception("boom")
+        self.client.slb.server.create.side_effect = create
+
+        failed = self.a.member.create_many(None, members)
+        self.assertEqual([members[1]], [m for m, e in failed])
+        self.manager.failed_completion.assert_called_once_with(None, members[1])
+        self.assertEqual(2, self.manager.successful_completion.call_count)
+
+    def test_update_many(self):
+        members = self.members(2)
+        failed = self.a.member.update_many(None, [(m, m) for m in members])
+        self.assertEqual([], failed)
+        self.assertEqual(2, self.client.slb.service_group.member.update.call_count)
+
+    def test_delete_many_last_members_delete_server(self):
+        members = self.members(2, address='10.0.0.9')
+        self.a.member.neutron.member_counts.return_value = {
+            ('get-off-my-lawn', '10.0.0.9'): 2}
+        self.a.member.delete_many(None, members)
+
+        self.assertTrue(self.client.slb.server.delete.called)
+        self.assertFalse(self.client.slb.service_group.member.delete.called)
+        self.manager.successful_completion.assert_called_with(
+            None, members[1], delete=True)
+
+    def test_delete_many_shared_server(self):
+        members = self.members(1, address='10.0.0.9')
+        self.a.member.neutron.member_counts.return_value = {
+            ('get-off-my-lawn', '10.0.0.9'): 2}
+        self.a.member.delete_many(None, members)
+
+        self.assertFalse(self.client.slb.server.delete.called)
+        self.assertTrue(self.client.slb.service_group.member.delete.called)
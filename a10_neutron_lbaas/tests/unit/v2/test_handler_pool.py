@@ -16,6 +16,7 @@ import mock
 import test_base
 
 import a10_neutron_lbaas.a10_exceptions as a10_ex
+import a10_neutron_lbaas.stats_collector as stats_collector
 
 
 class TestPools(test_base.UnitTestBase):
@@ -127,6 +128,79 @@ class TestPools(test_base.UnitTestBase):
                                 cookie_persistence.delete.
                                 assert_called_with(pool.id))
 
+    def test_delete_counts_members_once(self):
+        members = [test_base.FakeMember(id='m1', address='10.0.0.1'),
+                   test_base.FakeMember(id='m2', address='10.0.0.1'),
+                   test_base.FakeMember(id='m3', address='10.0.0.2')]
+        neutron = self.a.pool.neutron
+        neutron.member_get_ips.side_effect = lambda ctx, members, use_float: dict(
+            (m.address, m.address) for m in members)
+        neutron.member_counts.return_value = {
+            ('get-off-my-lawn', '10.0.0.1'): 2,
+            ('get-off-my-lawn', '10.0.0.2'): 2}
+
+        pool = test_base.FakePool('TCP', 'ROUND_ROBIN', None, members=members)
+        self.a.pool.delete(None, pool)
+
+        self.assertEqual(1, neutron.member_counts.call_count)
+        self.assertFalse(neutron.member_count.called)
+        # 10.0.0.1 has no members left; 10.0.0.2 is still used elsewhere.
+        self.a.last_client.slb.server.delete.assert_called_with(
+            self.a.member._get_name(members[1], '10.0.0.1'))
+        self.a.last_client.slb.service_group.member.delete.assert_called_once_with(
+            pool.id, self.a.member._get_name(members[2], '10.0.0.2'), 80)
+
+    def _mock_members(self, n):
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        self.client = self.a._get_a10_client.return_value
+        self.a._select_a10_device = mock.Mock(
+            return_value=self.a.config.get_device('ax-write'))
+        # Mock creates child attributes lazily and not thread safely.
+        self.client.slb.server.delete
+        self.client.slb.service_group.member.delete
+        neutron = self.a.pool.neutron
+        neutron.member_get_ips.side_effect = lambda ctx, members, use_float: dict(
+            (m.address, m.address) for m in members)
+        neutron.member_counts.side_effect = lambda ctx, members: dict(
+            ((m.tenant_id, m.address), 1) for m in members)
+        members = [test_base.FakeMember(id='m%d' % i, address='10.0.0.%d' % i)
+                   for i in range(n)]
+        return test_base.FakePool('TCP', 'ROUND_ROBIN', None, members=members)
+
+    def test_delete_members_concurrently(self):
+        pool = self._mock_members(6)
+        device = self.a.config.get_device('ax-write')
+        device['bulk_concurrency'] = 3
+        try:
+            self.a.pool.delete(None, pool)
+        finally:
+            device['bulk_concurrency'] = 1
+
+        # call_count is not updated atomically; call_args_list is.
+        self.assertEqual(6, len(self.client.slb.server.delete.call_args_list))
+        # The pool's session plus one per member.
+        self.assertEqual(7, len(self.a._get_a10_client.call_args_list))
+        names = [c[0] for c in self.client.mock_calls]
+        self.assertEqual(5, max(i for i, n in enumerate(names) if n == 'slb.server.delete'))
+        self.assertEqual(6, names.index('slb.service_group.delete'))
+
+    def test_delete_member_failures_keep_service_group(self):
+        pool = self._mock_members(3)
+
+        def delete(name):
+            if name.endswith('10_0_0_1_neutron') or name == 'm1':
+                raise Exception("boom")
+        self.client.slb.server.delete.side_effect = delete
+
+        try:
+            self.a.pool.delete(None, pool)
+            self.fail("expected BulkOperationError")
+        except a10_ex.BulkOperationError as e:
+            self.assertEqual([pool.members[1]], [m for m, err in e.failures])
+        self.assertEqual(3, self.client.slb.server.delete.call_count)
+        self.assertFalse(self.client.slb.service_group.delete.called)
+        self.assertFalse(self.a.openstack_driver.pool.successful_completion.called)
+
     def _test_stats(self):
         pool = test_base.FakePool('TCP', 'ROUND_ROBIN', None, False)
         actual = self.a.pool.stats(None, pool)
@@ -144,3 +218,32 @@ class TestPools(test_base.UnitTestBase):
     def test_stats_returns_members(self):
         pool, actual = self._test_stats()
         self.assertIn("members", actual)
+
+    def test_stats_read_as_collected(self):
+        self.a._get_a10_client = mock.Mock(return_value=mock.MagicMock())
+        client = self.a._get_a10_client.return_value
+        client.slb.service_group.stats.return_value = {"service_group_stat": {
+            "name": "sg1", "cur_conns": 5, "member_stat_list": [
+                {"server": "s1", "port": 80, "cur_conns": 5}]}}
+        pool = test_base.FakePool('TCP', 'ROUND_ROBIN', None, False)
+        pool.a10_meta = '{"name": "sg1"}'
+
+        actual = self.a.pool.stats(None, pool)
+
+        client.slb.service_group.stats.assert_called_once_with("sg1")
+        self.assertEqual({"stats": {"name": "sg1", "cur_conns": 5},
+                          "members": {"s1:80": {"server": "s1", "port": 80, "cur_conns": 5}}},
+                         actual)
+
+    def test_stats_collected(self):
+        collected = {"stats": {"cur_conns": 5}, "members": {}}
+        self.a.stats_collector = mock.Mock()
+        self.a.stats_collector.get.return_value = collected
+        self.a._get_a10_client = mock.Mock()
+        pool = test_base.FakePool('TCP', 'ROUND_ROBIN', None, False)
+        pool.a10_meta = '{"name": "sg1"}'
+
+        self.assertEqual(collected, self.a.pool.stats(None, pool))
+        self.assertEqual((stats_collector.POOL, "sg1"),
+                         self.a.stats_collector.get.call_args[0][2:])
+        self.assertFalse(self.a._get_a10_client.called)
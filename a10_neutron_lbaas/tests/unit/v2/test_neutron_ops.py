@@ -0,0 +1,98 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+import a10_neutron_lbaas.tests.test_case as test_case
+import a10_neutron_lbaas.v2.neutron_ops as neutron_ops
+import test_base
+
+
+class FakeContext(object):
+
+    def __init__(self, fips):
+        self.session = mock.MagicMock()
+        query = self.session.query.return_value
+        query.filter_by.side_effect = lambda fixed_ip_address: mock.Mock(
+            first=mock.Mock(return_value=fips.get(fixed_ip_address)))
+        query.filter.return_value = fips.values()
+
+
+def fip(fixed, floating):
+    return mock.Mock(fixed_ip_address=fixed, floating_ip_address=floating)
+
+
+class TestMemberGetIp(test_case.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(neutron_ops, 'l3_db', create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ops = neutron_ops.NeutronOpsV2(mock.MagicMock())
+        self.context = FakeContext({'10.0.0.1': fip('10.0.0.1', '172.16.0.1')})
+
+    def member(self, address):
+        return test_base.FakeMember(address=address)
+
+    def test_no_float(self):
+        self.assertEqual('10.0.0.1', self.ops.member_get_ip(
+            self.context, self.member('10.0.0.1'), False))
+        self.assertFalse(self.context.session.query.called)
+
+    def test_one_query_per_address(self):
+        for i in range(3):
+            self.assertEqual('172.16.0.1', self.ops.member_get_ip(
+                self.context, self.member('10.0.0.1'), True))
+            self.assertEqual('10.0.0.2', self.ops.member_get_ip(
+                self.context, self.member('10.0.0.2'), True))
+        self.assertEqual(2, self.context.session.query.call_count)
+
+    def test_batch(self):
+        members = [self.member('10.0.0.1'), self.member('10.0.0.2')]
+        ips = self.ops.member_get_ips(self.context, members, True)
+        self.assertEqual({'10.0.0.1': '172.16.0.1', '10.0.0.2': '10.0.0.2'}, ips)
+
+        # Already resolved during this request.
+        self.assertEqual('10.0.0.2', self.ops.member_get_ip(self.context, members[1], True))
+        self.assertEqual(1, self.context.session.query.call_count)
+
+    def test_cache_is_per_request(self):
+        self.ops.member_get_ip(self.context, self.member('10.0.0.1'), True)
+        other = FakeContext({})
+        self.assertEqual('10.0.0.1', self.ops.member_get_ip(
+            other, self.member('10.0.0.1'), True))
+
+
+class TestMemberCounts(test_case.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(neutron_ops, 'lb_db', create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ops = neutron_ops.NeutronOpsV2(mock.MagicMock())
+
+    def test_one_query(self):
+        context = mock.MagicMock()
+        query = context.session.query.return_value
+        query.filter.return_value.group_by.return_value = [
+            ('get-off-my-lawn', '10.0.0.1', 3)]
+        members = [test_base.FakeMember(address='10.0.0.1'),
+                   test_base.FakeMember(address='10.0.0.1'),
+                   test_base.FakeMember(address='10.0.0.2')]
+
+        counts = self.ops.member_counts(context, members)
+        self.assertEqual({('get-off-my-lawn', '10.0.0.1'): 3,
+                          ('get-off-my-lawn', '10.0.0.2'): 0}, counts)
+        self.assertEqual(1, context.session.query.call_count)
+
+    def test_no_members(self):
+        self.assertEqual({}, self.ops.member_counts(None, []))
@@ -12,8 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from a10_neutron_lbaas import a10_context
 import a10_neutron_lbaas.handler_base as base
 import neutron_ops
+import v2_context as a10
 
 
 class HandlerBaseV2(base.HandlerBase):
@@ -25,3 +27,61 @@ class HandlerBaseV2(base.HandlerBase):
             self.neutron = neutron
         else:
             self.neutron = neutron_ops.NeutronOpsV2(self)
+
+    def _tenant_id(self, obj):
+        if hasattr(obj, 'tenant_id'):
+            return obj.root_loadbalancer.tenant_id
+        return obj['tenant_id']
+
+    def _device_groups(self, items, obj=lambda x: x, device_name=None):
+        """Split items by the (device name, partition) their object lives in.
+
+        Groups come back in the order they were first seen, each as
+        ((device name, partition name), [items]).  device_name overrides
+        the tenant's device for every item.
+        """
+
+        devices = {}
+        groups = {}
+        order = []
+        for item in items:
+            tenant_id = self._tenant_id(obj(item))
+            if tenant_id not in devices and device_name is not None:
+                devices[tenant_id] = self.a10_driver.config.get_device(device_name)
+            elif tenant_id not in devices:
+                devices[tenant_id] = self.a10_driver._select_a10_device(tenant_id)
+            d = devices[tenant_id]
+            key = (d['name'], a10_context.partition_name(d, tenant_id))
+            if key not in groups:
+                groups[key] = []
+                order.append(key)
+            groups[key].append(item)
+        return [(k, groups[k]) for k in order]
+
+    def _cached_stats(self, context, obj, read, device=None, collected=None):
+        """Stats for obj: read(c) in an A10Context, unless already known.
+
+        collected is the (kind, key) of obj in the stats of its device's
+        background collector, which are used when there are any. Otherwise
+        reads go through the driver's stats cache, keyed by handler, object
+        and device, so stats follow a tenant that moves to another appliance.
+        """
+
+        if device is None:
+            device = self.a10_driver._select_a10_device(self._tenant_id(obj))
+
+        collector = getattr(self.a10_driver, 'stats_collector', None)
+        if collected is not None and collector is not None:
+            partition = a10_context.partition_name(device, self._tenant_id(obj))
+            value = collector.get(device, partition, *collected)
+            if value is not None:
+                return value
+
+        def load():
+            with a10.A10Context(self, context, obj, device_name=device['name']) as c:
+                return read(c)
+
+        stats = getattr(self.a10_driver, 'stats_cache', None)
+        if stats is None or not stats.enabled:
+            return load()
+        return stats.get((self.__class__.__name__, obj.id, device['name']), load)
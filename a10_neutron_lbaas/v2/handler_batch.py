@@ -0,0 +1,111 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+import handler_base_v2
+import v2_context as a10
+
+LOG = logging.getLogger(__name__)
+
+# Parents before children; deletes run in the reverse order.
+RESOURCES = ['loadbalancer', 'listener', 'pool', 'member', 'hm']
+ACTIONS = ['create', 'update', 'delete']
+
+
+class BatchHandler(handler_base_v2.HandlerBaseV2):
+    """Applies several LBaaS changes with one session per device partition.
+
+    Each operation is a (resource, action, obj) or, for updates,
+    (resource, action, obj, old_obj) tuple, where resource is one of
+    RESOURCES and action one of ACTIONS.  Operations are grouped by device
+    and partition; each group gets a single device selection, partition
+    activation and write memory.  Success or failure is reported for every
+    object through its resource's openstack_manager.
+    """
+
+    def __init__(self, a10_driver, openstack_manager=None, neutron=None):
+        super(BatchHandler, self).__init__(a10_driver, openstack_manager,
+                                           neutron=neutron)
+        self.handlers = {}
+
+    def _handler(self, resource):
+        if resource not in self.handlers:
+            self.handlers[resource] = getattr(self.a10_driver, resource)
+        return self.handlers[resource]
+
+    def _sorted(self, operations):
+        deletes = [op for op in operations if op[1] == 'delete']
+        others = [op for op in operations if op[1] != 'delete']
+        deletes.sort(key=lambda op: -RESOURCES.index(op[0]))
+        others.sort(key=lambda op: RESOURCES.index(op[0]))
+        return deletes + others
+
+    def _groups(self, operations, device_name=None):
+        groups = self._device_groups(operations, lambda op: op[2], device_name)
+        return [(k, self._sorted(ops)) for k, ops in groups]
+
+    def _apply(self, c, context, op):
+        resource, action, obj = op[:3]
+        h = self._handler(resource)
+        if action == 'create':
+            h._create(c, context, obj)
+        elif action == 'update':
+            old_obj = op[3] if len(op) > 3 else None
+            h._update(c, context, obj, old_obj)
+        else:
+            h._delete(c, context, obj)
+
+    def _execute_group(self, context, device_name, ops):
+        failed = {}
+        has_deletes = any(op[1] == 'delete' for op in ops)
+        try:
+            with a10.A10BatchContext(self, context, ops[0][2],
+                                     device_name=device_name,
+                                     has_deletes=has_deletes) as c:
+                for i, op in enumerate(ops):
+                    try:
+                        self._apply(c, context, op)
+                    except Exception as e:
+                        LOG.exception("A10Driver: batch %s of %s %s failed",
+                                      op[1], op[0], op[2].id)
+                        failed[i] = e
+        except Exception as e:
+            LOG.exception("A10Driver: batch on device %s failed", device_name)
+            for i in range(len(ops)):
+                failed.setdefault(i, e)
+
+        for i, op in enumerate(ops):
+            manager = self._handler(op[0]).openstack_manager
+            if i in failed:
+                manager.failed_completion(context, op[2])
+            else:
+                manager.successful_completion(context, op[2],
+                                              delete=(op[1] == 'delete'))
+        return [(ops[i], failed[i]) for i in sorted(failed)]
+
+    def execute(self, context, operations, device_name=None):
+        """Apply operations; returns (operation, exception) for each failure.
+
+        device_name overrides the tenant's device, e.g. to copy a tenant's
+        objects to another appliance.
+        """
+
+        for op in operations:
+            if op[0] not in RESOURCES or op[1] not in ACTIONS:
+                raise ValueError("Unsupported batch operation %s %s" % (op[1], op[0]))
+
+        failed = []
+        for (name, partition_name), ops in self._groups(operations, device_name):
+            LOG.debug("A10Driver: batch of %d on %s/%s", len(ops), name, partition_name)
+            failed.extend(self._execute_group(context, name, ops))
+        return failed
@@ -55,41 +55,49 @@ class HealthMonitorHandler(handler_base_v2.HandlerBaseV2):
             self._pool_name(context, pool=hm.pool),
             health_monitor="", health_check_disable=True)
 
+    def _create(self, c, context, hm):
+        try:
+            self._set(c, c.client.slb.hm.create, context, hm)
+        except acos_errors.Exists:
+            pass
+
+        # Disable any potentially existing health monitor.
+        c.client.slb.service_group.update(
+            self._pool_name(context, pool=hm.pool),
+            health_monitor="", health_check_disable=True)
+
+        c.client.slb.service_group.update(
+            self._pool_name(context, pool=hm.pool),
+            health_monitor=self._meta_name(hm), health_check_disable=False)
+
     def create(self, context, hm):
         LOG.debug("HealthMonitorHandler.create(): hm=%s, context=%s" % (dir(hm), context))
         with a10.A10WriteStatusContext(self, context, hm) as c:
-            try:
-                self._set(c, c.client.slb.hm.create, context, hm)
-            except acos_errors.Exists:
-                pass
-
-            # Disable any potentially existing health monitor.
-            c.client.slb.service_group.update(
-                self._pool_name(context, pool=hm.pool),
-                health_monitor="", health_check_disable=True)
-
-            c.client.slb.service_group.update(
-                self._pool_name(context, pool=hm.pool),
-                health_monitor=self._meta_name(hm), health_check_disable=False)
+            self._create(c, context, hm)
+
+    def _update(self, c, context, hm, old_hm=None):
+        if old_hm is None:
+            old_hm = hm
+        if old_hm.pool and not hm.pool:
+            pool_name = self._pool_name(context, pool=old_hm.pool)
+            c.client.slb.service_group.update(pool_name,
+                                              health_monitor="",
+                                              health_check_disable=True)
+        elif old_hm.pool != hm.pool:
+            pool_name = self._pool_name(context, pool=hm.pool)
+
+            # Remove any existing association.  This should be moved into a method.
+            c.client.slb.service_group.update(pool_name,
+                                              health_monitor="",
+                                              health_check_disable=True)
+            c.client.slb.service_group.update(pool_name,
+                                              health_monitor=self._meta_name(hm),
+                                              health_check_disable=False)
+        self._set(c, c.client.slb.hm.update, context, hm)
 
     def update(self, context, old_hm, hm):
         with a10.A10WriteStatusContext(self, context, hm) as c:
-            if old_hm.pool and not hm.pool:
-                pool_name = self._pool_name(context, pool=old_hm.pool)
-                c.client.slb.service_group.update(pool_name,
-                                                  health_monitor="",
-                                                  health_check_disable=True)
-            elif old_hm.pool != hm.pool:
-                pool_name = self._pool_name(context, pool=hm.pool)
-
-                # Remove any existing association.  This should be moved into a method.
-                c.client.slb.service_group.update(pool_name,
-                                                  health_monitor="",
-                                                  health_check_disable=True)
-                c.client.slb.service_group.update(pool_name,
-                                                  health_monitor=self._meta_name(hm),
-                                                  health_check_disable=False)
-            self._set(c, c.client.slb.hm.update, context, hm)
+            self._update(c, context, hm, old_hm)
 
     def _delete(self, c, context, hm):
         LOG.debug("HealthMonitorHandler.delete(): hm=%s, context=%s" % (hm, context))
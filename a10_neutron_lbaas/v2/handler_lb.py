@@ -12,12 +12,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import logging
 
 from a10_neutron_lbaas.acos import axapi_mappings
+from a10_neutron_lbaas.acos import inventory
+from a10_neutron_lbaas import metrics
+from a10_neutron_lbaas import stats_collector
 
 import acos_client.errors as acos_errors
 import handler_base_v2
+import handler_persist
 import v2_context as a10
 
 LOG = logging.getLogger(__name__)
@@ -52,43 +57,176 @@ class LoadbalancerHandler(handler_base_v2.HandlerBaseV2):
         with a10.A10WriteStatusContext(self, context, lb) as c:
             self._create(c, context, lb)
 
+    def _update(self, c, context, lb, old_lb=None):
+        self._set(c.client.slb.virtual_server.update, c, context, lb)
+        self.hooks.after_vip_update(c, context, lb)
+
     def update(self, context, old_lb, lb):
         with a10.A10WriteStatusContext(self, context, lb) as c:
-            self._set(c.client.slb.virtual_server.update, c, context, lb)
-            self.hooks.after_vip_update(c, context, lb)
+            self._update(c, context, lb, old_lb)
 
     def _delete(self, c, context, lb):
         try:
             c.client.slb.virtual_server.delete(self._meta_name(lb))
         except acos_errors.NotFound:
             pass
+        self.hooks.after_vip_delete(c, context, lb)
 
     def delete(self, context, lb):
         with a10.A10DeleteContext(self, context, lb) as c:
             self._delete(c, context, lb)
-            self.hooks.after_vip_delete(c, context, lb)
+
+    def _read_stats(self, c, lb):
+        try:
+            name = self.meta(lb, 'id', lb.id)
+            r = c.client.slb.virtual_server.stats(name)
+
+            return {
+                "bytes_in": r["virtual_server_stat"]["req_bytes"],
+                "bytes_out": r["virtual_server_stat"]["resp_bytes"],
+                "active_connections":
+                    r["virtual_server_stat"]["cur_conns"],
+                "total_connections": r["virtual_server_stat"]["tot_conns"]
+            }
+        except Exception:
+            return None
 
     def stats(self, context, lb):
-        with a10.A10Context(self, context, lb) as c:
+        stats = self._cached_stats(
+            context, lb, lambda c: self._read_stats(c, lb),
+            collected=(stats_collector.LOADBALANCER, self.meta(lb, 'id', lb.id)))
+        if stats is None:
+            return {
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "active_connections": 0,
+                "total_connections": 0
+            }
+        return stats
+
+    def _pools(self, lb):
+        pools = {}
+        for listener in lb.listeners or []:
+            if listener.default_pool:
+                pools[listener.default_pool.id] = listener.default_pool
+        for pool in getattr(lb, 'pools', None) or []:
+            pools[pool.id] = pool
+        return [pools[k] for k in sorted(pools)]
+
+    def _refresh_plan(self, c, context, lb):
+        """The changes that bring the device in line with lb in neutron.
+
+        Only lb's own objects are read from the device, by name, so the
+        cost does not grow with the partition. Changes are (resource,
+        action, obj) tuples, parents first, then removals of what neutron
+        does not know about: ('member', 'remove', (pool name, server name,
+        port)), ('listener', 'remove', (virtual server, vport name,
+        protocol, port)) and ('pool', 'remove', name) for service groups
+        only used by removed vports.
+        """
+
+        client, device = c.client, c.device_cfg
+        ops = []
+        removals = []
+
+        vs_name = self._meta_name(lb)
+        vs = inventory.virtual_server(client, device, vs_name)
+        if vs is None:
+            ops.append(('loadbalancer', 'create', lb))
+        vports = inventory.vports(vs) if vs is not None else []
+        ports = set(v['name'] for v in vports)
+        listeners = set()
+        for listener in lb.listeners or []:
+            name = self.a10_driver.listener._meta_name(listener)
+            listeners.add(name)
+            if name not in ports:
+                ops.append(('listener', 'create', listener))
+
+        members = self.a10_driver.member
+        pools = set()
+        for pool in self._pools(lb):
+            name = self._pool_name(context, pool=pool)
+            pools.add(name)
+            sg = inventory.service_group(client, device, name)
+            if sg is None:
+                ops.append(('pool', 'create', pool))
+            else:
+                p = handler_persist.PersistHandler(c, context, pool)
+                kind = p.sp_obj_dict.get(p.sp.type) if p.sp is not None else None
+                if kind is not None and not inventory.exists(
+                        getattr(client.slb.template, kind), p.name):
+                    ops.append(('pool', 'update', pool))
+
+            on_device = inventory.service_group_members(sg) if sg is not None else {}
+            ips = self.neutron.member_get_ips(context, pool.members, device['use_float'])
+            wanted = set()
+            for m in pool.members:
+                key = (members._meta_name(m, ips[m.address]), m.protocol_port)
+                wanted.add(key)
+                if key not in on_device:
+                    ops.append(('member', 'create', m))
+                elif on_device[key] != bool(m.admin_state_up):
+                    ops.append(('member', 'update', m))
+            for key in sorted(set(on_device) - wanted):
+                removals.append(('member', 'remove', (name,) + key))
+
+            if pool.healthmonitor:
+                hm = copy.copy(pool.healthmonitor)
+                hm.pool = pool
+                hm_name = self.a10_driver.hm._meta_name(hm)
+                if (sg is None or inventory.service_group_monitor(sg) != hm_name or
+                        not inventory.exists(client.slb.hm, hm_name)):
+                    ops.append(('hm', 'create', hm))
+
+        stale = [v for v in vports if v['name'] not in listeners]
+        for v in stale:
+            removals.append(('listener', 'remove',
+                             (vs_name, v['name'], v['protocol'], v['port'])))
+        in_use = set(v['service_group'] for v in vports if v['name'] in listeners)
+        for name in sorted(set(v['service_group'] for v in stale) - in_use - pools):
+            if name:
+                removals.append(('pool', 'remove', name))
+
+        return ops + removals
+
+    def _refresh_apply(self, c, context, op):
+        resource, action, obj = op
+        if action == 'remove':
             try:
-                name = self.meta(lb, 'id', lb.id)
-                r = c.client.slb.virtual_server.stats(name)
-
-                return {
-                    "bytes_in": r["virtual_server_stat"]["req_bytes"],
-                    "bytes_out": r["virtual_server_stat"]["resp_bytes"],
-                    "active_connections":
-                        r["virtual_server_stat"]["cur_conns"],
-                    "total_connections": r["virtual_server_stat"]["tot_conns"]
-                }
-            except Exception:
-                return {
-                    "bytes_in": 0,
-                    "bytes_out": 0,
-                    "active_connections": 0,
-                    "total_connections": 0
-                }
+                if resource == 'member':
+                    c.client.slb.service_group.member.delete(*obj)
+                elif resource == 'listener':
+                    c.client.slb.virtual_server.vport.delete(*obj)
+                else:
+                    c.client.slb.service_group.delete(obj)
+            except acos_errors.NotFound:
+                pass
+            return
+
+        h = getattr(self.a10_driver, resource)
+        if action == 'create':
+            h._create(c, context, obj)
+        else:
+            h._update(c, context, obj)
 
     def refresh(self, context, lb):
-        LOG.debug("LB Refresh called.")
-        # Ensure all elements associated with this LB exist on the device.
+        """Repair drift between lb in neutron and its objects on the device.
+
+        Only missing objects, service group members that differ, and the
+        bindings that go with them are changed; nothing is written when
+        the device already matches.  Returns the changes made.
+        """
+
+        with a10.A10Context(self, context, lb) as c:
+            ops = self._refresh_plan(c, context, lb)
+        if not ops:
+            LOG.debug("A10Driver: loadbalancer %s is in sync", lb.id)
+            return ops
+
+        LOG.info("A10Driver: refresh of loadbalancer %s makes %d changes: %s",
+                 lb.id, len(ops), ", ".join("%s %s" % op[:2] for op in ops))
+        with a10.A10WriteContext(self, context, lb) as c:
+            for op in ops:
+                self._refresh_apply(c, context, op)
+        metrics.incr('refresh_changes', len(ops), device=c.device_cfg['name'])
+        return ops
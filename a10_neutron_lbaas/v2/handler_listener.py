@@ -160,12 +160,12 @@ class ListenerHandler(handler_base_v2.HandlerBaseV2):
         with a10.A10WriteStatusContext(self, context, listener) as c:
             self._create(c, context, listener)
 
-    def _update(self, c, context, listener):
+    def _update(self, c, context, listener, old_listener=None):
         self._set(c.client.slb.virtual_server.vport.update, c, context, listener)
 
     def update(self, context, old_listener, listener):
         with a10.A10WriteStatusContext(self, context, listener) as c:
-            self._update(c, context, listener)
+            self._update(c, context, listener, old_listener)
 
     def _delete(self, c, context, listener):
         try:
@@ -18,6 +18,9 @@ import logging
 import re
 
 import acos_client.errors as acos_errors
+from a10_neutron_lbaas.acos import inventory
+from a10_neutron_lbaas import parallel
+from a10_neutron_lbaas import stats_collector
 import handler_base_v2
 import v2_context as a10
 # tenant names allow some funky characters; we do not, as of 4.1.0
@@ -43,9 +46,14 @@ class MemberHandler(handler_base_v2.HandlerBaseV2):
     def _meta_name(self, member, ip_address):
         return self.meta(member, 'name', self._get_name(member, ip_address))
 
-    def _create(self, c, context, member):
-        server_ip = self.neutron.member_get_ip(context, member,
-                                               c.device_cfg['use_float'])
+    def _server_ip(self, c, context, member, server_ip=None):
+        if server_ip is None:
+            server_ip = self.neutron.member_get_ip(context, member,
+                                                   c.device_cfg['use_float'])
+        return server_ip
+
+    def _create(self, c, context, member, server_ip=None):
+        server_ip = self._server_ip(c, context, member, server_ip)
         server_name = self._meta_name(member, server_ip)
 
         status = c.client.slb.UP
@@ -58,7 +66,7 @@ class MemberHandler(handler_base_v2.HandlerBaseV2):
             server_args = {'server': self.meta(member, 'server', {})}
             c.client.slb.server.create(server_name, server_ip,
                                        status=status,
-                                       axapi_args=server_args,admin_state=admin_state)
+                                       axapi_args=server_args, admin_state=admin_state)
         except (acos_errors.Exists, acos_errors.AddressSpecifiedIsInUse):
             pass
 
@@ -79,43 +87,47 @@ class MemberHandler(handler_base_v2.HandlerBaseV2):
         with a10.A10WriteStatusContext(self, context, member) as c:
             self._create(c, context, member)
 
+    def _update(self, c, context, member, old_member=None, server_ip=None):
+        server_ip = self._server_ip(c, context, member, server_ip)
+        server_name = self._meta_name(member, server_ip)
+
+        status = c.client.slb.UP
+        admin_state = 'enable'
+        if not member.admin_state_up:
+            status = c.client.slb.DOWN
+            admin_state = 'disable'
+        try:
+            server_args = {'server': self.meta(member, 'server', {})}
+            c.client.slb.server.update(server_name, server_ip,
+                                       status=status,
+                                       axapi_args=server_args, admin_state=admin_state)
+
+            member_args = {'member': self.meta(member, 'member', {})}
+            c.client.slb.service_group.member.update(
+                self._pool_name(context, pool=member.pool),
+                server_name,
+                member.protocol_port,
+                status,
+                axapi_args=member_args)
+        except acos_errors.NotFound:
+            # Adding db relation after the fact
+            self._create(c, context, member, server_ip)
+
+        self.hooks.after_member_update(c, context, member)
+
     def update(self, context, old_member, member):
         with a10.A10WriteStatusContext(self, context, member) as c:
-            server_ip = self.neutron.member_get_ip(context, member,
-                                                   c.device_cfg['use_float'])
-            server_name = self._meta_name(member, server_ip)
+            self._update(c, context, member, old_member)
 
-            status = c.client.slb.UP
-            admin_state = 'enable'
-            if not member.admin_state_up:
-                status = c.client.slb.DOWN
-                admin_state = 'disable'
-            try:
-                server_args = {'server': self.meta(member, 'server', {})}
-                c.client.slb.server.update(server_name, server_ip,
-                                          status=status,
-                                          axapi_args=server_args,admin_state=admin_state)
-
-                member_args = {'member': self.meta(member, 'member', {})}
-                c.client.slb.service_group.member.update(
-                    self._pool_name(context, pool=member.pool),
-                    server_name,
-                    member.protocol_port,
-                    status,
-                    axapi_args=member_args)
-            except acos_errors.NotFound:
-                # Adding db relation after the fact
-                self._create(c, context, member)
-
-            self.hooks.after_member_update(c, context, member)
-
-    def _delete(self, c, context, member):
-        server_ip = self.neutron.member_get_ip(
-            context, member, c.device_cfg['use_float'])
+    def _delete(self, c, context, member, server_ip=None, delete_server=None):
+        server_ip = self._server_ip(c, context, member, server_ip)
         server_name = self._meta_name(member, server_ip)
 
+        if delete_server is None:
+            delete_server = self.neutron.member_count(context, member) <= 1
+
         try:
-            if self.neutron.member_count(context, member) > 1:
+            if not delete_server:
                 c.client.slb.service_group.member.delete(
                     self._pool_name(context, pool=member.pool),
                     server_name,
@@ -131,6 +143,107 @@ class MemberHandler(handler_base_v2.HandlerBaseV2):
         with a10.A10DeleteContext(self, context, member) as c:
             self._delete(c, context, member)
 
+    def _apply_all(self, c, context, members, ips, apply):
+        """Run apply(c, member, server_ip) for members on c's device.
+
+        Up to bulk_concurrency changes are sent at once, each on a pooled
+        session of its own; the caller keeps c for its write.  Returns an
+        (member, exception) pair for each failure.
+        """
+
+        # c already holds one of the device's pooled sessions.
+        concurrency = min(c.device_cfg.get('bulk_concurrency', 1),
+                          c.device_cfg.get('session_pool_max', 4) - 1)
+
+        def call(member):
+            if concurrency <= 1:
+                return apply(c, member, ips[member.address])
+            with a10.A10Context(self, context, member,
+                                device_name=c.device_cfg['name']) as wc:
+                return apply(wc, member, ips[member.address])
+
+        failed = []
+        for member, (result, e) in zip(members, parallel.run(call, members, concurrency)):
+            if e is not None:
+                LOG.error("A10Driver: change of member %s failed: %s", member.id, e)
+                failed.append((member, e))
+        return failed
+
+    def _bulk_group(self, context, device_name, members, apply):
+        try:
+            with a10.A10BatchContext(self, context, members[0],
+                                     device_name=device_name) as c:
+                ips = self.neutron.member_get_ips(context, members,
+                                                  c.device_cfg['use_float'])
+                return self._apply_all(c, context, members, ips, apply)
+        except Exception as e:
+            LOG.exception("A10Driver: bulk member change on device %s failed",
+                          device_name)
+            return [(m, e) for m in members]
+
+    def _bulk(self, context, members, apply, delete=False):
+        """Apply a change to many members with one write per device partition.
+
+        Members are grouped by device and partition, and by pool within
+        those; each group resolves its member addresses in one query and
+        sends its changes bulk_concurrency at a time.  Success or failure
+        is reported for every member; the (member, exception) pairs of the
+        failures are returned.
+        """
+
+        members = sorted(members, key=lambda m: m.pool.id)
+        failed = []
+        for (name, partition_name), group in self._device_groups(members):
+            LOG.debug("A10Driver: %d members on %s/%s", len(group), name, partition_name)
+            failed.extend(self._bulk_group(context, name, group, apply))
+
+        failed_ids = set(m.id for m, e in failed)
+        for m in members:
+            if m.id in failed_ids:
+                self.openstack_manager.failed_completion(context, m)
+            else:
+                self.openstack_manager.successful_completion(context, m, delete=delete)
+        return failed
+
+    def create_many(self, context, members):
+        def apply(c, member, server_ip):
+            self._create(c, context, member, server_ip)
+
+        return self._bulk(context, members, apply)
+
+    def update_many(self, context, changes):
+        """changes is a list of (old_member, member) pairs."""
+
+        old_members = dict((m.id, old) for old, m in changes)
+
+        def apply(c, member, server_ip):
+            self._update(c, context, member, old_members[member.id], server_ip)
+
+        return self._bulk(context, [m for old, m in changes], apply)
+
+    def _servers_to_delete(self, context, members):
+        """Whether deleting members removes their server, by (tenant, address).
+
+        The server goes away with the last member using its address, so
+        the members being deleted are subtracted from the address's count.
+        """
+
+        deleting = {}
+        for m in members:
+            key = (m.tenant_id, m.address)
+            deleting[key] = deleting.get(key, 0) + 1
+        counts = self.neutron.member_counts(context, members)
+        return dict((k, counts[k] <= n) for k, n in deleting.items())
+
+    def delete_many(self, context, members):
+        delete_server = self._servers_to_delete(context, members)
+
+        def apply(c, member, server_ip):
+            self._delete(c, context, member, server_ip,
+                         delete_server[(member.tenant_id, member.address)])
+
+        return self._bulk(context, members, apply, delete=True)
+
     def stats(self, context, member):
         retval = {
             "servers_up": 0,
@@ -140,13 +253,22 @@ class MemberHandler(handler_base_v2.HandlerBaseV2):
         }
 
         try:
-            with a10.A10Context(self, context, member) as c:
-                server_ip = self.neutron.member_get_ip(context, member,
-                                                       c.device_cfg['use_float'])
-                server_name = self._meta_name(member, server_ip)
+            # The address is looked up here, not in the read: a cached
+            # entry may be refreshed after this request has finished.
+            device = self.a10_driver._select_a10_device(self._tenant_id(member))
+            server_ip = self.neutron.member_get_ip(context, member, device['use_float'])
+            server_name = self._meta_name(member, server_ip)
+            pool_name = self._pool_name(context, pool=member.pool)
+
+            def read(c):
+                members = inventory.one_service_group_stats(c.client, c.device_cfg,
+                                                            pool_name)[1]
+                return members.get((server_name, member.protocol_port), {})
 
-                stats = c.client.slb.service_group.member.stats(name=server_name)
-                retval = stats
+            retval = self._cached_stats(
+                context, member, read, device=device,
+                collected=(stats_collector.MEMBER,
+                           (pool_name, server_name, member.protocol_port)))
 
         except Exception as ex:
             LOG.exception(ex)
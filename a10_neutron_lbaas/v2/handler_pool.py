@@ -15,7 +15,10 @@
 import copy
 import logging
 
+from a10_neutron_lbaas import a10_exceptions as ex
+from a10_neutron_lbaas.acos import inventory
 from a10_neutron_lbaas.acos import openstack_mappings
+from a10_neutron_lbaas import stats_collector
 import acos_client.errors as acos_errors
 import handler_base_v2
 import handler_persist
@@ -49,40 +52,58 @@ class PoolHandler(handler_base_v2.HandlerBaseV2):
 
     def create(self, context, pool):
         with a10.A10WriteStatusContext(self, context, pool) as c:
-            try:
-                self._set(c.client.slb.service_group.create,
-                          c, context, pool)
-            except acos_errors.Exists:
-                pass
+            self._create(c, context, pool)
+
+    def _update(self, c, context, pool, old_pool=None):
+        self._set(c.client.slb.service_group.update,
+                  c, context, pool, old_pool)
 
     def update(self, context, old_pool, pool):
         with a10.A10WriteStatusContext(self, context, pool) as c:
+            self._update(c, context, pool, old_pool)
+
+    def _delete_members(self, c, context, pool):
+        handler = self.a10_driver.member
+        delete_server = handler._servers_to_delete(context, pool.members)
+        ips = self.neutron.member_get_ips(context, pool.members,
+                                          c.device_cfg['use_float'])
+
+        def apply(mc, member, server_ip):
+            handler._delete(mc, context, member, server_ip,
+                            delete_server[(member.tenant_id, member.address)])
+
+        # Every member has to be gone before the service group is.
+        failed = handler._apply_all(c, context, pool.members, ips, apply)
+        if failed:
+            raise ex.BulkOperationError(
+                "%d of %d members of pool %s could not be deleted" %
+                (len(failed), len(pool.members), pool.id), failed)
+
+    def _delete(self, c, context, pool):
+        if pool.members:
+            self._delete_members(c, context, pool)
+
+        LOG.debug("handler_pool.delete(): Checking pool health monitor...")
+        if pool.healthmonitor:
+            # The pool.healthmonitor we get doesn't have a pool
+            # Make a new one with the hm as the root
+            hm = copy.copy(pool.healthmonitor)
+            hm.pool = copy.copy(pool)
+            hm.pool.healthmonitor = None
+            LOG.debug("handler_pool.delete(): HM: %s" % hm)
+            self.a10_driver.hm._delete(c, context, hm)
 
-            self._set(c.client.slb.service_group.update,
-                      c, context, pool, old_pool)
+        try:
+            c.client.slb.service_group.delete(self._meta_name(pool))
+        except (acos_errors.NotFound, acos_errors.NoSuchServiceGroup):
+            pass
+
+        handler_persist.PersistHandler(
+            c, context, pool, self._meta_name(pool)).delete()
 
     def delete(self, context, pool):
         with a10.A10DeleteContext(self, context, pool) as c:
-            for member in pool.members:
-                self.a10_driver.member._delete(c, context, member)
-
-            LOG.debug("handler_pool.delete(): Checking pool health monitor...")
-            if pool.healthmonitor:
-                # The pool.healthmonitor we get doesn't have a pool
-                # Make a new one with the hm as the root
-                hm = copy.copy(pool.healthmonitor)
-                hm.pool = copy.copy(pool)
-                hm.pool.healthmonitor = None
-                LOG.debug("handler_pool.delete(): HM: %s" % hm)
-                self.a10_driver.hm._delete(c, context, hm)
-
-            try:
-                c.client.slb.service_group.delete(self._meta_name(pool))
-            except (acos_errors.NotFound, acos_errors.NoSuchServiceGroup):
-                pass
-
-            handler_persist.PersistHandler(
-                c, context, pool, self._meta_name(pool)).delete()
+            self._delete(c, context, pool)
 
     def _update_session_persistence(self, old_pool, pool, c, context):
         # didn't exist, does exist, create
@@ -110,13 +131,13 @@ class PoolHandler(handler_base_v2.HandlerBaseV2):
         # did exist, does exist, didn't change
         return
 
+    def _read_stats(self, c, pool):
+        name = self._meta_name(pool)
+        if name is None:
+            return stats_collector.pool_stats({}, {})
+        return stats_collector.pool_stats(
+            *inventory.one_service_group_stats(c.client, c.device_cfg, name))
+
     def stats(self, context, pool):
-        result = {"stats": {}, "members": {}}
-        with a10.A10Context(self, context, pool) as c:
-            name = pool.id
-            if name is not None:
-                stats = c.client.slb.service_group.stats(name)
-                result["stats"] = stats.get("stats", {})
-                result["members"] = stats.get("members", {})
-
-        return result
+        return self._cached_stats(context, pool, lambda c: self._read_stats(c, pool),
+                                  collected=(stats_collector.POOL, self._meta_name(pool)))
@@ -10,6 +10,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+import weakref
+
+import sqlalchemy
+
 try:
     from neutron.db import l3_db
 except ImportError:
@@ -21,6 +26,21 @@ except ImportError:
     # v2 does not exist before Kilo
     pass
 
+# Floating IPs looked up while serving a request, by request context. A
+# pool delete or bulk member change asks for the same addresses many
+# times; entries go away with the context.
+_float_ips = weakref.WeakKeyDictionary()
+_float_ips_lock = threading.Lock()
+
+
+def _request_float_ips(context):
+    try:
+        with _float_ips_lock:
+            return _float_ips.setdefault(context, {})
+    except TypeError:
+        # No context (or one that cannot be weakly referenced); no caching.
+        return {}
+
 
 class NeutronOpsV2(object):
 
@@ -30,19 +50,62 @@ class NeutronOpsV2(object):
 
     def member_get_ip(self, context, member, use_float=False):
         ip_address = member.address
-        if use_float:
-            fip_qry = context.session.query(l3_db.FloatingIP)
-            if (fip_qry.filter_by(fixed_ip_address=ip_address).count() > 0):
-                float_address = fip_qry.filter_by(
-                    fixed_ip_address=ip_address).first()
-                ip_address = str(float_address.floating_ip_address)
-        return ip_address
+        if not use_float:
+            return ip_address
+
+        cache = _request_float_ips(context)
+        if ip_address not in cache:
+            fip = context.session.query(l3_db.FloatingIP).filter_by(
+                fixed_ip_address=ip_address).first()
+            if fip is not None:
+                cache[ip_address] = str(fip.floating_ip_address)
+            else:
+                cache[ip_address] = ip_address
+        return cache[ip_address]
+
+    def member_get_ips(self, context, members, use_float=False):
+        """member_get_ip for many members in one query, keyed by address."""
+
+        ips = dict((m.address, m.address) for m in members)
+        if not use_float or not ips:
+            return ips
+
+        cache = _request_float_ips(context)
+        missing = [a for a in ips if a not in cache]
+        if missing:
+            fips = context.session.query(l3_db.FloatingIP).filter(
+                l3_db.FloatingIP.fixed_ip_address.in_(missing))
+            found = {}
+            for fip in fips:
+                found.setdefault(fip.fixed_ip_address, str(fip.floating_ip_address))
+            for a in missing:
+                cache[a] = found.get(a, a)
+        return dict((a, cache[a]) for a in ips)
 
     def member_count(self, context, member):
         return context.session.query(lb_db.MemberV2).filter_by(
             tenant_id=member.tenant_id,
             address=member.address).count()
 
+    def member_counts(self, context, members):
+        """member_count for many members in one query, by (tenant_id, address)."""
+
+        counts = dict(((m.tenant_id, m.address), 0) for m in members)
+        if not counts:
+            return counts
+
+        member = lb_db.MemberV2
+        rows = context.session.query(
+            member.tenant_id, member.address, sqlalchemy.func.count(member.id)
+        ).filter(
+            member.tenant_id.in_(set(t for t, a in counts)),
+            member.address.in_(set(a for t, a in counts))
+        ).group_by(member.tenant_id, member.address)
+        for tenant_id, address, n in rows:
+            if (tenant_id, address) in counts:
+                counts[(tenant_id, address)] = n
+        return counts
+
     def loadbalancer_total(self, context, tenant_id):
         return context.session.query(lb_db.LoadBalancer).filter_by(
             tenant_id=tenant_id).count()
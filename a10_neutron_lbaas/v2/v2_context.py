@@ -53,3 +53,25 @@ class A10DeleteContext(a10_context.A10DeleteContextBase):
     def remaining_root_objects(self):
         ctx = self.openstack_context
         return self.handler.neutron.loadbalancer_total(ctx, self.tenant_id)
+
+
+class A10BatchContext(a10_context.A10DeleteContextBase):
+    """One device session, partition activation and write for many changes.
+
+    Status is reported per object by the batch handler, so this context
+    only decides whether the partition may be cleaned up afterwards.
+    """
+
+    def __init__(self, handler, openstack_context, openstack_lbaas_obj,
+                 **kwargs):
+        super(A10BatchContext, self).__init__(handler, openstack_context,
+                                              openstack_lbaas_obj, **kwargs)
+        self.has_deletes = kwargs.get('has_deletes', False)
+
+    def remaining_root_objects(self):
+        ctx = self.openstack_context
+        return self.handler.neutron.loadbalancer_total(ctx, self.tenant_id)
+
+    def partition_cleanup_check(self):
+        if self.has_deletes:
+            super(A10BatchContext, self).partition_cleanup_check()
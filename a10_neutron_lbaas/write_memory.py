@@ -0,0 +1,205 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import threading
+import time
+
+import acos_client.errors as acos_errors
+
+from a10_neutron_lbaas import metrics
+
+LOG = logging.getLogger(__name__)
+
+# A partition whose write keeps failing is dropped after this many tries.
+MAX_ATTEMPTS = 3
+
+
+def write_partition(client, device_cfg, partition_name, activate=False):
+    """Save partition_name's running config.
+
+    On aXAPI 3.0 activate_and_write() ignores its partition and saves the
+    active one, so a session that may have another partition active, like
+    the flusher's, must pass activate.
+    """
+
+    with metrics.timer('axapi_seconds', op='write_memory', device=device_cfg['name']):
+        if activate:
+            try:
+                client.system.partition.active(partition_name or 'shared')
+            except acos_errors.NotFound:
+                LOG.info("A10Driver: partition %s on %s is gone, not writing it",
+                         partition_name, device_cfg['name'])
+                return
+        try:
+            client.system.action.activate_and_write(partition_name)
+        except acos_errors.InvalidSessionID:
+            pass
+    metrics.incr('write_memory', device=device_cfg['name'])
+
+
+class DeviceFlusher(threading.Thread):
+    """Performs the pending write-memory operations for one appliance.
+
+    Partitions are marked dirty by write contexts; window seconds after the
+    first mark, every dirty partition is written once, followed by a single
+    HA sync.
+    """
+
+    def __init__(self, driver, device_cfg, window):
+        super(DeviceFlusher, self).__init__(
+            name="a10-write-memory-%s" % device_cfg['name'])
+        self.daemon = True
+        self.driver = driver
+        self.device_cfg = device_cfg
+        self.window = window
+        self.cond = threading.Condition(threading.Lock())
+        self.pending = {}
+        self.attempts = {}
+        self.stopping = False
+
+    def mark(self, partition_name):
+        with self.cond:
+            if partition_name in self.pending:
+                metrics.incr('write_memory_coalesced', device=self.device_cfg['name'])
+            else:
+                self.pending[partition_name] = time.time()
+                self.cond.notify()
+
+    def discard(self, partition_name):
+        with self.cond:
+            self.pending.pop(partition_name, None)
+            self.attempts.pop(partition_name, None)
+
+    def stop(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                if not self.stopping:
+                    due = min(self.pending.values()) + self.window
+                    now = time.time()
+                    if now < due:
+                        self.cond.wait(due - now)
+                        continue
+                batch, self.pending = self.pending.keys(), {}
+
+            self.flush(batch)
+
+    def flush(self, partitions):
+        failed = []
+        try:
+            client = self.driver._get_a10_client(self.device_cfg)
+        except Exception:
+            LOG.exception("A10Driver: write memory on %s deferred, no session",
+                          self.device_cfg['name'])
+            failed = partitions
+        else:
+            try:
+                for p in partitions:
+                    try:
+                        write_partition(client, self.device_cfg, p, activate=True)
+                        self.attempts.pop(p, None)
+                    except Exception:
+                        LOG.exception("A10Driver: write memory of partition %s on %s failed",
+                                      p, self.device_cfg['name'])
+                        failed.append(p)
+                if len(failed) < len(partitions):
+                    self.driver.ha_sync_queue.sync(self.device_cfg, client)
+            except Exception:
+                LOG.exception("A10Driver: ha sync from %s failed", self.device_cfg['name'])
+            finally:
+                self.driver._release_a10_client(self.device_cfg, client)
+
+        for p in failed:
+            with self.cond:
+                n = self.attempts.get(p, 0) + 1
+                if n >= MAX_ATTEMPTS:
+                    LOG.error("A10Driver: giving up on write memory of partition %s on %s",
+                              p, self.device_cfg['name'])
+                    self.attempts.pop(p, None)
+                    continue
+                self.attempts[p] = n
+            self.mark(p)
+
+
+class WriteMemoryCoalescer(object):
+    """Write-behind for write memory, per device and partition.
+
+    Devices with a write_memory_window of 0 (the default), and callers that
+    ask for it, get the old synchronous write in the request.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.flushers = {}
+
+    def _flusher(self, device_cfg, create=True):
+        if self.pid != os.getpid():
+            self._reset()
+        name = device_cfg['name']
+        f = self.flushers.get(name)
+        if f is None and create:
+            with self.lock:
+                f = self.flushers.get(name)
+                if f is None:
+                    f = DeviceFlusher(self.driver, device_cfg,
+                                      device_cfg.get('write_memory_window', 0))
+                    f.start()
+                    self.flushers[name] = f
+        return f
+
+    def write(self, device_cfg, client, partition_name, sync=False):
+        if sync or not device_cfg.get('write_memory_window', 0):
+            f = self._flusher(device_cfg, create=False)
+            if f is not None:
+                f.discard(partition_name)
+            write_partition(client, device_cfg, partition_name)
+            self.driver.ha_sync_queue.sync(device_cfg, client)
+        else:
+            self._flusher(device_cfg).mark(partition_name)
+
+    def forget(self, device_cfg, partition_name):
+        """Drop a pending write for a partition that no longer exists."""
+
+        f = self._flusher(device_cfg, create=False)
+        if f is not None:
+            f.discard(partition_name)
+
+    def flush_all(self, timeout):
+        """Write everything pending now; used on shutdown."""
+
+        if self.pid != os.getpid():
+            return
+        with self.lock:
+            flushers, self.flushers = self.flushers.values(), {}
+        for f in flushers:
+            f.stop()
+        deadline = time.time() + timeout
+        for f in flushers:
+            f.join(max(0, deadline - time.time()))
+            if f.is_alive():
+                LOG.error("A10Driver: pending write memory on %s did not finish",
+                          f.device_cfg['name'])